@@ -0,0 +1,285 @@
+"""
+Benchmark suite for the option pricers.
+
+Every case records wall time (best of several runs), peak memory (tracemalloc)
+and, where a reference value is known, the absolute pricing error. Results are
+stored as JSON; when a baseline file is given, the run fails if a case got
+slower than the baseline by more than the threshold or missed its accuracy
+tolerance.
+
+Usage:
+    python -m benchmarks.run_benchmarks --save-baseline       # record benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks                       # compare against it
+    python -m benchmarks.run_benchmarks --quick --filter kiko # small sizes, KIKO cases only
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import scipy
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from options.european_option import EuropeanOption
+from options.american_option import AmericanOption
+from options.asian_option import GeometricAsianOption, ArithmeticAsianOption
+from options.basket_option import GeometricBasketOption, ArithmeticBasketOption
+from options.kiko_option import KIKOOption
+from pricer.closed_form_pricer import ClosedFormPricer
+from pricer.implied_volatility_calculator import ImpliedVolatility
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, 'latest.json')
+
+# Reference values. Closed forms and the tree are checked against the tables in README.md;
+# Monte Carlo products against high-precision runs (1M+ paths with control variate, 2^21 Sobol paths for KIKO).
+REFERENCES = {
+    'european': 3.7385,              # S=100, K=100, T=3, r=0.05, q=0.2, sigma=0.3, call
+    'american': 3.4185,              # S=50, K=40, T=2, r=0.1, sigma=0.4, put, 200 steps
+    'geometric_asian': 8.4827,       # S=100, K=100, T=3, r=0.05, sigma=0.3, n=50, put
+    'arithmetic_asian': 7.8030,      # same contract, arithmetic average
+    'geometric_basket': 11.4916,     # S=[100, 100], K=100, T=3, r=0.05, sigma=[0.3, 0.3], rho=0.5, put
+    'arithmetic_basket': 10.5778,    # same contract, arithmetic average
+    'kiko': 6.0013,                  # S=100, K=100, T=2, r=0.05, sigma=0.2, L=80, U=125, n=24, rebate=1.5
+    'implied_volatility': 0.3385,    # call premium 5, S=100, K=100, T=3, r=0.05, q=0.2
+}
+
+
+# Standard errors of the Monte Carlo cases at 100,000 paths, used to scale their tolerances
+STANDARD_ERRORS_100K = {
+    ('arithmetic_asian', True): 0.0023,
+    ('arithmetic_asian', False): 0.035,
+    ('arithmetic_basket', 'geometric'): 0.0062,
+    ('arithmetic_basket', 'none'): 0.048,
+    ('kiko', None): 0.033,
+}
+
+
+# Known bias of the analytic arithmetic Asian approximations on the reference contract (error bounds, not noise)
+APPROXIMATION_TOLERANCES = {
+    'levy': 0.25,
+    'curran': 0.01,
+}
+
+
+def _mc_tolerance(key, num_paths):
+    """
+    Accuracy tolerance of a Monte Carlo case: four standard errors at the given number of paths.
+    """
+    return 4 * STANDARD_ERRORS_100K[key] * np.sqrt(100000 / num_paths)
+
+
+def _first(value):
+    """
+    Reduce a pricer output (scalar, array or (price, CI) tuple) to one float.
+    """
+    if isinstance(value, tuple):
+        value = value[0]
+    return float(np.ravel(value)[0])
+
+
+class BenchmarkSuite:
+
+    def __init__(self, repeat: int = 3, quick: bool = False):
+        """
+        Constructor for BenchmarkSuite class.
+
+        :param repeat: Number of timed runs per case (the best one is kept)
+        :param quick: Use only the smallest problem sizes
+        """
+        self.repeat = repeat
+        self.quick = quick
+
+    def cases(self):
+        """
+        Build the list of benchmark cases.
+
+        :return: List of (name, function, reference, tolerance); tolerance is None when the
+                 size is not comparable to the reference (accuracy is then reported only)
+        """
+        pricer = ClosedFormPricer()
+        quick = self.quick
+        cases = []
+
+        for batch in ([1, 1000] if quick else [1, 1000, 100000]):
+            cases.append((f"european[batch={batch}]",
+                          lambda b=batch: pricer.european(np.full(b, 100.0), 0.05, 3, 100, 0.2, 0.3, 'call'),
+                          REFERENCES['european'], 1e-4))
+            cases.append((f"geometric_asian[batch={batch}]",
+                          lambda b=batch: pricer.geometric_asian(np.full(b, 100.0), 0.05, 3, 100, 0.3, 50, 'put'),
+                          REFERENCES['geometric_asian'], 1e-4))
+            cases.append((f"geometric_basket[batch={batch}]",
+                          lambda b=batch: pricer.geometric_basket(np.full((b, 2), 100.0), 0.05, 3, 100, [0.3, 0.3], 0.5, 'put'),
+                          REFERENCES['geometric_basket'], 1e-4))
+            for method in ('levy', 'curran'):
+                # Error against the Monte Carlo reference of the same contract
+                cases.append((f"arithmetic_asian_{method}[batch={batch}]",
+                              lambda b=batch, m=method: pricer.arithmetic_asian(np.full(b, 100.0), 0.05, 3, 100, 0.3, 50, 'put', m),
+                              REFERENCES['arithmetic_asian'], APPROXIMATION_TOLERANCES[method]))
+
+        cases.append(("european_option[single]",
+                      lambda: EuropeanOption(100, 0.05, 3, 100, 0.2, 0.3, 'call').price(),
+                      REFERENCES['european'], 1e-4))
+        cases.append(("geometric_asian_option[single]",
+                      lambda: GeometricAsianOption(100, 0.05, 3, 100, 0.3, 50, 'put').price(),
+                      REFERENCES['geometric_asian'], 1e-4))
+        cases.append(("geometric_basket_option[single]",
+                      lambda: GeometricBasketOption([100, 100], 0.05, 3, 100, [0.3, 0.3], 0.5, 'put').price(),
+                      REFERENCES['geometric_basket'], 1e-4))
+
+        for steps in ([50, 200] if quick else [50, 200, 1000]):
+            cases.append((f"american[steps={steps}]",
+                          lambda s=steps: AmericanOption(50, 0.1, 2, 40, 0.4, s, 'put').price(),
+                          REFERENCES['american'], 1e-4 if steps == 200 else None))
+
+        for paths in ([10000] if quick else [10000, 100000]):
+            for observations in ([12, 50] if quick else [12, 50, 250]):
+                for use_cv in (True, False):
+                    cases.append((f"arithmetic_asian[paths={paths},obs={observations},cv={use_cv}]",
+                                  lambda p=paths, n=observations, cv=use_cv: ArithmeticAsianOption(100, 0.05, 3, 100, 0.3, n, p, cv, 'put').price(),
+                                  REFERENCES['arithmetic_asian'], _mc_tolerance(('arithmetic_asian', use_cv), paths) if observations == 50 else None))
+            for control_variate in ('geometric', 'none'):
+                cases.append((f"arithmetic_basket[paths={paths},cv={control_variate}]",
+                              lambda p=paths, cv=control_variate: ArithmeticBasketOption([100, 100], 0.05, 3, 100, [0.3, 0.3], 0.5, 'put', p, cv).price(),
+                              REFERENCES['arithmetic_basket'], _mc_tolerance(('arithmetic_basket', control_variate), paths)))
+
+        for paths in ([2**12, 2**14] if quick else [2**12, 2**14, 2**17]):
+            for observations in ([24] if quick else [24, 96]):
+                cases.append((f"kiko[paths={paths},obs={observations}]",
+                              lambda p=paths, n=observations: KIKOOption(100, 0.05, 2.0, 100, 0.2, 80, 125, n, 1.5).price(num_paths=p),
+                              REFERENCES['kiko'], _mc_tolerance(('kiko', None), paths) if observations == 24 else None))
+
+        calculator = ImpliedVolatility()
+        for batch in ([1, 100] if quick else [1, 100, 1000]):
+            cases.append((f"implied_volatility[batch={batch}]",
+                          lambda b=batch: [calculator.calculate('call', 100, 0.05, 0.2, 3, 100, 5) for _ in range(b)],
+                          REFERENCES['implied_volatility'], 1e-4))
+        return cases
+
+    def run_case(self, function, reference, tolerance):
+        """
+        Time one case, measure its peak memory and check its accuracy.
+
+        :return: Dictionary of measurements
+        """
+        times = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            value = function()
+            times.append(time.perf_counter() - start)
+
+        # Memory is measured in a separate run so tracing does not distort the timings
+        tracemalloc.start()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        value = _first(value)
+        error = abs(value - reference)
+        return {
+            'wall_time': min(times),
+            'peak_memory_bytes': peak,
+            'value': value,
+            'reference': reference,
+            'abs_error': error,
+            'tolerance': tolerance,
+            'accurate': None if tolerance is None else bool(error <= tolerance),
+        }
+
+    def run(self, name_filter: str = None, verbose: bool = True):
+        """
+        Run all cases (optionally only those whose name contains name_filter).
+
+        :return: Dictionary with run metadata and per-case results
+        """
+        results = {}
+        with warnings.catch_warnings():
+            # Sobol sizes that are not powers of two trigger a warning on every call
+            warnings.simplefilter('ignore')
+            for name, function, reference, tolerance in self.cases():
+                if name_filter and name_filter not in name:
+                    continue
+                results[name] = self.run_case(function, reference, tolerance)
+                if verbose:
+                    r = results[name]
+                    print(f"{name:55s} {r['wall_time'] * 1e3:10.3f} ms {r['peak_memory_bytes'] / 2**20:9.2f} MiB  "
+                          f"value {r['value']:.6f}  error {r['abs_error']:.2e}")
+        return {
+            'metadata': {
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'scipy': scipy.__version__,
+                'machine': platform.platform(),
+                'repeat': self.repeat,
+            },
+            'results': results,
+        }
+
+    @staticmethod
+    def compare(current, baseline, threshold: float = 1.25, min_slowdown: float = 1e-3):
+        """
+        Compare a run with a baseline run.
+
+        :param current: Output of run()
+        :param baseline: Output of run() loaded from the baseline file
+        :param threshold: Maximum allowed ratio of current to baseline wall time
+        :param min_slowdown: Slowdowns smaller than this many seconds are ignored as timer noise
+        :return: List of failure messages (empty when everything passed)
+        """
+        failures = []
+        for name, result in current['results'].items():
+            if result['accurate'] is False:
+                failures.append(f"{name}: error {result['abs_error']:.2e} exceeds tolerance {result['tolerance']:.2e}")
+            old = baseline['results'].get(name)
+            if old is None:
+                continue
+            ratio = result['wall_time'] / old['wall_time']
+            if ratio > threshold and result['wall_time'] - old['wall_time'] > min_slowdown:
+                failures.append(f"{name}: {result['wall_time'] * 1e3:.3f} ms vs baseline {old['wall_time'] * 1e3:.3f} ms ({ratio:.2f}x)")
+        return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the option pricers and check for regressions.")
+    parser.add_argument('--quick', action='store_true', help="only run the smallest problem sizes")
+    parser.add_argument('--filter', default=None, help="only run cases whose name contains this string")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per case (best is kept)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="where to write the results JSON")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline results JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="write the results to the baseline file")
+    parser.add_argument('--threshold', type=float, default=1.25, help="maximum allowed slowdown ratio")
+    args = parser.parse_args(argv)
+
+    suite = BenchmarkSuite(repeat=args.repeat, quick=args.quick)
+    results = suite.run(args.filter)
+
+    output = args.baseline if args.save_baseline else args.output
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+    if args.save_baseline:
+        return 0
+
+    failures = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures = suite.compare(results, baseline, args.threshold)
+    else:
+        print(f"No baseline at {args.baseline}; only accuracy is checked (use --save-baseline to record one).")
+        failures = suite.compare(results, {'results': {}}, args.threshold)
+
+    for failure in failures:
+        print("FAIL", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,13 +18,19 @@ from pricer.implied_volatility_calculator import ImpliedVolatility
 from options.asian_option import ArithmeticAsianOption,GeometricAsianOption
 from options.kiko_option import KIKOOption
 from options.basket_option import ArithmeticBasketOption,GeometricBasketOption
+from pricer.closed_form_pricer import ClosedFormPricer
+from pricer.binomial_tree_pricer import BiniomialTreePricer
+from portfolio.batch_pricing import BatchPricer, load_trades, export_results
+import numpy as np
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QPushButton, QLabel,
-    QVBoxLayout, QGridLayout,
-    QFormLayout, QMessageBox,QLineEdit,QComboBox
+    QVBoxLayout, QHBoxLayout, QGridLayout,
+    QFormLayout, QMessageBox,QLineEdit,QComboBox,QSlider,
+    QTableView, QProgressBar, QFileDialog, QHeaderView
 )
 
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer, QPointF, QAbstractTableModel, QModelIndex, QThread, pyqtSignal
+from PyQt5.QtGui import QPainter, QPen, QColor, QPolygonF
 
 
 # -------- 子页面基类 --------
@@ -70,6 +76,184 @@ class BasePage(QWidget):
         self.setLayout(layout)
 
 
+# -------- 价格曲线 --------
+class PriceChart(QWidget):
+    def __init__(self):
+        """
+        Line chart of option price against one parameter, drawn directly with QPainter.
+        """
+        super().__init__()
+        self.setMinimumHeight(220)
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+        self.marker = None
+        self.x_label = ""
+
+    def set_data(self, x, y, marker=None, x_label=""):
+        """
+        Replace the curve and schedule a repaint.
+
+        :param x: Grid of parameter values
+        :param y: Prices on the grid
+        :param marker: Optional (x, y) point of the current inputs
+        :param x_label: Name of the parameter on the x axis
+        """
+        self.x, self.y, self.marker, self.x_label = np.asarray(x, dtype=float), np.asarray(y, dtype=float), marker, x_label
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), QColor("#ffffff"))
+        finite = np.isfinite(self.y)
+        if not np.any(finite):
+            painter.end()
+            return
+
+        left, top, right, bottom = 55, 10, self.width() - 10, self.height() - 30
+        x_min, x_max = self.x[0], self.x[-1]
+        y_min, y_max = np.min(self.y[finite]), np.max(self.y[finite])
+        if y_max - y_min < 1e-12:
+            y_min, y_max = y_min - 1, y_max + 1
+        x_scale = (right - left) / (x_max - x_min) if x_max > x_min else 0.0
+        y_scale = (bottom - top) / (y_max - y_min)
+
+        # 坐标轴
+        painter.setPen(QPen(QColor("#7f8c8d"), 1))
+        painter.drawLine(left, bottom, right, bottom)
+        painter.drawLine(left, top, left, bottom)
+        painter.drawText(left, bottom + 18, f"{x_min:.4g}")
+        painter.drawText(right - 40, bottom + 18, f"{x_max:.4g}")
+        painter.drawText((left + right) // 2 - 30, bottom + 18, self.x_label)
+        painter.drawText(2, bottom, f"{y_min:.4g}")
+        painter.drawText(2, top + 10, f"{y_max:.4g}")
+
+        # 价格曲线: the whole grid is mapped to screen coordinates in one vectorized step
+        px = left + (self.x[finite] - x_min) * x_scale
+        py = bottom - (self.y[finite] - y_min) * y_scale
+        painter.setPen(QPen(QColor("#2980b9"), 2))
+        painter.drawPolyline(QPolygonF([QPointF(a, b) for a, b in zip(px.tolist(), py.tolist())]))
+
+        if self.marker is not None and np.isfinite(self.marker[1]):
+            mx = left + (self.marker[0] - x_min) * x_scale
+            my = bottom - (self.marker[1] - y_min) * y_scale
+            painter.setPen(QPen(QColor("#e74c3c"), 2))
+            painter.drawEllipse(QPointF(mx, my), 4, 4)
+        painter.end()
+
+
+# -------- 敏感度面板 --------
+class SensitivityPanel(QWidget):
+    # Number of points of the price curve
+    GRID_POINTS = 500
+    # Milliseconds without input before repricing, so dragging a slider does not queue up work
+    DEBOUNCE_MS = 30
+
+    def __init__(self, inputs, read_params, price_grid, sliders, axes, result_output):
+        """
+        Sliders bound to the input fields of a page, live repricing and a price curve.
+
+        Moving a slider writes the value into the page's input field; any edit
+        restarts a short debounce timer, and when it fires the price and the
+        curve are recomputed with one vectorized pricer call over the grid.
+
+        :param inputs: The page's dictionary of input fields
+        :param read_params: Function returning the page's parameters as a dictionary (raises on invalid input)
+        :param price_grid: Function (params, axis, grid) returning prices with params[axis] replaced by each grid value
+        :param sliders: List of (input key, minimum, maximum) of the fields that get a slider
+        :param axes: Dictionary of chart axis name to (params key, function params -> grid)
+        :param result_output: Field showing the current price
+        """
+        super().__init__()
+        self.inputs = inputs
+        self.read_params = read_params
+        self.price_grid = price_grid
+        self.axes = axes
+        self.result_output = result_output
+        self.sliders = {}
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.DEBOUNCE_MS)
+        self.timer.timeout.connect(self.refresh)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        for key, minimum, maximum in sliders:
+            slider = QSlider(Qt.Horizontal)
+            slider.setRange(0, 1000)
+            slider.valueChanged.connect(lambda position, k=key: self.slider_moved(k, position))
+            self.sliders[key] = (slider, minimum, maximum)
+            row = QHBoxLayout()
+            label = QLabel(f"{key}:")
+            label.setFixedWidth(50)
+            row.addWidget(label)
+            row.addWidget(slider)
+            layout.addLayout(row)
+
+        for key, edit in inputs.items():
+            edit.textChanged.connect(lambda _, k=key: self.text_changed(k))
+
+        self.axis_box = QComboBox()
+        self.axis_box.addItems(list(axes))
+        self.axis_box.currentIndexChanged.connect(self.schedule)
+        axis_row = QHBoxLayout()
+        axis_label = QLabel("Price vs:")
+        axis_label.setStyleSheet("font-weight: bold; font-size: 15px;")
+        axis_row.addWidget(axis_label)
+        axis_row.addWidget(self.axis_box)
+        layout.addLayout(axis_row)
+
+        self.chart = PriceChart()
+        layout.addWidget(self.chart)
+        self.setLayout(layout)
+
+    def slider_moved(self, key, position):
+        slider, minimum, maximum = self.sliders[key]
+        value = minimum + (maximum - minimum) * position / 1000
+        self.inputs[key].setText(f"{value:.6g}")
+
+    def text_changed(self, key):
+        # Keep the slider in sync with a typed value without echoing it back into the field
+        if key in self.sliders:
+            slider, minimum, maximum = self.sliders[key]
+            try:
+                value = float(self.inputs[key].text())
+            except ValueError:
+                value = None
+            if value is not None and not slider.isSliderDown():
+                slider.blockSignals(True)
+                slider.setValue(int(round(1000 * (min(max(value, minimum), maximum) - minimum) / (maximum - minimum))))
+                slider.blockSignals(False)
+        self.schedule()
+
+    def schedule(self, *_):
+        self.timer.start()
+
+    def refresh(self):
+        """
+        Reprice the current inputs and the curve. Incomplete input is ignored while the user is typing.
+        """
+        try:
+            params = self.read_params()
+            key, make_grid = self.axes[self.axis_box.currentText()]
+            grid = make_grid(params)
+            # The current point is appended to the grid so both come out of the same call
+            prices = np.asarray(self.price_grid(params, key, np.append(grid, params[key])), dtype=float)
+        except Exception:
+            return
+        self.result_output.setText(f"{prices[-1]:.4f}")
+        self.chart.set_data(grid, prices[:-1], (params[key], prices[-1]), self.axis_box.currentText())
+
+
+def spot_axis(key="S0"):
+    return key, lambda params: np.linspace(0.5, 1.5, SensitivityPanel.GRID_POINTS) * params[key]
+
+
+def vol_axis(key="sigma"):
+    return key, lambda params: np.linspace(0.01, max(1.0, 2 * params[key]), SensitivityPanel.GRID_POINTS)
+
+
 # -------- 主页面 --------
 class MainWindow(QWidget):
     def __init__(self):
@@ -79,7 +263,7 @@ class MainWindow(QWidget):
 
         self.page_titles = [
             "European Option", "Implied Volatility", "Geometric Asian", "Arithmetic Asian", "Geometric Basket", 
-            "Arithmetic Basket", "KIKO Option", "American Option", 
+            "Arithmetic Basket", "KIKO Option", "American Option", "Batch Pricing",
         ]
         self.pages = {}
         self.initUI()
@@ -131,6 +315,7 @@ class MainWindow(QWidget):
         self.pages["KIKO Option"] = KIKOPage(self.return_to_main)
         self.pages["Geometric Basket"] = GeometricBasketOptionPage(self.return_to_main)
         self.pages["Arithmetic Basket"] = ArithmeticBasketOptionPage(self.return_to_main)
+        self.pages["Batch Pricing"] = BatchPricingPage(self.return_to_main)
 
 
         # 创建所有子页面
@@ -152,7 +337,7 @@ class EuropeanOptionPage(QWidget):
         super().__init__()
         self.return_callback = return_callback
         self.setWindowTitle("European Option")
-        self.resize(500, 550)
+        self.resize(500, 950)
         self.initUI()
 
     def initUI(self):
@@ -247,6 +432,14 @@ class EuropeanOptionPage(QWidget):
         """)
         layout.addWidget(self.result_output)
 
+        # 敏感度面板: sliders and price curve, repriced live
+        self.sensitivity = SensitivityPanel(
+            self.inputs, self.read_params, self.price_grid,
+            [("S0", 1, 300), ("K", 1, 300), ("T", 0.01, 10), ("r", 0, 0.2), ("q", 0, 0.2), ("sigma", 0.01, 1.5)],
+            {"spot": spot_axis(), "volatility": vol_axis()}, self.result_output)
+        self.option_type_box.currentIndexChanged.connect(self.sensitivity.schedule)
+        layout.addWidget(self.sensitivity)
+
         # 返回按钮
         return_btn = QPushButton("← Back")
         return_btn.clicked.connect(self.return_callback)
@@ -269,6 +462,21 @@ class EuropeanOptionPage(QWidget):
         except Exception as e:
             QMessageBox.warning(self, "错误", f"输入参数无效，请检查并重试。\n\n详细信息：{e}")
 
+    def read_params(self):
+        return {
+            "S0": float(self.inputs["S0"].text()),
+            "K": float(self.inputs["K"].text()),
+            "T": float(self.inputs["T"].text()),
+            "r": float(self.inputs["r"].text()),
+            "q": float(self.inputs["q"].text()),
+            "sigma": float(self.inputs["sigma"].text()),
+            "option_type": self.option_type_box.currentText(),
+        }
+
+    def price_grid(self, params, axis, grid):
+        p = dict(params, **{axis: grid})
+        return ClosedFormPricer().european(p["S0"], p["r"], p["T"], p["K"], p["q"], p["sigma"], p["option_type"])
+
     def clear_inputs(self):
         for edit in self.inputs.values():
             edit.clear()
@@ -277,11 +485,14 @@ class EuropeanOptionPage(QWidget):
 
 #American
 class AmericanOptionPage(QWidget):
+    # Tree depth of the sensitivity curve (500 trees of N steps each would take seconds for N in the thousands)
+    CHART_STEPS = 100
+
     def __init__(self, return_callback):
         super().__init__()
         self.return_callback = return_callback
         self.setWindowTitle("American Option")
-        self.resize(500, 550)
+        self.resize(500, 950)
         self.initUI()
 
     def initUI(self):
@@ -376,6 +587,14 @@ class AmericanOptionPage(QWidget):
         """)
         layout.addWidget(self.result_output)
 
+        # 敏感度面板: sliders and price curve, repriced live
+        self.sensitivity = SensitivityPanel(
+            self.inputs, self.read_params, self.price_grid,
+            [("S0", 1, 300), ("K", 1, 300), ("T", 0.01, 10), ("r", 0, 0.2), ("sigma", 0.01, 1.5)],
+            {"spot": spot_axis(), "volatility": vol_axis()}, self.result_output)
+        self.option_type_box.currentIndexChanged.connect(self.sensitivity.schedule)
+        layout.addWidget(self.sensitivity)
+
         # 返回按钮
         return_btn = QPushButton("← Back")
         return_btn.clicked.connect(self.return_callback)
@@ -398,6 +617,27 @@ class AmericanOptionPage(QWidget):
         except Exception as e:
             QMessageBox.warning(self, "错误", f"输入参数无效，请检查并重试。\n\n详细信息：{e}")
 
+    def read_params(self):
+        return {
+            "S0": float(self.inputs["S0"].text()),
+            "K": float(self.inputs["K"].text()),
+            "T": float(self.inputs["T"].text()),
+            "r": float(self.inputs["r"].text()),
+            "N": int(self.inputs["N"].text()),
+            "sigma": float(self.inputs["sigma"].text()),
+            "option_type": self.option_type_box.currentText(),
+        }
+
+    def price_grid(self, params, axis, grid):
+        # The trees of the curve are rolled back together with at most CHART_STEPS steps, so a large N
+        # does not freeze the page; the current point (last grid value) is priced with the full N
+        p = dict(params, **{axis: np.asarray(grid[:-1])})
+        curve = BiniomialTreePricer().price(
+            p["option_type"], p["S0"], p["r"], p["T"], p["K"], min(p["N"], self.CHART_STEPS), p["sigma"])
+        p = dict(params, **{axis: grid[-1]})
+        current = BiniomialTreePricer().price(p["option_type"], p["S0"], p["r"], p["T"], p["K"], p["N"], p["sigma"])
+        return np.append(curve, current)
+
     def clear_inputs(self):
         for edit in self.inputs.values():
             edit.clear()
@@ -703,7 +943,7 @@ class GeometricAsianPage(QWidget):
         super().__init__()
         self.return_callback = return_callback
         self.setWindowTitle("Geometric Asian Option")
-        self.resize(500, 550)
+        self.resize(500, 950)
         self.initUI()
 
     def initUI(self):
@@ -798,6 +1038,14 @@ class GeometricAsianPage(QWidget):
         """)
         layout.addWidget(self.result_output)
 
+        # 敏感度面板: sliders and price curve, repriced live
+        self.sensitivity = SensitivityPanel(
+            self.inputs, self.read_params, self.price_grid,
+            [("S0", 1, 300), ("K", 1, 300), ("T", 0.01, 10), ("r", 0, 0.2), ("sigma", 0.01, 1.5)],
+            {"spot": spot_axis(), "volatility": vol_axis()}, self.result_output)
+        self.option_type_box.currentIndexChanged.connect(self.sensitivity.schedule)
+        layout.addWidget(self.sensitivity)
+
         # 返回按钮
         return_btn = QPushButton("← Back")
         return_btn.clicked.connect(self.return_callback)
@@ -821,6 +1069,21 @@ class GeometricAsianPage(QWidget):
         except Exception as e:
             QMessageBox.warning(self, "错误", f"输入参数无效，请检查并重试。\n\n详细信息：{e}")
 
+    def read_params(self):
+        return {
+            "S0": float(self.inputs["S0"].text()),
+            "K": float(self.inputs["K"].text()),
+            "T": float(self.inputs["T"].text()),
+            "r": float(self.inputs["r"].text()),
+            "sigma": float(self.inputs["sigma"].text()),
+            "No": int(self.inputs["No"].text()),
+            "option_type": self.option_type_box.currentText(),
+        }
+
+    def price_grid(self, params, axis, grid):
+        p = dict(params, **{axis: grid})
+        return ClosedFormPricer().geometric_asian(p["S0"], p["r"], p["T"], p["K"], p["sigma"], p["No"], p["option_type"])
+
     def clear_inputs(self):
         for edit in self.inputs.values():
             edit.clear()
@@ -1004,7 +1267,7 @@ class GeometricBasketOptionPage(QWidget):
         super().__init__()
         self.return_callback = return_callback
         self.setWindowTitle("Geometric Basket Option")
-        self.resize(500, 550)
+        self.resize(500, 950)
         self.initUI()
 
     def initUI(self):
@@ -1112,6 +1375,16 @@ class GeometricBasketOptionPage(QWidget):
         """)
         layout.addWidget(self.result_output)
 
+        # 敏感度面板: sliders and price curve, repriced live (all spots / vols are scaled together)
+        self.sensitivity = SensitivityPanel(
+            self.inputs, self.read_params, self.price_grid,
+            [("K", 1, 300), ("T", 0.01, 10), ("r", 0, 0.2), ("cor", 0, 0.99)],
+            {"spot scale": ("spot_scale", lambda params: np.linspace(0.5, 1.5, SensitivityPanel.GRID_POINTS)),
+             "vol scale": ("vol_scale", lambda params: np.linspace(0.05, 2.0, SensitivityPanel.GRID_POINTS))},
+            self.result_output)
+        self.option_type_box.currentIndexChanged.connect(self.sensitivity.schedule)
+        layout.addWidget(self.sensitivity)
+
         # 返回按钮
         return_btn = QPushButton("← Back")
         return_btn.clicked.connect(self.return_callback)
@@ -1145,6 +1418,29 @@ class GeometricBasketOptionPage(QWidget):
             QMessageBox.warning(self, "错误", f"输入参数无效，请检查并重试。\n\n详细信息：{e}")
 
 
+    def read_params(self):
+        S0 = [float(s.strip()) for s in self.inputs["S0"].text().split(",") if s.strip()]
+        sigma = [float(s.strip()) for s in self.inputs["sigma"].text().split(",") if s.strip()]
+        if len(S0) != len(sigma) or len(S0) < 2:
+            raise ValueError("Spot price 和 Volatility 的数量必须相同。")
+        return {
+            "S0": S0,
+            "sigma": sigma,
+            "K": float(self.inputs["K"].text()),
+            "T": float(self.inputs["T"].text()),
+            "r": float(self.inputs["r"].text()),
+            "cor": float(self.inputs["cor"].text()),
+            "option_type": self.option_type_box.currentText(),
+            "spot_scale": 1.0,
+            "vol_scale": 1.0,
+        }
+
+    def price_grid(self, params, axis, grid):
+        p = dict(params, **{axis: grid})
+        spots = np.asarray(p["S0"]) * np.asarray(p["spot_scale"])[..., None]
+        vols = np.asarray(p["sigma"]) * np.asarray(p["vol_scale"])[..., None]
+        return ClosedFormPricer().geometric_basket(spots, p["r"], p["T"], p["K"], vols, p["cor"], p["option_type"])
+
     def clear_inputs(self):
         for edit in self.inputs.values():
             edit.clear()
@@ -1316,6 +1612,256 @@ class ArithmeticBasketOptionPage(QWidget):
         
 
 
+#BatchPricing
+class TradeResultsModel(QAbstractTableModel):
+    COLUMNS = ["#", "product", "strike", "maturity", "type", "price", "CI low", "CI high", "error"]
+
+    def __init__(self):
+        """
+        Table model of the loaded trades and their results.
+
+        QTableView only asks for the cells it displays, so 100k rows cost nothing
+        until they are scrolled into view.
+        """
+        super().__init__()
+        self.header = []
+        self.trades = []
+        self.results = []
+
+    def set_trades(self, header, trades):
+        self.beginResetModel()
+        self.header, self.trades = header, trades
+        self.results = [None] * len(trades)
+        self.endResetModel()
+
+    def set_results(self, indices, values):
+        for i, value in zip(indices, values):
+            self.results[i] = value
+        if indices:
+            self.dataChanged.emit(self.index(min(indices), 5), self.index(max(indices), len(self.COLUMNS) - 1))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.trades)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        product, params, _ = self.trades[index.row()]
+        result = self.results[index.row()] or {}
+        column = index.column()
+        if column == 0:
+            return str(index.row() + 1)
+        if column == 1:
+            return product
+        if column == 2:
+            return f"{params.get('strike_price', '')}"
+        if column == 3:
+            return f"{params.get('maturity', '')}"
+        if column == 4:
+            return params.get('option_type', '')
+        if column == 5:
+            return f"{result['price']:.4f}" if 'price' in result else ""
+        if column in (6, 7):
+            conf_interval = result.get('conf_interval')
+            return f"{conf_interval[column - 6]:.4f}" if conf_interval else ""
+        return result.get('error', "")
+
+
+class BackgroundTask(QThread):
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, function):
+        """
+        Run a function in a background thread and report its result through signals.
+        """
+        super().__init__()
+        self.function = function
+
+    def run(self):
+        try:
+            self.succeeded.emit(self.function())
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class BatchPricingWorker(QThread):
+    results_ready = pyqtSignal(list, list)
+    progress = pyqtSignal(int)
+    done = pyqtSignal()
+
+    def __init__(self, trades):
+        """
+        Price a list of trades with BatchPricer in a background thread.
+        """
+        super().__init__()
+        self.trades = trades
+        self.priced = 0
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def on_results(self, indices, values):
+        self.priced += len(indices)
+        self.results_ready.emit(list(indices), list(values))
+        self.progress.emit(self.priced)
+
+    def run(self):
+        BatchPricer().price(self.trades, on_results=self.on_results, is_cancelled=lambda: self.cancelled)
+        self.done.emit()
+
+
+class BatchPricingPage(QWidget):
+    def __init__(self, return_callback):
+        super().__init__()
+        self.return_callback = return_callback
+        self.setWindowTitle("Batch Pricing")
+        self.resize(900, 650)
+        self.worker = None
+        self.loader = None
+        self.initUI()
+
+    def initUI(self):
+        layout = QVBoxLayout()
+        layout.setContentsMargins(40, 40, 40, 40)
+        layout.setSpacing(20)
+
+        title = QLabel("🧮 Batch Pricing")
+        title.setAlignment(Qt.AlignCenter)
+        title.setStyleSheet("font-size: 22px; font-weight: bold; color: #2c3e50;")
+        layout.addWidget(title)
+
+        hint = QLabel("CSV with a 'product' column and one column per parameter (basket lists separated by ';')")
+        hint.setAlignment(Qt.AlignCenter)
+        hint.setStyleSheet("color: gray; font-size: 13px;")
+        layout.addWidget(hint)
+
+        buttons = QHBoxLayout()
+        self.load_btn = QPushButton("Load CSV")
+        self.price_btn = QPushButton("Price All")
+        self.cancel_btn = QPushButton("Cancel")
+        self.export_btn = QPushButton("Export Results")
+        for button, color, hover in ((self.load_btn, "#3498db", "#2980b9"), (self.price_btn, "#27ae60", "#1e8449"),
+                                     (self.cancel_btn, "#e67e22", "#ca6f1e"), (self.export_btn, "#8e44ad", "#7d3c98")):
+            button.setStyleSheet(f"""
+                QPushButton {{
+                    background-color: {color};
+                    color: white;
+                    border-radius: 8px;
+                    font-size: 15px;
+                    padding: 6px 12px;
+                }}
+                QPushButton:hover {{
+                    background-color: {hover};
+                }}
+                QPushButton:disabled {{
+                    background-color: #bdc3c7;
+                }}
+            """)
+            buttons.addWidget(button)
+        self.load_btn.clicked.connect(self.load_file)
+        self.price_btn.clicked.connect(self.start_pricing)
+        self.cancel_btn.clicked.connect(self.cancel_pricing)
+        self.export_btn.clicked.connect(self.export_file)
+        layout.addLayout(buttons)
+
+        self.progress_bar = QProgressBar()
+        layout.addWidget(self.progress_bar)
+
+        self.status_label = QLabel("No file loaded")
+        layout.addWidget(self.status_label)
+
+        self.model = TradeResultsModel()
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        # Fixed row heights keep scrolling cheap on large books (no per-row size computation)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(22)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        # 返回按钮
+        return_btn = QPushButton("← Back")
+        return_btn.clicked.connect(self.return_callback)
+        layout.addWidget(return_btn, alignment=Qt.AlignCenter)
+
+        self.setLayout(layout)
+        self.set_running(False)
+
+    def set_running(self, running):
+        self.load_btn.setEnabled(not running)
+        self.price_btn.setEnabled(not running and len(self.model.trades) > 0)
+        self.export_btn.setEnabled(not running and len(self.model.trades) > 0)
+        self.cancel_btn.setEnabled(running)
+
+    def load_file(self):
+        filename, _ = QFileDialog.getOpenFileName(self, "Load trades", "", "CSV files (*.csv)")
+        if not filename:
+            return
+        self.status_label.setText(f"Loading {filename}...")
+        self.load_btn.setEnabled(False)
+        self.loader = BackgroundTask(lambda: load_trades(filename))
+        self.loader.succeeded.connect(self.file_loaded)
+        self.loader.failed.connect(lambda message: self.task_failed("读取文件失败", message))
+        self.loader.start()
+
+    def file_loaded(self, loaded):
+        header, trades = loaded
+        self.model.set_trades(header, trades)
+        self.progress_bar.setRange(0, max(len(trades), 1))
+        self.progress_bar.setValue(0)
+        self.status_label.setText(f"{len(trades)} trades loaded")
+        self.set_running(False)
+
+    def task_failed(self, title, message):
+        QMessageBox.warning(self, "错误", f"{title}\n\n详细信息：{message}")
+        self.status_label.setText("No file loaded" if not self.model.trades else f"{len(self.model.trades)} trades loaded")
+        self.set_running(False)
+
+    def start_pricing(self):
+        self.model.set_trades(self.model.header, self.model.trades)
+        self.progress_bar.setValue(0)
+        self.worker = BatchPricingWorker(self.model.trades)
+        self.worker.results_ready.connect(self.model.set_results)
+        self.worker.progress.connect(self.progress_bar.setValue)
+        self.worker.done.connect(self.pricing_done)
+        self.set_running(True)
+        self.status_label.setText("Pricing...")
+        self.worker.start()
+
+    def cancel_pricing(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.status_label.setText("Cancelling...")
+
+    def pricing_done(self):
+        priced = self.worker.priced
+        errors = sum(1 for result in self.model.results if result is not None and 'error' in result)
+        state = "Cancelled" if self.worker.cancelled else "Done"
+        self.status_label.setText(f"{state}: {priced} of {len(self.model.trades)} trades priced, {errors} errors")
+        self.set_running(False)
+
+    def export_file(self):
+        filename, _ = QFileDialog.getSaveFileName(self, "Export results", "results.csv", "CSV files (*.csv)")
+        if not filename:
+            return
+        try:
+            export_results(filename, self.model.header, self.model.trades, self.model.results)
+            self.status_label.setText(f"Results written to {filename}")
+        except Exception as e:
+            QMessageBox.warning(self, "错误", f"导出失败。\n\n详细信息：{e}")
+
+
 # # -------- 运行入口 --------
 # if __name__ == "__main__":
 #     app = QApplication(sys.argv)
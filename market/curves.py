@@ -0,0 +1,211 @@
+import functools
+import numpy as np
+
+
+class YieldCurve:
+
+    def __init__(self, times, zero_rates):
+        """
+        Zero-rate curve, interpolated linearly in log discount factor (piecewise-flat forward rates).
+
+        The same class describes repo/dividend curves: pass it as repo_rate and
+        discount_factor() then returns the repo "discount" exp(-integral of q).
+
+        :param times: Pillar times in years, strictly increasing and positive
+        :param zero_rates: Continuously compounded zero rates at the pillars
+        """
+        self.times = np.asarray(times, dtype=float)
+        self.zero_rates = np.asarray(zero_rates, dtype=float)
+        if self.times.ndim != 1 or self.times.shape != self.zero_rates.shape or len(self.times) == 0:
+            raise ValueError("times and zero_rates must be non-empty 1-d arrays of the same length")
+        if self.times[0] <= 0 or np.any(np.diff(self.times) <= 0):
+            raise ValueError("times must be positive and strictly increasing")
+
+        # Log discount factors at 0 and at every pillar
+        self._pillar_times = np.concatenate(([0.0], self.times))
+        self._pillar_log_df = np.concatenate(([0.0], -self.zero_rates * self.times))
+        # Forward rate of the last segment, used to extrapolate beyond the last pillar
+        self._last_forward = (self._pillar_log_df[-2] - self._pillar_log_df[-1]) / (self._pillar_times[-1] - self._pillar_times[-2])
+        self._df_cache = {}
+
+    def log_discount_factor(self, t):
+        """
+        Log discount factor to time t (vectorized).
+        """
+        t = np.asarray(t, dtype=float)
+        log_df = np.interp(t, self._pillar_times, self._pillar_log_df)
+        beyond = t > self._pillar_times[-1]
+        return np.where(beyond, self._pillar_log_df[-1] - self._last_forward * (t - self._pillar_times[-1]), log_df)
+
+    def discount_factor(self, t):
+        """
+        Discount factor to time t. Scalar lookups are memoized.
+        """
+        if np.ndim(t) == 0:
+            t = float(t)
+            if t not in self._df_cache:
+                self._df_cache[t] = float(np.exp(self.log_discount_factor(t)))
+            return self._df_cache[t]
+        return np.exp(self.log_discount_factor(t))
+
+    def zero_rate(self, t):
+        """
+        Continuously compounded zero rate to time t.
+        """
+        return -np.log(self.discount_factor(t)) / t
+
+    def forward_rate(self, t1, t2):
+        """
+        Continuously compounded forward rate between t1 and t2.
+        """
+        return (self.log_discount_factor(t1) - self.log_discount_factor(t2)) / (t2 - t1)
+
+    def shifted(self, shift: float):
+        """
+        Return a copy of the curve with all zero rates moved by a parallel shift.
+        """
+        return YieldCurve(self.times, self.zero_rates + shift)
+
+
+class VolTermStructure:
+
+    def __init__(self, times, volatilities):
+        """
+        ATM volatility term structure, interpolated linearly in total variance.
+
+        :param times: Pillar times in years, strictly increasing and positive
+        :param volatilities: Implied (average) volatilities to the pillar times
+        """
+        self.times = np.asarray(times, dtype=float)
+        self.volatilities = np.asarray(volatilities, dtype=float)
+        if self.times.ndim != 1 or self.times.shape != self.volatilities.shape or len(self.times) == 0:
+            raise ValueError("times and volatilities must be non-empty 1-d arrays of the same length")
+        if self.times[0] <= 0 or np.any(np.diff(self.times) <= 0):
+            raise ValueError("times must be positive and strictly increasing")
+
+        self._pillar_times = np.concatenate(([0.0], self.times))
+        self._pillar_variance = np.concatenate(([0.0], self.volatilities**2 * self.times))
+        if np.any(np.diff(self._pillar_variance) < 0):
+            raise ValueError("Total variance must be non-decreasing in time (calendar arbitrage)")
+        # Forward variance of the last segment, used to extrapolate beyond the last pillar
+        self._last_forward = (self._pillar_variance[-1] - self._pillar_variance[-2]) / (self._pillar_times[-1] - self._pillar_times[-2])
+        self._variance_cache = {}
+
+    def total_variance(self, t):
+        """
+        Total implied variance sigma(t)^2 * t to time t. Scalar lookups are memoized.
+        """
+        if np.ndim(t) == 0 and float(t) in self._variance_cache:
+            return self._variance_cache[float(t)]
+        t_array = np.asarray(t, dtype=float)
+        variance = np.interp(t_array, self._pillar_times, self._pillar_variance)
+        beyond = t_array > self._pillar_times[-1]
+        variance = np.where(beyond, self._pillar_variance[-1] + self._last_forward * (t_array - self._pillar_times[-1]), variance)
+        if np.ndim(t) == 0:
+            self._variance_cache[float(t)] = float(variance)
+            return float(variance)
+        return variance
+
+    def volatility(self, t):
+        """
+        Average (implied) volatility to time t.
+        """
+        return np.sqrt(self.total_variance(t) / t)
+
+    def forward_variance(self, t1, t2):
+        """
+        Variance accumulated between t1 and t2.
+        """
+        return self.total_variance(t2) - self.total_variance(t1)
+
+    def shifted(self, shift: float):
+        """
+        Return a copy of the term structure with all pillar volatilities moved by a parallel shift.
+        """
+        return VolTermStructure(self.times, self.volatilities + shift)
+
+
+def discount_factor(rate, t):
+    """
+    Discount factor to time t from a flat rate or a YieldCurve.
+    """
+    if isinstance(rate, YieldCurve):
+        return rate.discount_factor(t)
+    return np.exp(-rate * t)
+
+
+def zero_rate(rate, t):
+    """
+    Equivalent flat rate to time t of a flat rate or a YieldCurve.
+    """
+    if isinstance(rate, YieldCurve):
+        return rate.zero_rate(t)
+    return rate
+
+
+def average_volatility(volatility, t):
+    """
+    Equivalent flat volatility to time t of a flat volatility or a VolTermStructure.
+    """
+    if isinstance(volatility, VolTermStructure):
+        return volatility.volatility(t)
+    return volatility
+
+
+def is_flat(*market_data):
+    """
+    True if none of the inputs is a term-structure object.
+    """
+    return not any(isinstance(x, (YieldCurve, VolTermStructure)) for x in market_data)
+
+
+@functools.lru_cache(maxsize=256)
+def _step_drift_diffusion(rate, volatility, repo_rate, maturity, num_steps):
+    dt = maturity / num_steps
+    if is_flat(rate, volatility, repo_rate):
+        drift = np.full(num_steps, (rate - repo_rate - 0.5 * volatility ** 2) * dt)
+        diffusion = np.full(num_steps, volatility * np.sqrt(dt))
+    else:
+        grid = np.linspace(0.0, maturity, num_steps + 1)
+        rate_integrals = np.diff(-np.log(discount_factor(rate, grid)))
+        repo_integrals = np.diff(-np.log(discount_factor(repo_rate, grid)))
+        if isinstance(volatility, VolTermStructure):
+            variances = np.diff(volatility.total_variance(grid))
+        else:
+            variances = np.full(num_steps, volatility ** 2 * dt)
+        drift = rate_integrals - repo_integrals - 0.5 * variances
+        diffusion = np.sqrt(variances)
+    # The arrays are shared between all callers, so they must never be modified in place
+    drift.setflags(write=False)
+    diffusion.setflags(write=False)
+    return drift, diffusion
+
+
+def step_drift_diffusion(rate, volatility, maturity, num_steps, repo_rate=0.0):
+    """
+    Per-step log drift and diffusion of a lognormal asset on an equally spaced time grid.
+
+    Results are memoized per (curves, grid), so every Monte Carlo trade on the
+    same curves and schedule reuses the same read-only arrays.
+
+    :param rate: Flat risk-free rate or YieldCurve
+    :param volatility: Flat volatility or VolTermStructure
+    :param maturity: Time to the last step in years
+    :param num_steps: Number of equally spaced steps
+    :param repo_rate: Flat repo/dividend rate or YieldCurve
+    :return: Tuple (drift, diffusion) of arrays of length num_steps
+    """
+    return _step_drift_diffusion(rate, volatility, repo_rate, float(maturity), int(num_steps))
+
+
+# Example usage
+if __name__ == "__main__":
+    curve = YieldCurve([0.5, 1, 2, 5], [0.03, 0.035, 0.04, 0.045])
+    vols = VolTermStructure([0.5, 1, 2, 5], [0.25, 0.24, 0.22, 0.2])
+
+    print("DF(3y):", curve.discount_factor(3), "zero(3y):", curve.zero_rate(3))
+    print("Forward 1y-2y:", curve.forward_rate(1, 2))
+    print("Vol(3y):", vols.volatility(3), "forward variance 1y-2y:", vols.forward_variance(1, 2))
+    drift, diffusion = step_drift_diffusion(curve, vols, 2.0, 8)
+    print("Step drift:", drift)
+    print("Step diffusion:", diffusion)
@@ -0,0 +1,213 @@
+import numpy as np
+from scipy.optimize import least_squares
+from market.curves import discount_factor
+from pricer.implied_volatility_calculator import ImpliedVolatility
+
+
+class VolSurface:
+
+    def __init__(self, spot_price: float, risk_free_rate=0.0, repo_rate=0.0):
+        """
+        Implied volatility surface made of SVI slices, one per quoted maturity.
+
+        Each slice is a raw SVI fit of total implied variance against forward
+        log-moneyness k = log(K / F(T)):
+            w(k) = a + b * (rho * (k - m) + sqrt((k - m)^2 + s^2))
+        Between maturities the total variance is interpolated linearly in time at
+        fixed k. Fitted parameters are cached per maturity together with the
+        quotes they were fitted to, so build() only refits the changed slices.
+
+        :param spot_price: Current price of the underlying asset
+        :param risk_free_rate: Risk-free interest rate (flat rate or YieldCurve)
+        :param repo_rate: Repo rate of the underlying asset (flat rate or YieldCurve)
+        """
+        self.spot_price = spot_price
+        self.risk_free_rate = risk_free_rate
+        self.repo_rate = repo_rate
+        self._quotes = {}
+        self._fits = {}
+        self._maturities = np.empty(0)
+        self._parameters = np.empty((0, 5))
+        self._stale = False
+
+    def forward(self, maturity):
+        """
+        Forward price of the underlying for the given maturity (vectorized).
+        """
+        return self.spot_price * discount_factor(self.repo_rate, maturity) / discount_factor(self.risk_free_rate, maturity)
+
+    def set_quotes(self, maturity: float, strike_prices, implied_volatilities):
+        """
+        Set the implied volatility quotes of one maturity. Only this slice will be refitted.
+
+        :param maturity: Time to maturity in years
+        :param strike_prices: Quoted strikes
+        :param implied_volatilities: Implied volatilities of the quoted strikes
+        """
+        strikes = np.asarray(strike_prices, dtype=float)
+        vols = np.asarray(implied_volatilities, dtype=float)
+        if strikes.shape != vols.shape or strikes.ndim != 1:
+            raise ValueError("strike_prices and implied_volatilities must be 1-d arrays of the same length")
+        valid = np.isfinite(vols) & (vols > 0)
+        if np.count_nonzero(valid) < 5:
+            raise ValueError("At least 5 valid quotes are needed to fit an SVI slice")
+        self._quotes[float(maturity)] = (strikes[valid], vols[valid])
+        self._stale = True
+
+    def set_premiums(self, maturity: float, strike_prices, option_premiums, option_types):
+        """
+        Set the quotes of one maturity from option premiums, inverted with ImpliedVolatility.
+
+        Quotes whose implied volatility cannot be found are dropped.
+
+        :param maturity: Time to maturity in years
+        :param strike_prices: Quoted strikes
+        :param option_premiums: Quoted premiums
+        :param option_types: Option type of each quote ('call' or 'put')
+        """
+        calculator = ImpliedVolatility()
+        rate = self._flat_rate(self.risk_free_rate, maturity)
+        repo = self._flat_rate(self.repo_rate, maturity)
+        vols = []
+        for K, premium, option_type in zip(strike_prices, option_premiums, option_types):
+            try:
+                vols.append(calculator.calculate(option_type, self.spot_price, rate, repo, maturity, K, premium))
+            except ValueError:
+                vols.append(np.nan)
+        self.set_quotes(maturity, strike_prices, vols)
+
+    @staticmethod
+    def _flat_rate(rate, maturity):
+        """
+        Equivalent flat rate to the maturity, as expected by ImpliedVolatility.
+        """
+        return -np.log(discount_factor(rate, maturity)) / maturity
+
+    def remove_maturity(self, maturity: float):
+        """
+        Remove the quotes (and the fitted slice) of one maturity.
+        """
+        self._quotes.pop(float(maturity))
+        self._fits.pop(float(maturity), None)
+        self._stale = True
+
+    @staticmethod
+    def svi_total_variance(parameters, k):
+        """
+        Raw SVI total variance for log-moneyness k (parameters broadcast against k).
+        """
+        a, b, rho, m, s = (parameters[..., i] for i in range(5))
+        return a + b * (rho * (k - m) + np.sqrt((k - m)**2 + s**2))
+
+    def _fit_slice(self, maturity, strikes, vols, initial_guess):
+        """
+        Least-squares SVI fit of one maturity in total variance.
+        """
+        k = np.log(strikes / self.forward(maturity))
+        w = vols**2 * maturity
+        if initial_guess is None:
+            initial_guess = np.array([0.5 * np.min(w), 0.1, -0.3, 0.0, 0.1])
+
+        lower = [-np.max(w), 0.0, -0.999, np.min(k) - 1.0, 1e-4]
+        upper = [np.max(w), 10.0, 0.999, np.max(k) + 1.0, 5.0]
+        initial_guess = np.clip(initial_guess, lower, upper)
+
+        def residuals(parameters):
+            a, b, rho, m, s = parameters
+            # Penalize negative minimum variance, a + b * s * sqrt(1 - rho^2) >= 0
+            floor = min(a + b * s * np.sqrt(1 - rho**2), 0.0)
+            return np.append(self.svi_total_variance(parameters, k) - w, 10.0 * floor)
+
+        return least_squares(residuals, initial_guess, bounds=(lower, upper)).x
+
+    def build(self):
+        """
+        Fit every slice whose quotes changed since the last build.
+
+        :return: Number of slices refitted
+        """
+        refitted = 0
+        for maturity, (strikes, vols) in self._quotes.items():
+            key = (strikes.tobytes(), vols.tobytes())
+            cached = self._fits.get(maturity)
+            if cached is not None and cached[0] == key:
+                continue
+            # Warm-start from the previous fit of this maturity
+            previous = None if cached is None else cached[1]
+            self._fits[maturity] = (key, self._fit_slice(maturity, strikes, vols, previous))
+            refitted += 1
+
+        self._maturities = np.array(sorted(self._fits))
+        self._parameters = np.array([self._fits[T][1] for T in self._maturities]).reshape(-1, 5)
+        self._stale = False
+        return refitted
+
+    @property
+    def svi_parameters(self):
+        """
+        Fitted SVI parameters (a, b, rho, m, s) per maturity.
+        """
+        return {T: params for T, (_, params) in sorted(self._fits.items())}
+
+    def total_variance(self, strike_price, maturity):
+        """
+        Total implied variance for arrays of strikes and maturities (broadcast together).
+        """
+        if self._stale:
+            self.build()
+        if self._maturities.size == 0:
+            raise ValueError("The surface has no quotes")
+
+        K, T = np.broadcast_arrays(np.asarray(strike_price, dtype=float), np.asarray(maturity, dtype=float))
+        k = np.log(K / self.forward(T))
+
+        # Total variance of every slice at the requested log-moneyness, shape (n_slices, ...)
+        slice_variance = self.svi_total_variance(self._parameters.reshape((-1,) + (1,) * k.ndim + (5,)), k)
+
+        # Bracketing slices of every requested maturity
+        maturities = self._maturities
+        upper = np.clip(np.searchsorted(maturities, T), min(1, len(maturities) - 1), len(maturities) - 1)
+        lower = np.maximum(upper - 1, 0)
+        w_lower = np.take_along_axis(slice_variance, lower[None], axis=0)[0]
+        w_upper = np.take_along_axis(slice_variance, upper[None], axis=0)[0]
+        T_lower, T_upper = maturities[lower], maturities[upper]
+
+        weight = np.where(T_upper > T_lower, (T - T_lower) / np.where(T_upper > T_lower, T_upper - T_lower, 1.0), 0.0)
+        variance = (1 - weight) * w_lower + weight * w_upper
+        # Outside the quoted maturities, keep the implied volatility of the nearest slice
+        variance = np.where(T < maturities[0], w_lower * T / maturities[0], variance)
+        variance = np.where(T > maturities[-1], w_upper * T / maturities[-1], variance)
+        return variance
+
+    def vol(self, strike_price, maturity):
+        """
+        Implied volatility for arrays of strikes and maturities (broadcast together).
+
+        :param strike_price: Strike price(s)
+        :param maturity: Time(s) to maturity in years
+        :return: Implied volatility(ies)
+        """
+        variance = self.total_variance(strike_price, maturity)
+        vol = np.sqrt(np.maximum(variance, 0.0) / np.asarray(maturity, dtype=float))
+        return vol[()] if vol.ndim == 0 else vol
+
+
+# Example usage
+if __name__ == "__main__":
+    surface = VolSurface(spot_price=100, risk_free_rate=0.03, repo_rate=0.01)
+    strikes = np.linspace(70, 130, 13)
+    for T in (0.25, 0.5, 1.0, 2.0):
+        k = np.log(strikes / surface.forward(T))
+        smile = 0.2 + 0.1 * k**2 / np.sqrt(T) - 0.05 * k
+        surface.set_quotes(T, strikes, smile)
+
+    print("Slices fitted:", surface.build())
+    print("Vols at T=0.75:", surface.vol(strikes, 0.75))
+
+    # A tick on one expiry only refits that slice
+    surface.set_quotes(1.0, strikes, np.full(len(strikes), 0.22))
+    print("Slices refitted after one expiry update:", surface.build())
+
+    batch_K = np.random.uniform(80, 120, 100000)
+    batch_T = np.random.uniform(0.1, 3.0, 100000)
+    print("Batch lookup:", surface.vol(batch_K, batch_T)[:5])
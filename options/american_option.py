@@ -1,17 +1,19 @@
 from options.option import Option
-import numpy as np
-import math
+from pricer.binomial_tree_pricer import BiniomialTreePricer
+from market.curves import zero_rate, average_volatility
 
 class AmericanOption(Option):
+    __slots__ = ('num_steps', 'option_type')
 
     def __init__(self, spot_price: float, risk_free_rate: float, maturity: float, strike_price: float, volatility: float, num_steps: int, option_type: str = 'call'):
         """
         Constructor for AmericanOption class.
 
         :param spot_price: Current price of the underlying asset
-        :param risk_free_rate: Risk-free interest rate
+        :param risk_free_rate: Risk-free interest rate (flat rate or YieldCurve)
         :param maturity: Time to maturity in years
         :param strike_price: Strike price of the option
+        :param volatility: Volatility of the underlying asset (flat volatility or VolTermStructure)
         :param num_steps: Number of steps in the binomial tree
         :param option_type: Type of the option ('call' or 'put')
         """
@@ -25,40 +27,25 @@ class AmericanOption(Option):
 
         :return: Price of the American option
         """
-        # Implementation of the binomial tree method for American option pricing
-        
-        S0 = self.spot_price
-        K = self.strike_price
-        r = self.risk_free_rate
+        # Term structures enter the tree through their equivalent flat rate and volatility to maturity
         T = self.maturity
-        N = self.num_steps
-        option_type = self.option_type
-        sigma = self.volatility
-        # Calculate parameters for the binomial tree
-        dt = T / N  # time step
-        u = math.exp(sigma * math.sqrt(dt))  # up factor
-        d = 1 / u  # down factor
-        p = (math.exp(r * dt) - d) / (u - d)  # risk-neutral probability
+        return BiniomialTreePricer().price(
+            self.option_type, self.spot_price, zero_rate(self.risk_free_rate, T), T,
+            self.strike_price, self.num_steps, average_volatility(self.volatility, T)
+        )
 
-        # Initialize asset prices at maturity
-        ST = np.zeros(N + 1)
-        for j in range(N + 1):
-            ST[j] = S0 * (u ** (N - j)) * (d ** j)
-
-        # Initialize option values at maturity
-        if option_type == 'call':
-            option_values = np.maximum(0, ST - K)
-        elif option_type == 'put':
-            option_values = np.maximum(0, K - ST)
-        else:
-            raise ValueError("option_type must be either 'call' or 'put'")
+    def calculate_greeks(self):
+        """
+        Price, delta, gamma, theta, vega and rho from the tree (see BiniomialTreePricer.greeks).
 
-        # Backward induction to calculate option price at t=0
-        for i in range(N - 1, -1, -1):
-            option_values[:-1] = (p * option_values[:-1] + (1 - p) * option_values[1:]) * math.exp(-r * dt)
+        :return: Dictionary of the price and Greeks
+        """
+        T = self.maturity
+        return BiniomialTreePricer().greeks(
+            self.option_type, self.spot_price, zero_rate(self.risk_free_rate, T), T,
+            self.strike_price, self.num_steps, average_volatility(self.volatility, T)
+        )
 
-        return option_values[0]
-    
 
 # Example usage
 if __name__ == "__main__":
@@ -72,4 +59,6 @@ if __name__ == "__main__":
 
     option_price = AmericanOption(S0, r, T, K, sigma, N, option_type).price()
     print(f"The {option_type} option price is: {option_price:.2f}")
+    greeks = AmericanOption(S0, r, T, K, sigma, N, option_type).calculate_greeks()
+    print("Greeks:", {name: round(float(value), 4) for name, value in greeks.items()})
 
@@ -1,37 +1,82 @@
 from options.option import Option
 import numpy as np
-from scipy.stats import norm
+from pricer.closed_form_pricer import ClosedFormPricer
+from market.curves import discount_factor, is_flat, step_drift_diffusion
+from pricer.control_variates import ControlVariateEstimator
+from options.european_option import EuropeanOption
+from utils.profiling import stage
 
 class AsianOption(Option):
-    def __init__(self, spot_price: float, risk_free_rate: float, maturity: float, strike_price: float, volatility: float, num_observations: int):
+    __slots__ = ('num_observations', 'num_fixed', 'fixed_sum', 'fixed_log_sum')
+
+    def __init__(self, spot_price: float, risk_free_rate: float, maturity: float, strike_price: float, volatility: float, num_observations: int, fixings=None):
         """
         Base class for Asian options.
 
+        A seasoned option keeps the running sum and log-sum of its past fixings;
+        the remaining num_observations - num_fixed observations are equally spaced
+        up to maturity (measured from today).
+
         :param spot_price: Current price of the underlying asset
-        :param risk_free_rate: Risk-free interest rate
+        :param risk_free_rate: Risk-free interest rate (flat rate or YieldCurve)
         :param maturity: Time to maturity in years
         :param strike_price: Strike price of the option
-        :param volatility: Volatility of the underlying asset
-        :param num_observations: Number of averaging observations
+        :param volatility: Volatility of the underlying asset (flat volatility or VolTermStructure)
+        :param num_observations: Number of averaging observations (past and future)
+        :param fixings: Prices already observed, if the averaging period has started
         """
         super().__init__(spot_price, risk_free_rate, maturity, strike_price, volatility)
         self.num_observations = num_observations
+        self.num_fixed = 0
+        self.fixed_sum = 0.0
+        self.fixed_log_sum = 0.0
+        for fixing in fixings or ():
+            self.add_fixing(fixing)
+
+    @property
+    def remaining_observations(self):
+        return self.num_observations - self.num_fixed
+
+    def add_fixing(self, fixing: float, maturity: float = None):
+        """
+        Record one observed price. O(1): only the running sums are updated.
+
+        :param fixing: Observed price of the underlying
+        :param maturity: New time to maturity, if the option has aged since it was set
+        """
+        if self.num_fixed >= self.num_observations:
+            raise ValueError("All observations are already fixed")
+        self.num_fixed += 1
+        self.fixed_sum += fixing
+        self.fixed_log_sum += np.log(fixing)
+        if maturity is not None:
+            self.maturity = maturity
+
+    def _copy_fixings(self, other):
+        """
+        Give another Asian option on the same schedule the fixings of this one.
+        """
+        other.num_fixed, other.fixed_sum, other.fixed_log_sum = self.num_fixed, self.fixed_sum, self.fixed_log_sum
+        return other
 
 
 class GeometricAsianOption(AsianOption):
-    def __init__(self, spot_price: float, risk_free_rate: float, maturity: float, strike_price: float, volatility: float, num_observations: int, option_type: str = 'call'):
+    __slots__ = ('option_type',)
+
+    def __init__(self, spot_price: float, risk_free_rate: float, maturity: float, strike_price: float, volatility: float, num_observations: int, option_type: str = 'call', fixings=None):
         """
         Geometric Asian Option using closed-form formula.
 
         :param spot_price: Current price of the underlying asset
-        :param risk_free_rate: Risk-free interest rate
+        :param risk_free_rate: Risk-free interest rate (flat rate or YieldCurve)
         :param maturity: Time to maturity in years
         :param strike_price: Strike price of the option
-        :param volatility: Volatility of the underlying asset
+        :param volatility: Volatility of the underlying asset (flat volatility or VolTermStructure)
         :param num_observations: Number of averaging observations
         :param option_type: Type of the option ('call' or 'put')
+        :param fixings: Prices already observed, if the averaging period has started
         """
-        super().__init__(spot_price, risk_free_rate, maturity, strike_price, volatility, num_observations)
+        super().__init__(spot_price, risk_free_rate, maturity, strike_price, volatility, num_observations, fixings)
         self.option_type = option_type
 
     def price(self):
@@ -39,98 +84,332 @@ class GeometricAsianOption(AsianOption):
         Calculate the price of the Geometric Asian option using the closed-form formula.
         :return: Price of the Geometric Asian option
         """
-        sigma = self.volatility
-        S0 = self.spot_price
-        K = self.strike_price
-        r = self.risk_free_rate
-        T = self.maturity
-        n = self.num_observations
-        option_type = self.option_type
-
-        # Adjusted parameters for geometric averaging
-        sigma_hat = sigma * np.sqrt((n+1) * (2*n + 1)/(6*n**2))
-        mu_hat = (r - 0.5 * sigma**2) * (n + 1) / (2*n) + 0.5 * sigma_hat**2
-
-        d1 = (np.log(S0 / K) + (mu_hat + 0.5 * sigma_hat**2) * T) / (sigma_hat * np.sqrt(T))
-        d2 = d1 - sigma_hat * np.sqrt(T)
-
-        if option_type == "call":
-            price = np.exp(-r * T) * (S0 * np.exp(mu_hat * T) * norm.cdf(d1) - K * norm.cdf(d2))
-        elif option_type == "put":
-            price = np.exp(-r * T) * (K * norm.cdf(-d2) - S0 * np.exp(mu_hat * T) * norm.cdf(-d1))
-        else:
-            raise ValueError("option_type must be 'call' or 'put'")
+        r, sigma, T, n = self.risk_free_rate, self.volatility, self.maturity, self.num_observations
+        if is_flat(r, sigma) and self.num_fixed == 0:
+            return ClosedFormPricer().geometric_asian(
+                self.spot_price, r, T, self.strike_price, sigma, n, self.option_type
+            )
+
+        # Only the remaining observations are random
+        m = self.remaining_observations
+        if m == 0:
+            G = np.exp(self.fixed_log_sum / n)
+            is_call = ClosedFormPricer.call_mask(self.option_type)
+            return ClosedFormPricer._scalar_or_array(
+                discount_factor(r, T) * np.where(is_call, np.maximum(G - self.strike_price, 0), np.maximum(self.strike_price - G, 0)))
 
-        return price
+        # log G is normal: step k contributes to the m - k + 1 remaining averaging dates after it
+        drift, diffusion = step_drift_diffusion(r, sigma, T, m)
+        weights = np.arange(m, 0, -1)
+        mean_log = (self.fixed_log_sum + m * np.log(self.spot_price) + np.sum(weights * drift)) / n
+        var_log = np.sum((weights * diffusion)**2) / n**2
+        return ClosedFormPricer().lognormal(mean_log, var_log, self.strike_price, discount_factor(r, T), self.option_type)
+
+    def calculate_greeks(self):
+        """
+        Closed-form price, delta, gamma, vega and rho (flat rate and volatility).
+
+        :return: Dictionary with 'price', 'delta', 'gamma', 'vega' and 'rho'
+        """
+        if not is_flat(self.risk_free_rate, self.volatility):
+            raise ValueError("Closed-form Greeks need a flat risk-free rate and volatility")
+        if self.remaining_observations == 0:
+            price = self.price()
+            return {'price': price, 'delta': 0.0, 'gamma': 0.0, 'vega': 0.0, 'rho': -self.maturity * price}
+        return ClosedFormPricer().geometric_asian_greeks(
+            self.spot_price, self.risk_free_rate, self.maturity, self.strike_price, self.volatility,
+            self.num_observations, self.option_type, self.num_fixed, self.fixed_log_sum
+        )
 
 
 class ArithmeticAsianOption(AsianOption):
-    def __init__(self, spot_price: float, risk_free_rate: float, maturity: float, strike_price: float, volatility: float, num_observations: int, num_paths: int, use_control_variate: bool = True, option_type: str = 'call'):
+    __slots__ = ('num_paths', 'use_control_variate', 'option_type')
+
+    def __init__(self, spot_price: float, risk_free_rate: float, maturity: float, strike_price: float, volatility: float, num_observations: int, num_paths: int, use_control_variate: bool = True, option_type: str = 'call', fixings=None):
         """
         Arithmetic Asian Option using Monte Carlo simulation.
 
         :param spot_price: Current price of the underlying asset
-        :param risk_free_rate: Risk-free interest rate
+        :param risk_free_rate: Risk-free interest rate (flat rate or YieldCurve)
         :param maturity: Time to maturity in years
         :param strike_price: Strike price of the option
-        :param volatility: Volatility of the underlying asset
+        :param volatility: Volatility of the underlying asset (flat volatility or VolTermStructure)
         :param num_observations: Number of averaging observations
         :param num_paths: Number of Monte Carlo simulation paths
         :param use_control_variate: Whether to use control variate technique
         :param option_type: Type of the option ('call' or 'put')
+        :param fixings: Prices already observed, if the averaging period has started
         """
-        super().__init__(spot_price, risk_free_rate, maturity, strike_price, volatility, num_observations)
+        super().__init__(spot_price, risk_free_rate, maturity, strike_price, volatility, num_observations, fixings)
         self.num_paths = num_paths
         self.use_control_variate = use_control_variate
         self.option_type = option_type
 
-    def price(self):
+    def price(self, method: str = 'monte_carlo'):
         """
         Estimate the price of the Arithmetic Asian option using Monte Carlo simulation.
         Uses geometric Asian option as control variate if enabled.
 
-        :return: Tuple of estimated price and 95% confidence interval
+        :param method: 'monte_carlo', or 'levy' / 'curran' for a quick analytic approximation
+        :return: Tuple of estimated price and 95% confidence interval (None for the approximations)
+        """
+        if method != 'monte_carlo':
+            return self.approximate_price(method), None
+
+        discount = discount_factor(self.risk_free_rate, self.maturity)
+        n = self.num_paths
+        S_paths = self._simulate_paths()
+
+        with stage('arithmetic_asian.payoff', n):
+            payoffs_arith, payoffs_geom = self._discounted_payoffs(S_paths, discount)
+
+        with stage('arithmetic_asian.statistics', n):
+            # Apply control variate (once every observation is fixed, the payoff is known)
+            if self.use_control_variate and self.remaining_observations > 0:
+                geo_option = self._copy_fixings(GeometricAsianOption(
+                    self.spot_price, self.risk_free_rate, self.maturity, self.strike_price,
+                    self.volatility, self.num_observations, self.option_type
+                ))
+                geo_price = geo_option.price()
+                cov = np.cov(payoffs_arith, payoffs_geom)[0, 1]
+                theta = cov / np.var(payoffs_geom)
+                adjusted_payoffs = payoffs_arith + theta * (geo_price - payoffs_geom)
+            else:
+                adjusted_payoffs = payoffs_arith
+
+            price = np.mean(adjusted_payoffs)
+            std_err = np.std(adjusted_payoffs, ddof=1) / np.sqrt(self.num_paths)
+            conf_interval = (float(price - 1.96 * std_err), float(price + 1.96 * std_err))
+
+        return price, conf_interval
+
+    def price_with_controls(self, controls=('geometric', 'underlying', 'european'), chunk_size: int = 65536):
+        """
+        Monte Carlo price with several control variates combined by least-squares regression.
+
+        Uses the paths of price(), simulated and fed to the estimator chunk_size paths
+        at a time, so only one chunk of paths is held in memory. Available controls (all
+        discounted, with known means): 'geometric' (the geometric Asian option),
+        'underlying' (the price at the last observation) and 'european' (the European
+        option with the same strike and maturity).
+
+        :param controls: Names of the controls to use
+        :param chunk_size: Number of paths simulated and fed to the estimator at a time
+        :return: Dictionary with 'price', 'std_error', 'conf_interval', 'coefficients' and 'variance_reduction'
+        """
+        r, sigma, T, K = self.risk_free_rate, self.volatility, self.maturity, self.strike_price
+        discount = discount_factor(r, T)
+        if self.remaining_observations == 0:
+            controls = ()
+
+        means = []
+        for name in controls:
+            if name == 'geometric':
+                means.append(self._copy_fixings(GeometricAsianOption(self.spot_price, r, T, K, sigma, self.num_observations, self.option_type)).price())
+            elif name == 'underlying':
+                means.append(self.spot_price)
+            elif name == 'european':
+                means.append(EuropeanOption(self.spot_price, r, T, K, 0.0, sigma, self.option_type).price())
+            else:
+                raise ValueError(f"Unknown control variate '{name}'")
+
+        sign = 1 if self.option_type == 'call' else -1
+        estimator = ControlVariateEstimator(len(controls))
+        for chunk in self._path_chunks(chunk_size):
+            with stage('arithmetic_asian.statistics', len(chunk)):
+                payoffs_arith, payoffs_geom = self._discounted_payoffs(chunk, discount)
+                columns = {
+                    'geometric': lambda: payoffs_geom,
+                    'underlying': lambda: discount * chunk[:, -1],
+                    'european': lambda: discount * np.maximum(sign * (chunk[:, -1] - K), 0),
+                }
+                estimator.update(payoffs_arith, np.column_stack([columns[name]() for name in controls]) if controls else None)
+        return estimator.estimate(means)
+
+    def approximate_price(self, method: str = 'levy'):
+        """
+        Analytic approximation of the price, for quick quotes (see ClosedFormPricer.lognormal_average).
+
+        :param method: 'levy' (two-moment lognormal matching) or 'curran' (conditioning on the geometric average)
+        :return: Approximate price of the option
+        """
+        discount = discount_factor(self.risk_free_rate, self.maturity)
+        m, n = self.remaining_observations, self.num_observations
+        if m == 0:
+            sign = 1 if self.option_type == 'call' else -1
+            return discount * max(sign * (self.fixed_sum / n - self.strike_price), 0)
+
+        # The average is fixed_sum / n plus m / n times the average of the remaining observations
+        drift, diffusion = step_drift_diffusion(self.risk_free_rate, self.volatility, self.maturity, m)
+        scale = m / n
+        strike = (self.strike_price - self.fixed_sum / n) / scale
+        return scale * ClosedFormPricer().lognormal_average(
+            np.log(self.spot_price) + np.cumsum(drift), np.cumsum(diffusion**2), strike, discount, self.option_type, method
+        )
+
+    def calculate_greeks(self):
+        """
+        Price, delta, vega and rho from a single simulation by pathwise differentiation.
+
+        Every path is differentiated with respect to the spot, a parallel shift of
+        the volatility and of the risk-free rate along with its payoff, so the
+        Greeks cost a small multiple of one price() run and use the same paths.
+        With the control variate, each Greek is adjusted with the coefficient of
+        the price and the corresponding sensitivity of the geometric option.
+
+        :return: Dictionary with 'price', 'delta', 'vega' and 'rho'
+        """
+        if not is_flat(self.risk_free_rate, self.volatility):
+            raise ValueError("Pathwise Greeks need a flat risk-free rate and volatility")
+        S0, r, sigma, T = self.spot_price, self.risk_free_rate, self.volatility, self.maturity
+        m, n = self.remaining_observations, self.num_observations
+        discount = discount_factor(r, T)
+        S_paths = self._simulate_paths()
+
+        # Derivatives of log S_i: 1 / S0 for the spot, W_i - sigma t_i for the volatility and t_i for the rate
+        t = np.arange(1, m + 1) * T / max(m, 1)
+        dlog_vol = (np.log(S_paths / S0) - (r + 0.5 * sigma**2) * t) / sigma
+        arithmetic_means, geometric_means = self._averages(S_paths)
+        derivatives = {
+            'delta': ((arithmetic_means - self.fixed_sum / n) / S0, geometric_means * m / n / S0),
+            'vega': (np.sum(S_paths * dlog_vol, axis=1) / n, geometric_means * np.sum(dlog_vol, axis=1) / n),
+            'rho': (S_paths @ t / n, geometric_means * np.sum(t) / n),
+        }
+
+        # The payoff passes the derivative of the average through where the option is in the money
+        payoffs_arith, payoffs_geom = self._discounted_payoffs(S_paths, discount)
+        sign = 1 if self.option_type == 'call' else -1
+        weight_arith = discount * sign * (payoffs_arith > 0)
+        weight_geom = discount * sign * (payoffs_geom > 0)
+        greeks = {}
+        for name, (d_arith, d_geom) in derivatives.items():
+            greeks[name] = (weight_arith * d_arith, weight_geom * d_geom)
+        greeks['rho'] = (greeks['rho'][0] - T * payoffs_arith, greeks['rho'][1] - T * payoffs_geom)
+
+        result = {'price': np.mean(payoffs_arith)}
+        result.update({name: np.mean(d_arith) for name, (d_arith, _) in greeks.items()})
+        if self.use_control_variate and m > 0:
+            theta = np.cov(payoffs_arith, payoffs_geom)[0, 1] / np.var(payoffs_geom)
+            control = self._copy_fixings(GeometricAsianOption(
+                S0, r, T, self.strike_price, sigma, self.num_observations, self.option_type
+            )).calculate_greeks()
+            result['price'] += theta * (control['price'] - np.mean(payoffs_geom))
+            for name, (_, d_geom) in greeks.items():
+                result[name] += theta * (control[name] - np.mean(d_geom))
+        return {name: float(value) for name, value in result.items()}
+
+    def price_strikes(self, strike_prices):
+        """
+        Price the option for a ladder of strikes from a single simulation.
+
+        The paths are those of price(), so every strike gets the price() of the
+        corresponding option; the averages are computed once for all strikes.
+
+        :param strike_prices: Array of strikes
+        :return: Tuple of prices (one per strike) and 95% confidence intervals (array of shape (strikes, 2))
+        """
+        K = np.asarray(strike_prices, dtype=float)
+        discount = discount_factor(self.risk_free_rate, self.maturity)
+        n = self.num_paths
+        S_paths = self._simulate_paths()
+
+        with stage('arithmetic_asian.payoff', n):
+            arithmetic_means, geometric_means = self._averages(S_paths)
+            sign = ClosedFormPricer.call_mask(self.option_type) * 2 - 1
+            payoffs_arith = discount * np.maximum(sign * (arithmetic_means[:, None] - K), 0)
+            payoffs_geom = discount * np.maximum(sign * (geometric_means[:, None] - K), 0)
+
+        with stage('arithmetic_asian.statistics', n):
+            if self.use_control_variate and self.remaining_observations > 0:
+                geo_prices = self._copy_fixings(GeometricAsianOption(
+                    self.spot_price, self.risk_free_rate, self.maturity, K,
+                    self.volatility, self.num_observations, self.option_type
+                )).price()
+                # Same estimator as price(), one coefficient per strike
+                centered_geom = payoffs_geom - payoffs_geom.mean(axis=0)
+                cov = np.sum((payoffs_arith - payoffs_arith.mean(axis=0)) * centered_geom, axis=0) / (n - 1)
+                theta = cov / np.mean(centered_geom**2, axis=0)
+                adjusted_payoffs = payoffs_arith + theta * (geo_prices - payoffs_geom)
+            else:
+                adjusted_payoffs = payoffs_arith
+
+            prices = np.mean(adjusted_payoffs, axis=0)
+            std_err = np.std(adjusted_payoffs, axis=0, ddof=1) / np.sqrt(n)
+            conf_intervals = np.stack([prices - 1.96 * std_err, prices + 1.96 * std_err], axis=1)
+
+        return prices, conf_intervals
+
+    def _simulate_paths(self):
         """
-        dt = self.maturity / self.num_observations
-        drift = (self.risk_free_rate - 0.5 * self.volatility**2) * dt
-        diffusion = self.volatility * np.sqrt(dt)
+        Simulate the prices at the remaining observations.
+
+        :return: Array of simulated prices, one row per path and one column per remaining observation
+        """
+        return next(self._path_chunks(self.num_paths))
+
+    def _path_chunks(self, chunk_size: int):
+        """
+        Simulate the paths of _simulate_paths() chunk_size rows at a time.
+
+        The normals are drawn in order from the same seeded stream, so the chunks
+        are the rows of _simulate_paths() without holding all of them at once.
+
+        :return: Generator of arrays of simulated prices, one row per path and one column per remaining observation
+        """
+        m = self.remaining_observations
+        n = self.num_paths
+        if m == 0:
+            for start in range(0, n, chunk_size):
+                yield np.empty((min(chunk_size, n - start), 0))
+            return
+
+        # Per-step drift and diffusion, shared by all trades on the same curves and schedule
+        drift, diffusion = step_drift_diffusion(self.risk_free_rate, self.volatility, self.maturity, m)
 
         # Simulate asset paths
         np.random.seed(0)  # For reproducibility
-        Z = np.random.normal(size=(self.num_paths, self.num_observations))
-        S_paths = self.spot_price * np.exp(np.cumsum(drift + diffusion * Z, axis=1))
+        for start in range(0, n, chunk_size):
+            rows = min(chunk_size, n - start)
+            with stage('arithmetic_asian.rng', rows):
+                Z = np.random.normal(size=(rows, m))
+            with stage('arithmetic_asian.paths', rows):
+                yield self.spot_price * np.exp(np.cumsum(drift + diffusion * Z, axis=1))
+
+    def _averages(self, S_paths):
+        """
+        Arithmetic and geometric average of every path, including the past fixings.
 
+        :param S_paths: Array of simulated prices at the remaining observations
+        """
+        if self.num_fixed == 0:
+            arithmetic_means = np.mean(S_paths, axis=1)
+            geometric_means = np.exp(np.mean(np.log(S_paths), axis=1))
+        else:
+            n = self.num_observations
+            arithmetic_means = (self.fixed_sum + np.sum(S_paths, axis=1)) / n
+            geometric_means = np.exp((self.fixed_log_sum + np.sum(np.log(S_paths), axis=1)) / n)
+        return arithmetic_means, geometric_means
+
+    def _discounted_payoffs(self, S_paths, discount):
+        """
+        Evaluate the discounted arithmetic and geometric average payoffs of every path at once.
+
+        :param S_paths: Array of simulated prices, one row per path and one column per observation
+        :param discount: Discount factor from maturity to today
+        :return: Tuple of arrays (arithmetic payoffs, geometric payoffs), one value per path
+        """
         # Arithmetic and geometric averages
-        arithmetic_means = np.mean(S_paths, axis=1)
-        geometric_means = np.exp(np.mean(np.log(S_paths), axis=1))
+        arithmetic_means, geometric_means = self._averages(S_paths)
 
         if self.option_type == 'call':
-            payoffs_arith = np.exp(-self.risk_free_rate * self.maturity) * np.maximum(arithmetic_means - self.strike_price, 0)
-            payoffs_geom = np.exp(-self.risk_free_rate * self.maturity) * np.maximum(geometric_means - self.strike_price, 0)
+            payoffs_arith = discount * np.maximum(arithmetic_means - self.strike_price, 0)
+            payoffs_geom = discount * np.maximum(geometric_means - self.strike_price, 0)
         elif self.option_type == 'put':
-            payoffs_arith = np.exp(-self.risk_free_rate * self.maturity) * np.maximum(self.strike_price - arithmetic_means, 0)
-            payoffs_geom = np.exp(-self.risk_free_rate * self.maturity) * np.maximum(self.strike_price - geometric_means, 0)
+            payoffs_arith = discount * np.maximum(self.strike_price - arithmetic_means, 0)
+            payoffs_geom = discount * np.maximum(self.strike_price - geometric_means, 0)
         else:
             raise ValueError("option_type must be 'call' or 'put'")
-
-        # Apply control variate
-        if self.use_control_variate:
-            geo_option = GeometricAsianOption(
-                self.spot_price, self.risk_free_rate, self.maturity, self.strike_price,
-                self.volatility, self.num_observations, self.option_type
-            )
-            geo_price = geo_option.price()
-            cov = np.cov(payoffs_arith, payoffs_geom)[0, 1]
-            theta = cov / np.var(payoffs_geom)
-            adjusted_payoffs = payoffs_arith + theta * (geo_price - payoffs_geom)
-        else:
-            adjusted_payoffs = payoffs_arith
-
-        price = np.mean(adjusted_payoffs)
-        std_err = np.std(adjusted_payoffs, ddof=1) / np.sqrt(self.num_paths)
-        conf_interval = (float(price - 1.96 * std_err), float(price + 1.96 * std_err))
-
-        return price, conf_interval
+        return payoffs_arith, payoffs_geom
 
 
 # Example usage
@@ -169,4 +448,27 @@ if __name__ == "__main__":
     print(f"95% Confidence Interval: {conf_interval}")
 
     geo_price = geo_option.price()
-    print(f"Geometric Asian Option Price: {geo_price:.4f}")
\ No newline at end of file
+    print(f"Geometric Asian Option Price: {geo_price:.4f}")
+    print("Geometric Asian call Greeks:", {name: round(float(value), 4) for name, value in geo_option.calculate_greeks().items()})
+
+    # Strike ladder from a single simulation
+    prices, conf_intervals = ari_option.price_strikes(np.linspace(80, 120, 9))
+    print("Arithmetic Asian put ladder:", np.round(prices, 4))
+
+    # Price and Greeks from one simulation
+    print("Arithmetic Asian put Greeks:", {name: round(value, 4) for name, value in ari_option.calculate_greeks().items()})
+
+    # Several control variates combined by regression
+    result = ari_option.price_with_controls()
+    print(f"Arithmetic Asian put with three controls: {result['price']:.4f}, variance reduction {result['variance_reduction']:.1f}x")
+
+    # Analytic approximations for quick quotes
+    for method in ('levy', 'curran'):
+        print(f"Arithmetic Asian put ({method}): {ari_option.approximate_price(method):.4f}")
+
+    # Seasoned option: fixings are added as they are observed, one year after the start
+    for fixing in S0 * np.exp(0.3 * np.random.default_rng(1).standard_normal(16).cumsum() / np.sqrt(16)):
+        ari_option.add_fixing(fixing)
+        geo_option.add_fixing(fixing)
+    ari_option.maturity = geo_option.maturity = T - 16 * T / N
+    print(f"After {ari_option.num_fixed} fixings: arithmetic {ari_option.price()[0]:.4f}, geometric {geo_option.price():.4f}")
\ No newline at end of file
@@ -1,17 +1,22 @@
 from options.option import Option
 import numpy as np
-from scipy.stats import norm
+from pricer.closed_form_pricer import ClosedFormPricer
+from market.curves import zero_rate, average_volatility
+from pricer.control_variates import ControlVariateEstimator
+from utils.profiling import stage
 
 class BasketOption(Option):
+    __slots__ = ('spot_prices', 'volatilities', 'correlation')
+
     def __init__(self, spot_prices: list, risk_free_rate: float, maturity: float, strike_price: float, volatilities: list, correlation: float):
         """
         Base class for Basket Option.
 
         :param spot_prices: List of current prices of the underlying assets
-        :param risk_free_rate: Risk-free interest rate
+        :param risk_free_rate: Risk-free interest rate (flat rate or YieldCurve)
         :param maturity: Time to maturity in years
         :param strike_price: Strike price of the option
-        :param volatilities: List of volatilities for each underlying asset
+        :param volatilities: List of volatilities (flat or VolTermStructure) for each underlying asset
         :param correlation: Correlation coefficient between the underlying assets (assumed equal pairwise)
         """
         super().__init__(spot_prices[0], risk_free_rate, maturity, strike_price)
@@ -21,15 +26,17 @@ class BasketOption(Option):
 
 
 class GeometricBasketOption(BasketOption):
+    __slots__ = ('option_type',)
+
     def __init__(self, spot_prices: list, risk_free_rate: float, maturity: float, strike_price: float, volatilities: list, correlation: float, option_type: str = 'call'):
         """
         Geometric Basket Option with closed-form pricing formula.
 
         :param spot_prices: List of current prices of the underlying assets
-        :param risk_free_rate: Risk-free interest rate
+        :param risk_free_rate: Risk-free interest rate (flat rate or YieldCurve)
         :param maturity: Time to maturity in years
         :param strike_price: Strike price of the option
-        :param volatilities: List of volatilities for each underlying asset
+        :param volatilities: List of volatilities (flat or VolTermStructure) for each underlying asset
         :param correlation: Correlation coefficient between the underlying assets
         :param option_type: Type of the option ('call' or 'put')
         """
@@ -42,41 +49,28 @@ class GeometricBasketOption(BasketOption):
 
         :return: Price of the Geometric Basket Option
         """
-        S = np.array(self.spot_prices)
-        sigma = np.array(self.volatilities)
-        K = self.strike_price
-        r = self.risk_free_rate
+        # Only the terminal distribution matters, so term structures enter through their values to maturity
         T = self.maturity
-        rho = self.correlation
-        n = len(S)
-
-        # Geometric average of initial prices
-        G0 = np.prod(S) ** (1 / n)
-
-        # Effective basket volatility under constant correlation assumption
-        sigma_G_squared = (1 / n**2) * (
-            np.sum(sigma**2) + rho * (np.sum(sigma)**2 - np.sum(sigma**2))
+        return ClosedFormPricer().geometric_basket(
+            self.spot_prices, zero_rate(self.risk_free_rate, T), T, self.strike_price,
+            [average_volatility(sigma, T) for sigma in self.volatilities], self.correlation, self.option_type
         )
-        sigma_G = np.sqrt(sigma_G_squared)
-
-        # Drift of geometric basket
-        mu_G = r - 0.5 * sigma_G_squared
 
-        # d1 and d2 for BS-like formula
-        d1 = (np.log(G0 / K) + (mu_G + 0.5 * sigma_G_squared) * T) / (sigma_G * np.sqrt(T))
-        d2 = d1 - sigma_G * np.sqrt(T)
-
-        # Closed-form pricing based on option type
-        if self.option_type == 'call':
-            price = np.exp(-r * T) * (G0 * np.exp(mu_G * T) * norm.cdf(d1) - K * norm.cdf(d2))
-        elif self.option_type == 'put':
-            price = np.exp(-r * T) * (K * norm.cdf(-d2) - G0 * np.exp(mu_G * T) * norm.cdf(-d1))
-        else:
-            raise ValueError("option_type must be 'call' or 'put'")
+    def calculate_greeks(self):
+        """
+        Closed-form price and sensitivities, computed together (see ClosedFormPricer.geometric_basket_greeks).
 
-        return price
+        :return: Dictionary with 'price', 'delta', 'gamma' and 'vega' (one value per asset), 'rho' and 'correlation'
+        """
+        T = self.maturity
+        return ClosedFormPricer().geometric_basket_greeks(
+            self.spot_prices, zero_rate(self.risk_free_rate, T), T, self.strike_price,
+            [average_volatility(sigma, T) for sigma in self.volatilities], self.correlation, self.option_type
+        )
 
 class ArithmeticBasketOption(GeometricBasketOption):
+    __slots__ = ('num_paths', 'control_variate')
+
     def __init__(self, spot_prices: list, risk_free_rate: float, maturity: float, strike_price: float,
                  volatilities: list, correlation: float, option_type: str = 'call',
                  num_paths: int = 10000, control_variate: str = 'geometric'):
@@ -84,10 +78,10 @@ class ArithmeticBasketOption(GeometricBasketOption):
         Arithmetic mean basket option pricer using Monte Carlo with control variate.
 
         :param spot_prices: List of two spot prices
-        :param risk_free_rate: Risk-free rate
+        :param risk_free_rate: Risk-free rate (flat rate or YieldCurve)
         :param maturity: Time to maturity
         :param strike_price: Strike price
-        :param volatilities: List of two volatilities
+        :param volatilities: List of two volatilities (flat or VolTermStructure)
         :param correlation: Correlation between assets
         :param option_type: 'call' or 'put'
         :param num_paths: Number of Monte Carlo paths
@@ -97,66 +91,66 @@ class ArithmeticBasketOption(GeometricBasketOption):
         self.num_paths = num_paths
         self.control_variate = control_variate
 
-    def price(self):
+    def price(self, method: str = 'monte_carlo'):
         """
         Monte Carlo simulation for arithmetic basket option with optional control variate technique.
-        
-        :return: Estimated option price with 95% confidence interval (tuple)
+
+        :param method: 'monte_carlo', or 'levy' for a quick analytic approximation
+        :return: Estimated option price with 95% confidence interval (tuple; the interval is None for the approximation)
         """
-        S1, S2 = self.spot_prices
-        sigma1, sigma2 = self.volatilities
+        if method == 'levy':
+            return self.approximate_price(), None
+        if method != 'monte_carlo':
+            raise ValueError("method must be 'monte_carlo' or 'levy'")
+
         rho = self.correlation
         T = self.maturity
+        sigma1, sigma2 = (average_volatility(sigma, T) for sigma in self.volatilities)
         K = self.strike_price
-        r = self.risk_free_rate
+        r = zero_rate(self.risk_free_rate, T)
         n = self.num_paths
         option_type = self.option_type
 
-        np.random.seed(0)  # random seed🧪
-
-        # Generate correlated random variables
-        Z1 = np.random.randn(n)
-        Z2 = rho * Z1 + np.sqrt(1 - rho**2) * np.random.randn(n)
-
-        # Simulate the asset prices at maturity
-        S1_T = S1 * np.exp((r - 0.5 * sigma1**2) * T + sigma1 * np.sqrt(T) * Z1)
-        S2_T = S2 * np.exp((r - 0.5 * sigma2**2) * T + sigma2 * np.sqrt(T) * Z2)
+        Z1, Z2, S1_T, S2_T = self._simulate_terminal(r, sigma1, sigma2)
 
         # Arithmetic mean payoff
-        arithmetic_mean = (S1_T + S2_T) / 2
-        if option_type == 'call':
-            payoff_arith = np.maximum(arithmetic_mean - K, 0)
-        elif option_type == 'put':
-            payoff_arith = np.maximum(K - arithmetic_mean, 0)
-        else:
-            raise ValueError("option_type must be 'call' or 'put'")
-
-        if self.control_variate == 'geometric':
-            # Calculate the geometric mean payoff
-            geometric_mean = np.sqrt(S1_T * S2_T)
+        with stage('arithmetic_basket.payoff', n):
+            arithmetic_mean = (S1_T + S2_T) / 2
             if option_type == 'call':
-                payoff_geom = np.maximum(geometric_mean - K, 0)
+                payoff_arith = np.maximum(arithmetic_mean - K, 0)
+            elif option_type == 'put':
+                payoff_arith = np.maximum(K - arithmetic_mean, 0)
             else:
-                payoff_geom = np.maximum(K - geometric_mean, 0)
+                raise ValueError("option_type must be 'call' or 'put'")
+
+            if self.control_variate == 'geometric':
+                # Calculate the geometric mean payoff
+                geometric_mean = np.sqrt(S1_T * S2_T)
+                if option_type == 'call':
+                    payoff_geom = np.maximum(geometric_mean - K, 0)
+                else:
+                    payoff_geom = np.maximum(K - geometric_mean, 0)
 
-            # Geometric basket option price as control variate
-            geo_option = GeometricBasketOption(self.spot_prices, r, T, K, self.volatilities, rho, option_type)
-            geo_price_analytic = geo_option.price()
+        with stage('arithmetic_basket.statistics', n):
+            if self.control_variate == 'geometric':
+                # Geometric basket option price as control variate
+                geo_option = GeometricBasketOption(self.spot_prices, r, T, K, [sigma1, sigma2], rho, option_type)
+                geo_price_analytic = geo_option.price()
 
-            # Calculate the covariance between the payoffs
-            cov_matrix = np.cov(payoff_arith, payoff_geom)
-            b_hat = cov_matrix[0, 1] / cov_matrix[1, 1]
+                # Calculate the covariance between the payoffs
+                cov_matrix = np.cov(payoff_arith, payoff_geom)
+                b_hat = cov_matrix[0, 1] / cov_matrix[1, 1]
 
-            # Control variate adjustment
-            price_control = np.exp(-r * T) * (payoff_arith - b_hat * (payoff_geom - geo_price_analytic))
+                # Control variate adjustment (payoffs are undiscounted, so compare with the undiscounted analytic price)
+                price_control = np.exp(-r * T) * (payoff_arith - b_hat * (payoff_geom - geo_price_analytic * np.exp(r * T)))
 
-            price_mean = np.mean(price_control)
-            std_dev = np.std(price_control, ddof=1)
-        else:
-            # No control variate adjustment
-            discounted_payoff = np.exp(-r * T) * payoff_arith
-            price_mean = np.mean(discounted_payoff)
-            std_dev = np.std(discounted_payoff, ddof=1)
+                price_mean = np.mean(price_control)
+                std_dev = np.std(price_control, ddof=1)
+            else:
+                # No control variate adjustment
+                discounted_payoff = np.exp(-r * T) * payoff_arith
+                price_mean = np.mean(discounted_payoff)
+                std_dev = np.std(discounted_payoff, ddof=1)
 
         # 95% confidence interval
         conf_interval = (float(price_mean - 1.96 * std_dev / np.sqrt(n)),
@@ -164,6 +158,143 @@ class ArithmeticBasketOption(GeometricBasketOption):
 
         return price_mean, conf_interval
 
+    def _simulate_terminal(self, r, sigma1, sigma2):
+        """
+        Simulate the correlated normals and the asset prices at maturity.
+
+        :return: Tuple (Z1, Z2, S1_T, S2_T) of arrays, one value per path
+        """
+        S1, S2 = self.spot_prices
+        rho, T, n = self.correlation, self.maturity, self.num_paths
+
+        with stage('arithmetic_basket.rng', n):
+            np.random.seed(0)  # random seed🧪
+
+            # Generate correlated random variables
+            Z1 = np.random.randn(n)
+            Z2 = rho * Z1 + np.sqrt(1 - rho**2) * np.random.randn(n)
+
+        # Simulate the asset prices at maturity
+        with stage('arithmetic_basket.paths', n):
+            S1_T = S1 * np.exp((r - 0.5 * sigma1**2) * T + sigma1 * np.sqrt(T) * Z1)
+            S2_T = S2 * np.exp((r - 0.5 * sigma2**2) * T + sigma2 * np.sqrt(T) * Z2)
+        return Z1, Z2, S1_T, S2_T
+
+    def price_with_controls(self, controls=('geometric', 'underlying', 'european'), chunk_size: int = 65536):
+        """
+        Monte Carlo price with several control variates combined by least-squares regression.
+
+        Uses the terminal prices of price(), simulated for all paths at once (two values
+        per path). Available controls (all discounted, with known means): 'geometric'
+        (the geometric basket option), 'underlying' (each asset at maturity) and
+        'european' (a European option with the basket strike on each asset).
+
+        :param controls: Names of the controls to use
+        :param chunk_size: Number of paths whose payoffs and controls are built and fed to the estimator at a time
+        :return: Dictionary with 'price', 'std_error', 'conf_interval', 'coefficients' and 'variance_reduction'
+        """
+        S = np.asarray(self.spot_prices, dtype=float)
+        rho, T, K = self.correlation, self.maturity, self.strike_price
+        sigma = np.array([average_volatility(v, T) for v in self.volatilities])
+        r = zero_rate(self.risk_free_rate, T)
+        discount = np.exp(-r * T)
+        _, _, S1_T, S2_T = self._simulate_terminal(r, *sigma)
+        ST = np.stack([S1_T, S2_T], axis=1)
+
+        pricer = ClosedFormPricer()
+        means = []
+        for name in controls:
+            if name == 'geometric':
+                means.append(pricer.geometric_basket(S, r, T, K, sigma, rho, self.option_type))
+            elif name == 'underlying':
+                means.extend(S)
+            elif name == 'european':
+                means.extend(pricer.european(S, r, T, K, 0.0, sigma, self.option_type))
+            else:
+                raise ValueError(f"Unknown control variate '{name}'")
+
+        sign = 1 if self.option_type == 'call' else -1
+        estimator = ControlVariateEstimator(len(means))
+        with stage('arithmetic_basket.statistics', self.num_paths):
+            for start in range(0, self.num_paths, chunk_size):
+                chunk = ST[start:start + chunk_size]
+                columns = {
+                    'geometric': lambda: discount * np.maximum(sign * (np.sqrt(chunk[:, 0] * chunk[:, 1]) - K), 0)[:, None],
+                    'underlying': lambda: discount * chunk,
+                    'european': lambda: discount * np.maximum(sign * (chunk - K), 0),
+                }
+                payoffs = discount * np.maximum(sign * (chunk.mean(axis=1) - K), 0)
+                estimator.update(payoffs, np.column_stack([columns[name]() for name in controls]) if controls else None)
+        return estimator.estimate(means)
+
+    def calculate_greeks(self):
+        """
+        Price and first-order sensitivities from a single simulation by pathwise differentiation.
+
+        The terminal prices are differentiated with respect to every spot,
+        every volatility, the risk-free rate and the correlation, and the
+        derivatives are passed through the payoff, so all Greeks come from the
+        paths of one price() run. With the geometric control variate, each Greek
+        is adjusted with the coefficient of the price and the corresponding
+        sensitivity of the geometric basket.
+
+        :return: Dictionary with 'price', 'delta' and 'vega' (one value per asset), 'rho' and 'correlation'
+        """
+        S = np.asarray(self.spot_prices, dtype=float)
+        rho, T, K = self.correlation, self.maturity, self.strike_price
+        sigma = np.array([average_volatility(v, T) for v in self.volatilities])
+        r = zero_rate(self.risk_free_rate, T)
+        discount = np.exp(-r * T)
+        Z1, Z2, S1_T, S2_T = self._simulate_terminal(r, *sigma)
+        ST = np.stack([S1_T, S2_T], axis=1)
+        Z = np.stack([Z1, Z2], axis=1)
+
+        # Derivatives of log S_j(T): 1 / S_j, sqrt(T) Z_j - sigma_j T, T, and for the second asset d Z2 / d rho
+        dlog_vol = np.sqrt(T) * Z - sigma * T
+        dZ2_drho = Z1 - rho * (Z2 - rho * Z1) / (1 - rho**2)
+        arithmetic_mean = ST.mean(axis=1)
+        geometric_mean = np.sqrt(S1_T * S2_T)
+        derivatives = {
+            'delta': (ST / S / 2, geometric_mean[:, None] / S / 2),
+            'vega': (ST * dlog_vol / 2, geometric_mean[:, None] * dlog_vol / 2),
+            'rho': (T * arithmetic_mean, T * geometric_mean),
+            'correlation': (S2_T * sigma[1] * np.sqrt(T) * dZ2_drho / 2, geometric_mean * sigma[1] * np.sqrt(T) * dZ2_drho / 2),
+        }
+
+        sign = 1 if self.option_type == 'call' else -1
+        payoff_arith = discount * np.maximum(sign * (arithmetic_mean - K), 0)
+        payoff_geom = discount * np.maximum(sign * (geometric_mean - K), 0)
+        weight_arith = discount * sign * (payoff_arith > 0)
+        weight_geom = discount * sign * (payoff_geom > 0)
+        greeks = {}
+        for name, (d_arith, d_geom) in derivatives.items():
+            d_arith, d_geom = np.asarray(d_arith), np.asarray(d_geom)
+            greeks[name] = ((weight_arith * d_arith.T).T, (weight_geom * d_geom.T).T)
+        greeks['rho'] = (greeks['rho'][0] - T * payoff_arith, greeks['rho'][1] - T * payoff_geom)
+
+        result = {'price': np.mean(payoff_arith)}
+        result.update({name: np.mean(d_arith, axis=0) for name, (d_arith, _) in greeks.items()})
+        if self.control_variate == 'geometric':
+            theta = np.cov(payoff_arith, payoff_geom)[0, 1] / np.var(payoff_geom, ddof=1)
+            control = ClosedFormPricer().geometric_basket_greeks(S, r, T, K, sigma, rho, self.option_type)
+            result['price'] += theta * (control['price'] - np.mean(payoff_geom))
+            for name, (_, d_geom) in greeks.items():
+                result[name] = result[name] + theta * (control[name] - np.mean(d_geom, axis=0))
+        return {name: value.tolist() if np.ndim(value) else float(value) for name, value in result.items()}
+
+    def approximate_price(self, weights=None):
+        """
+        Levy moment-matching approximation of the price (any number of assets, see ClosedFormPricer.arithmetic_basket).
+
+        :param weights: Weights of the assets in the basket (default: equal weights)
+        :return: Approximate price of the option
+        """
+        T = self.maturity
+        return ClosedFormPricer().arithmetic_basket(
+            self.spot_prices, zero_rate(self.risk_free_rate, T), T, self.strike_price,
+            [average_volatility(sigma, T) for sigma in self.volatilities], self.correlation, self.option_type, weights
+        )
+
 
 # Example usage
 if __name__ == "__main__":
@@ -177,8 +308,14 @@ if __name__ == "__main__":
 
     geometric_option = GeometricBasketOption(spot_prices, risk_free_rate, maturity, strike_price, volatilities, correlation, option_type)
     print("Geometric Basket Option Price:", geometric_option.price())
+    print("Geometric Basket Option Greeks:", geometric_option.calculate_greeks())
 
     arithmetic_option = ArithmeticBasketOption(spot_prices, risk_free_rate, maturity, strike_price, volatilities, correlation, option_type, num_paths=10000)
     price, conf_interval = arithmetic_option.price()
     print("Arithmetic Basket Option Price:", price)
-    print("95% Confidence Interval:", conf_interval)
\ No newline at end of file
+    print("95% Confidence Interval:", conf_interval)
+    print("Levy approximation:", arithmetic_option.approximate_price())
+    print("Greeks from one simulation:", arithmetic_option.calculate_greeks())
+    result = arithmetic_option.price_with_controls()
+    print(f"With geometric, underlying and European controls: {result['price']:.4f} {result['conf_interval']}, "
+          f"variance reduction {result['variance_reduction']:.1f}x")
\ No newline at end of file
@@ -1,18 +1,21 @@
 from options.option import Option
-import numpy as np
-from scipy.stats import norm
+from pricer.closed_form_pricer import ClosedFormPricer
+from market.curves import zero_rate, average_volatility
 
 
 class EuropeanOption(Option):
+    __slots__ = ('option_type', 'repo_rate')
 
     def __init__(self, spot_price: float, risk_free_rate: float, maturity: float, strike_price: float, repo_rate: float, volatility: float, option_type: str = 'call'):
         """
         Constructor for EuropeanOption class.
 
         :param spot_price: Current price of the underlying asset
-        :param risk_free_rate: Risk-free interest rate
+        :param risk_free_rate: Risk-free interest rate (flat rate or YieldCurve)
         :param maturity: Time to maturity in years
         :param strike_price: Strike price of the option
+        :param repo_rate: Repo rate of the underlying asset (flat rate or YieldCurve)
+        :param volatility: Volatility of the underlying asset (flat volatility or VolTermStructure)
         :param option_type: Type of the option ('call' or 'put')
         """
         super().__init__(spot_price, risk_free_rate, maturity, strike_price, volatility)
@@ -43,21 +46,11 @@ class EuropeanOption(Option):
         """
         Calculate the Black-Scholes option price considering the repo rate q
         """
-        S0 = self.spot_price
-        K = self.strike_price
         T = self.maturity
-        r = self.risk_free_rate
-        q = self.repo_rate
-        sigma = self.volatility
-        option_type = self.option_type
-        d1 = (np.log(S0 / K) + (r - q + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
-        d2 = d1 - sigma * np.sqrt(T)
-        
-        if option_type == 'call':
-            price = S0 * np.exp(-q * T) * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2)
-        else:
-            price = K * np.exp(-r * T) * norm.cdf(-d2) - S0 * np.exp(-q * T) * norm.cdf(-d1)
-        return price
+        return ClosedFormPricer().european(
+            self.spot_price, zero_rate(self.risk_free_rate, T), T, self.strike_price,
+            zero_rate(self.repo_rate, T), average_volatility(self.volatility, T), self.option_type
+        )
     
 if __name__ == "__main__":
     # Example usage
@@ -1,9 +1,14 @@
 from options.option import Option
 import numpy as np
 import math
+from scipy.optimize import minimize_scalar
+from scipy.special import logsumexp
 from scipy.stats import norm, qmc
+from market.curves import discount_factor, step_drift_diffusion
+from utils.profiling import stage
 
 class KIKOOption(Option):
+    __slots__ = ('lower_barrier', 'upper_barrier', 'num_observations', 'rebate')
 
     # additional parameters: lower_barrier, upper_barrier, num_observations, rebate
     def __init__(self, spot_price: float, risk_free_rate: float, maturity: float, strike_price: float, volatility: float, lower_barrier: float, upper_barrier: float, num_observations: int, rebate: float = 0.0):
@@ -11,10 +16,10 @@ class KIKOOption(Option):
         Constructor for KIKOOption class.
 
         :param spot_price: Current price of the underlying asset
-        :param risk_free_rate: Risk-free interest rate
+        :param risk_free_rate: Risk-free interest rate (flat rate or YieldCurve)
         :param maturity: Time to maturity in years
         :param strike_price: Strike price of the option
-        :param volatility: Volatility of the underlying asset
+        :param volatility: Volatility of the underlying asset (flat volatility or VolTermStructure)
         :param lower_barrier: Lower barrier level
         :param upper_barrier: Upper barrier level
         :param num_observations: Number of observations for averaging
@@ -33,50 +38,205 @@ class KIKOOption(Option):
         :return: Price of the KIKO option
         """
         dt = self.maturity / self.num_observations
-        np.random.seed(seed)
-        values = []
+        stock_paths = self._simulate_paths(num_paths, seed)
 
-        # 1. Create QMC sequence
-        sequencer = qmc.Sobol(d=self.num_observations, seed=seed)
-        U = sequencer.random(n=num_paths)
-        Z = norm.ppf(U)  # Standard normalize samples
-
-        # 2. Construct stock log-returns
-        drift = (self.risk_free_rate - 0.5 * self.volatility ** 2) * dt
-        diffusion = self.volatility * math.sqrt(dt) * Z
-        log_returns = drift + diffusion
-        cum_log_returns = np.cumsum(log_returns, axis=1)
-
-        # 3. Generate paths
-        stock_paths = self.spot_price * np.exp(cum_log_returns)
-
-        for path in stock_paths:
-            price_max = np.max(path)
-            price_min = np.min(path)
-
-            if price_max >= self.upper_barrier:
-                # When knockout happens, calculate the rebate
-                knockout_index = np.argmax(path >= self.upper_barrier)
-                discount_factor = math.exp(-self.risk_free_rate * dt * knockout_index)
-                values.append(self.rebate * discount_factor)
-            elif price_min <= self.lower_barrier:
-                # When knockin happens, calculate the payoff
-                final_price = path[-1]
-                payoff = max(self.strike_price - final_price, 0)
-                values.append(math.exp(-self.risk_free_rate * self.maturity) * payoff)
-            else:
-                # No knockin or knockout, the payoff is zero
-                values.append(0)
+        with stage('kiko.payoff', num_paths):
+            values = self._discounted_payoffs(stock_paths, dt)
 
         # Calculate the mean and confidence interval
-        values = np.array(values)
-        price = np.mean(values)
-        std_dev = np.std(values)
-        conf_low = price - 1.96 * std_dev / math.sqrt(num_paths)
-        conf_high = price + 1.96 * std_dev / math.sqrt(num_paths)
+        with stage('kiko.statistics', num_paths):
+            price = np.mean(values)
+            std_dev = np.std(values)
+            conf_low = price - 1.96 * std_dev / math.sqrt(num_paths)
+            conf_high = price + 1.96 * std_dev / math.sqrt(num_paths)
+
+        return price, conf_low, conf_high
+
+    def price_grid(self, strike_prices=None, lower_barriers=None, upper_barriers=None, num_paths=100000, seed=1000, max_elements=2**22):
+        """
+        Price a grid of KIKO variants (strikes x lower barriers x upper barriers) from a single simulation.
+
+        The paths are those of price() with the same num_paths and seed, so every grid
+        point equals the price() of the corresponding option. Path statistics (running
+        maximum, minimum, first hit of each upper barrier) are computed once and all
+        variants are evaluated together.
+
+        :param strike_prices: Strikes of the grid (defaults to the option's strike)
+        :param lower_barriers: Lower barriers of the grid (defaults to the option's)
+        :param upper_barriers: Upper barriers of the grid (defaults to the option's)
+        :param max_elements: Bound on the number of path x (strike, lower barrier) values held at once
+        :return: Tuple (prices, conf_low, conf_high) of arrays of shape (strikes, lower barriers, upper barriers)
+        """
+        K = np.atleast_1d(np.asarray(self.strike_price if strike_prices is None else strike_prices, dtype=float))
+        L = np.atleast_1d(np.asarray(self.lower_barrier if lower_barriers is None else lower_barriers, dtype=float))
+        U = np.atleast_1d(np.asarray(self.upper_barrier if upper_barriers is None else upper_barriers, dtype=float))
+        dt = self.maturity / self.num_observations
+        stock_paths = self._simulate_paths(num_paths, seed)
+
+        with stage('kiko.payoff', num_paths):
+            # The running maximum is non-decreasing, so the first observation at or above U is
+            # the number of observations whose running maximum is still below U
+            running_max = np.maximum.accumulate(stock_paths, axis=1)
+            knocked_out = running_max[:, -1:] >= U
+            first_hit = np.stack([np.count_nonzero(running_max < u, axis=1) for u in U], axis=1)
+            rebate_values = np.where(knocked_out, self.rebate * discount_factor(self.risk_free_rate, dt * first_hit), 0.0)
+
+            knocked_in = np.min(stock_paths, axis=1)[:, None] <= L
+            put_values = discount_factor(self.risk_free_rate, self.maturity) * np.maximum(K - stock_paths[:, -1:], 0)
+
+        with stage('kiko.statistics', num_paths):
+            # A path pays either the rebate (knocked out) or the knocked-in put (alive), never both,
+            # so the first and second moments of every variant reduce to matrix products over the paths.
+            # The knocked-in put of every (strike, lower barrier) pair is built for a chunk of paths at a
+            # time, so memory stays bounded by max_elements whatever the size of the grid.
+            alive = (~knocked_out).astype(float)
+            mean = np.mean(rebate_values, axis=0)
+            second_moment = np.mean(rebate_values**2, axis=0)
+            chunk_size = max(1, max_elements // (len(K) * len(L)))
+            for start in range(0, num_paths, chunk_size):
+                rows = slice(start, start + chunk_size)
+                knocked_in_puts = (put_values[rows, :, None] * knocked_in[rows, None, :]).reshape(-1, len(K) * len(L))
+                mean = mean + knocked_in_puts.T @ alive[rows] / num_paths
+                knocked_in_puts **= 2
+                second_moment = second_moment + knocked_in_puts.T @ alive[rows] / num_paths
+            std_dev = np.sqrt(np.maximum(second_moment - mean**2, 0))
+
+            shape = (len(K), len(L), len(U))
+            prices = mean.reshape(shape)
+            half_width = (1.96 * std_dev / math.sqrt(num_paths)).reshape(shape)
+
+        return prices, prices - half_width, prices + half_width
+
+    def price_importance_sampling(self, num_paths=100000, seed=1000, tilt='optimal', pilot_paths=4096):
+        """
+        Calculate the price of the KIKO option with importance sampling towards the lower barrier.
+
+        Every standard normal of the Sobol points is shifted by the same tilt, which
+        moves the paths down when the tilt is negative (exponential change of measure),
+        and each payoff is weighted by the likelihood ratio
+            exp(-tilt * sum(Z) - num_observations * tilt^2 / 2)
+        of the original to the tilted measure, so the estimator stays unbiased. This is
+        useful when the lower barrier is far below the spot and few paths knock in.
+
+        :param num_paths: Number of simulated paths
+        :param seed: Seed of the scrambled Sobol sequence
+        :param tilt: Shift of every standard normal, or 'optimal' to use optimal_tilt()
+        :param pilot_paths: Number of pilot paths used by optimal_tilt()
+        :return: Tuple (price, conf_low, conf_high)
+        """
+        if tilt == 'optimal':
+            tilt = self.optimal_tilt(pilot_paths, seed + 1)
+        dt = self.maturity / self.num_observations
+        Z = self._sobol_normals(num_paths, seed)
+        stock_paths = self._build_paths(Z + tilt)
+
+        with stage('kiko.payoff', num_paths):
+            likelihood_ratios = np.exp(-tilt * np.sum(Z, axis=1) - 0.5 * self.num_observations * tilt**2)
+            values = self._discounted_payoffs(stock_paths, dt) * likelihood_ratios
+
+        with stage('kiko.statistics', num_paths):
+            price = np.mean(values)
+            std_dev = np.std(values)
+            conf_low = price - 1.96 * std_dev / math.sqrt(num_paths)
+            conf_high = price + 1.96 * std_dev / math.sqrt(num_paths)
 
         return price, conf_low, conf_high
 
+    def optimal_tilt(self, pilot_paths=4096, seed=1001):
+        """
+        Tilt of the standard normals that minimizes the variance of price_importance_sampling().
+
+        A pilot simulation is run with the tilt that brings the mean terminal log-price
+        to the lower barrier. The second moment of the weighted payoff under any other
+        tilt is then an explicit function of the pilot paths, and its minimum is found
+        with a one-dimensional search.
+
+        :param pilot_paths: Number of pilot paths
+        :param seed: Seed of the pilot Sobol sequence
+        :return: Shift of every standard normal
+        """
+        m = self.num_observations
+        drift, step_diffusion = step_drift_diffusion(self.risk_free_rate, self.volatility, self.maturity, m)
+        pilot_tilt = (math.log(self.lower_barrier / self.spot_price) - np.sum(drift)) / np.sum(step_diffusion)
+
+        X = self._sobol_normals(pilot_paths, seed) + pilot_tilt
+        payoffs = self._discounted_payoffs(self._build_paths(X), self.maturity / m)
+        paying = payoffs > 0
+        if not np.any(paying):
+            return float(pilot_tilt)
+
+        # E[(f L_theta)^2] under the tilt theta, estimated from paths drawn under the pilot tilt
+        log_payoffs = 2 * np.log(payoffs[paying])
+        sum_X = np.sum(X[paying], axis=1)
+        pilot_log_ratio = -pilot_tilt * sum_X + 0.5 * m * pilot_tilt**2
+
+        def log_second_moment(theta):
+            return logsumexp(log_payoffs + pilot_log_ratio - theta * sum_X + 0.5 * m * theta**2)
+
+        bound = max(abs(pilot_tilt), 1.0)
+        result = minimize_scalar(log_second_moment, bounds=(pilot_tilt - bound, pilot_tilt + bound), method='bounded')
+        return float(result.x)
+
+    def _simulate_paths(self, num_paths, seed):
+        """
+        Simulate the observed prices with a scrambled Sobol sequence.
+
+        :return: Array of simulated prices, one row per path and one column per observation
+        """
+        return self._build_paths(self._sobol_normals(num_paths, seed))
+
+    def _sobol_normals(self, num_paths, seed):
+        """
+        Standard normals from a scrambled Sobol sequence, one row per path and one column per observation.
+        """
+        np.random.seed(seed)
+
+        # 1. Create QMC sequence
+        with stage('kiko.rng', num_paths):
+            sequencer = qmc.Sobol(d=self.num_observations, seed=seed)
+            U = sequencer.random(n=num_paths)
+        with stage('kiko.ppf', num_paths):
+            return norm.ppf(U)  # Standard normalize samples
+
+    def _build_paths(self, Z):
+        """
+        Observed prices driven by the standard normals Z.
+
+        :param Z: Standard normals, one row per path and one column per observation
+        :return: Array of simulated prices of the same shape
+        """
+        # 2. Construct stock log-returns (per-step drift and diffusion are shared across trades on the same curves)
+        with stage('kiko.paths', len(Z)):
+            drift, step_diffusion = step_drift_diffusion(self.risk_free_rate, self.volatility, self.maturity, self.num_observations)
+            diffusion = step_diffusion * Z
+            log_returns = drift + diffusion
+            cum_log_returns = np.cumsum(log_returns, axis=1)
+
+            # 3. Generate paths
+            stock_paths = self.spot_price * np.exp(cum_log_returns)
+        return stock_paths
+
+    def _discounted_payoffs(self, stock_paths, dt):
+        """
+        Evaluate the discounted KIKO payoff of every path at once.
+
+        :param stock_paths: Array of simulated prices, one row per path and one column per observation
+        :param dt: Time between two observations
+        :return: Array of discounted payoffs, one per path
+        """
+        knocked_out = np.max(stock_paths, axis=1) >= self.upper_barrier
+        knocked_in = np.min(stock_paths, axis=1) <= self.lower_barrier
+
+        # When knockout happens, the rebate is paid at the first observation above the upper barrier
+        knockout_index = np.argmax(stock_paths >= self.upper_barrier, axis=1)
+        rebate_values = self.rebate * discount_factor(self.risk_free_rate, dt * knockout_index)
+
+        # When knockin happens (and no knockout), the holder receives the put payoff at maturity
+        put_values = discount_factor(self.risk_free_rate, self.maturity) * np.maximum(self.strike_price - stock_paths[:, -1], 0)
+
+        # No knockin or knockout, the payoff is zero
+        return np.where(knocked_out, rebate_values, np.where(knocked_in, put_values, 0.0))
+
     def calculate_delta(self, epsilon=1e-2, num_paths=1000, seed=1000):
         # Use two slightly different spot prices to estimate the price
         original_spot = self.spot_price
@@ -114,3 +274,15 @@ if __name__ == "__main__":
 
     print(f"KIKO Option Price: {price:.4f}, 95% CI: [{low:.4f}, {high:.4f}]")
     print(f"Delta: {delta:.4f}")
+
+    # Barrier ladder from a single simulation
+    prices, _, _ = option.price_grid(lower_barriers=np.linspace(70, 90, 5), upper_barriers=np.linspace(115, 135, 5))
+    print("Lower x upper barrier grid:")
+    print(np.round(prices[0], 4))
+
+    # Deep knock-in barrier: importance sampling towards the lower barrier
+    deep = KIKOOption(100, 0.05, 1.0, 100, 0.2, 60, 150, 24, 0.0)
+    price, low, high = deep.price(num_paths=2**16)
+    print(f"Deep barrier, plain Sobol:          {price:.5f}, 95% CI width {high - low:.5f}")
+    price, low, high = deep.price_importance_sampling(num_paths=2**16)
+    print(f"Deep barrier, importance sampling:  {price:.5f}, 95% CI width {high - low:.5f} (tilt {deep.optimal_tilt():.3f})")
@@ -1,5 +1,6 @@
 class Option:
-    
+    __slots__ = ('spot_price', 'risk_free_rate', 'maturity', 'strike_price', 'volatility')
+
     # Constructor: spot_price(float), risk_free_rate(float), maturity(float), strike_price(float)
     def __init__(self, spot_price: float, risk_free_rate: float, maturity: float, strike_price: float, volatility: float = 0.0):
         self.spot_price = spot_price
@@ -0,0 +1,212 @@
+import concurrent.futures
+import csv
+
+from service.pricing_service import VECTORIZED_PRODUCTS, POOLED_PRODUCTS, batch_key, price_batch, price_single
+
+# Types of the CSV columns; every other column is a float
+INT_FIELDS = ('num_steps', 'num_observations', 'num_paths', 'seed')
+BOOL_FIELDS = ('use_control_variate',)
+STR_FIELDS = ('option_type', 'control_variate')
+# Basket columns hold one value per asset, separated by semicolons (e.g. "100;105")
+LIST_FIELDS = ('spot_prices', 'volatilities')
+
+
+def parse_value(name: str, text: str):
+    """
+    Convert one CSV cell to the type expected by the option classes.
+    """
+    text = text.strip()
+    if name in STR_FIELDS:
+        return text
+    if name in INT_FIELDS:
+        return int(float(text))
+    if name in BOOL_FIELDS:
+        return text.lower() in ('1', 'true', 'yes', 'y')
+    if name in LIST_FIELDS:
+        return [float(x) for x in text.split(';') if x.strip()]
+    return float(text)
+
+
+def parse_row(row):
+    """
+    Convert the parameter cells of one CSV row, skipping empty cells.
+
+    :raises ValueError: If a cell cannot be converted (the message names its column) or the row has extra cells
+    """
+    if None in row:
+        raise ValueError(f"{len(row[None])} more cells than columns")
+    params = {}
+    for name, value in row.items():
+        if name == 'product' or value is None or value.strip() == '':
+            continue
+        try:
+            params[name] = parse_value(name, value)
+        except ValueError as e:
+            raise ValueError(f"column '{name}': {e}") from e
+    return params
+
+
+def load_trades(filename: str):
+    """
+    Read a CSV of mixed trades.
+
+    The file needs a 'product' column (european, american, geometric_asian, arithmetic_asian,
+    geometric_basket, arithmetic_basket, kiko, implied_volatility) and one column per parameter,
+    named as in the option constructors. Cells a product does not use are left empty.
+
+    A row that cannot be parsed does not stop the load: its params are {'error': message}
+    and BatchPricer reports that error as the row's result.
+
+    :return: Tuple (header, trades) where trades is a list of (product, params, raw row)
+    :raises ValueError: If the file has no 'product' column
+    """
+    with open(filename, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        header = reader.fieldnames
+        if 'product' not in (header or []):
+            raise ValueError("The file has no 'product' column")
+        trades = []
+        for row in reader:
+            product = (row['product'] or '').strip()
+            try:
+                params = parse_row(row)
+            except ValueError as e:
+                params = {'error': f"Invalid row (line {reader.line_num}): {e}"}
+            trades.append((product, params, row))
+    return header, trades
+
+
+class BatchPricer:
+
+    def __init__(self, max_workers: int = None, chunk_size: int = 5000):
+        """
+        Prices a list of mixed trades: closed-form and tree products in vectorized chunks,
+        Monte Carlo products and implied volatilities in a pool of worker processes.
+
+        :param max_workers: Size of the worker pool (defaults to the number of CPUs)
+        :param chunk_size: Number of trades of one product priced per vectorized call
+        """
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+
+    def price(self, trades, on_results=None, is_cancelled=None):
+        """
+        Price the trades.
+
+        :param trades: List of (product, params, ...) tuples as returned by load_trades()
+        :param on_results: Called as on_results(indices, results) every time a group of trades is done
+        :param is_cancelled: Function returning True when the run must stop; unfinished trades stay None
+        :return: List with one result per trade: {'price': ..., 'conf_interval': [...]} or {'error': ...}
+        """
+        results = [None] * len(trades)
+        is_cancelled = is_cancelled or (lambda: False)
+
+        def report(indices, values):
+            for i, value in zip(indices, values):
+                results[i] = value
+            if on_results is not None:
+                on_results(indices, values)
+
+        groups, pooled = {}, []
+        for i, (product, params, *_) in enumerate(trades):
+            if 'error' in params:
+                # The row could not be parsed
+                report([i], [{'error': params['error']}])
+            elif product in VECTORIZED_PRODUCTS:
+                try:
+                    groups.setdefault(batch_key(product, params), []).append(i)
+                except (KeyError, TypeError) as e:
+                    report([i], [{'error': f"Invalid parameters: {e}"}])
+            elif product in POOLED_PRODUCTS:
+                pooled.append(i)
+            else:
+                report([i], [{'error': f"Unknown product '{product}'"}])
+
+        # Start the slow products first so the pool works while the vectorized chunks are priced
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers) if pooled else None
+        futures = {executor.submit(price_single, trades[i][0], trades[i][1]): i for i in pooled} if pooled else {}
+
+        try:
+            for key, indices in groups.items():
+                for start in range(0, len(indices), self.chunk_size):
+                    if is_cancelled():
+                        return results
+                    chunk = indices[start:start + self.chunk_size]
+                    report(chunk, self._price_chunk(key[0], [trades[i][1] for i in chunk]))
+
+            for future in concurrent.futures.as_completed(futures):
+                if is_cancelled():
+                    return results
+                try:
+                    value = future.result()
+                except Exception as e:
+                    value = {'error': f"{type(e).__name__}: {e}"}
+                report([futures[future]], [value])
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        return results
+
+    @staticmethod
+    def _price_chunk(product, params_list):
+        """
+        Price one vectorized chunk; if any trade is invalid, price them one by one to isolate it.
+        """
+        try:
+            return [{'price': price} for price in price_batch(product, params_list)]
+        except Exception:
+            values = []
+            for params in params_list:
+                try:
+                    values.append(price_single(product, params))
+                except Exception as e:
+                    values.append({'error': f"{type(e).__name__}: {e}"})
+            return values
+
+
+def export_results(filename: str, header, trades, results):
+    """
+    Write the trades with their price, confidence interval and error columns to a CSV file.
+    """
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(list(header) + ['price', 'conf_low', 'conf_high', 'error'])
+        for (_, _, row), result in zip(trades, results):
+            result = result or {'error': 'not priced'}
+            conf_interval = result.get('conf_interval', ['', ''])
+            writer.writerow([row.get(name, '') for name in header]
+                            + [result.get('price', ''), conf_interval[0], conf_interval[1], result.get('error', '')])
+
+
+# Example usage
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+
+    folder = tempfile.mkdtemp()
+    filename = os.path.join(folder, 'trades.csv')
+    columns = ['product', 'spot_price', 'spot_prices', 'risk_free_rate', 'maturity', 'strike_price', 'repo_rate', 'volatility',
+               'volatilities', 'correlation', 'num_steps', 'num_observations', 'num_paths', 'option_type',
+               'lower_barrier', 'upper_barrier', 'rebate']
+    with open(filename, 'w', newline='') as f:
+        writer = csv.DictWriter(f, columns)
+        writer.writeheader()
+        for i in range(100000):
+            writer.writerow({'product': 'european', 'spot_price': 100, 'risk_free_rate': 0.05, 'maturity': 1,
+                             'strike_price': 80 + i % 40, 'repo_rate': 0.0, 'volatility': 0.2, 'option_type': 'call'})
+        writer.writerow({'product': 'geometric_basket', 'spot_prices': '100;100', 'risk_free_rate': 0.05, 'maturity': 3,
+                         'strike_price': 100, 'volatilities': '0.3;0.3', 'correlation': 0.5, 'option_type': 'put'})
+        writer.writerow({'product': 'kiko', 'spot_price': 100, 'risk_free_rate': 0.05, 'maturity': 2, 'strike_price': 100,
+                         'volatility': 0.2, 'lower_barrier': 80, 'upper_barrier': 125, 'num_observations': 24, 'rebate': 1.5})
+        writer.writerow({'product': 'european', 'spot_price': 100, 'risk_free_rate': 0.05, 'maturity': 1,
+                         'strike_price': 100, 'repo_rate': 0.0, 'volatility': 0.2, 'option_type': 'straddle'})
+        writer.writerow({'product': 'european', 'spot_price': 100, 'risk_free_rate': 0.05, 'maturity': '1y',
+                         'strike_price': 100, 'repo_rate': 0.0, 'volatility': 0.2, 'option_type': 'call'})
+
+    start = time.perf_counter()
+    header, trades = load_trades(filename)
+    results = BatchPricer().price(trades, on_results=lambda indices, values: None)
+    print(f"Loaded and priced {len(trades)} trades in {time.perf_counter() - start:.2f} s")
+    print(results[0], results[-4], results[-3], results[-2], results[-1], sep="\n")
+    export_results(os.path.join(folder, 'results.csv'), header, trades, results)
@@ -0,0 +1,223 @@
+from options.basket_option import BasketOption
+
+
+class Portfolio:
+
+    def __init__(self, default_rate_curve: str = 'default', cache=None):
+        """
+        Constructor for Portfolio class.
+
+        Positions are indexed by the market data they depend on (spot of each
+        underlying, rate curve, volatility), so a market update only marks the
+        positions that actually use it as dirty. value() reprices the dirty
+        positions and reuses the cached value of all the others.
+
+        :param default_rate_curve: Name of the rate curve used when a position does not specify one
+        :param cache: Optional ResultCache; positions with unchanged inputs are then read from it instead of repriced
+        """
+        self.default_rate_curve = default_rate_curve
+        self.cache = cache
+        self.positions = {}
+        self.spots = {}
+        self.rates = {}
+        self.volatilities = {}
+        self._dependents = {}
+        self._values = {}
+        self._dirty = set()
+        self._total = 0.0
+        self._next_id = 0
+        self.last_repriced = 0
+
+    def add_position(self, option, underlyings, quantity: float = 1.0, rate_curve: str = None, vol_keys=None, pricing_kwargs=None):
+        """
+        Add a position to the portfolio.
+
+        Market data not yet known to the portfolio is seeded from the option
+        itself; market data already known overrides the option's inputs.
+
+        :param option: Option instance
+        :param underlyings: Name of the underlying, or list of names (one per asset) for basket options
+        :param quantity: Position size
+        :param rate_curve: Name of the rate curve used to discount the option
+        :param vol_keys: Name of the volatility (or list for baskets); defaults to the underlying names
+        :param pricing_kwargs: Optional keyword arguments forwarded to option.price()
+        :return: Identifier of the new position
+        """
+        underlyings = [underlyings] if isinstance(underlyings, str) else list(underlyings)
+        vol_keys = underlyings if vol_keys is None else ([vol_keys] if isinstance(vol_keys, str) else list(vol_keys))
+        rate_curve = self.default_rate_curve if rate_curve is None else rate_curve
+
+        if isinstance(option, BasketOption):
+            if not len(underlyings) == len(vol_keys) == len(option.spot_prices):
+                raise ValueError("A basket position needs one underlying and one vol key per asset")
+            spots, vols = option.spot_prices, option.volatilities
+        else:
+            if not len(underlyings) == len(vol_keys) == 1:
+                raise ValueError("A single-asset position needs exactly one underlying and one vol key")
+            spots, vols = [option.spot_price], [option.volatility]
+
+        # Seed the market data this position brings with it
+        for name, spot in zip(underlyings, spots):
+            self.spots.setdefault(name, spot)
+        for key, vol in zip(vol_keys, vols):
+            self.volatilities.setdefault(key, vol)
+        self.rates.setdefault(rate_curve, option.risk_free_rate)
+
+        position_id = self._next_id
+        self._next_id += 1
+        self.positions[position_id] = {
+            'option': option,
+            'quantity': quantity,
+            'underlyings': underlyings,
+            'vol_keys': vol_keys,
+            'rate_curve': rate_curve,
+            'pricing_kwargs': pricing_kwargs or {},
+        }
+        for dependency in self._dependencies(position_id):
+            self._dependents.setdefault(dependency, set()).add(position_id)
+        self._dirty.add(position_id)
+        return position_id
+
+    def remove_position(self, position_id):
+        """
+        Remove a position from the portfolio.
+
+        :param position_id: Identifier returned by add_position()
+        """
+        for dependency in self._dependencies(position_id):
+            self._dependents[dependency].discard(position_id)
+        position = self.positions.pop(position_id)
+        if position_id in self._values:
+            self._total -= position['quantity'] * self._values.pop(position_id)
+        self._dirty.discard(position_id)
+
+    def _dependencies(self, position_id):
+        """
+        Market data keys a position depends on.
+        """
+        position = self.positions[position_id]
+        return ([('spot', name) for name in position['underlyings']]
+                + [('vol', key) for key in position['vol_keys']]
+                + [('rate', position['rate_curve'])])
+
+    def _update(self, store, kind, key, value):
+        """
+        Store a market data value and mark the positions depending on it as dirty if it changed.
+        """
+        if store.get(key) == value:
+            return
+        store[key] = value
+        self._dirty.update(self._dependents.get((kind, key), ()))
+
+    def set_spot(self, underlying: str, spot_price: float):
+        """
+        Update the spot price of one underlying.
+        """
+        self._update(self.spots, 'spot', underlying, spot_price)
+
+    def set_rate(self, rate_curve: str, risk_free_rate: float):
+        """
+        Update the risk-free rate of one rate curve.
+        """
+        self._update(self.rates, 'rate', rate_curve, risk_free_rate)
+
+    def set_volatility(self, vol_key: str, volatility: float):
+        """
+        Update one volatility.
+        """
+        self._update(self.volatilities, 'vol', vol_key, volatility)
+
+    def mark_dirty(self, position_id):
+        """
+        Mark a position to be repriced by the next valuation.
+
+        Needed after changing the option itself rather than market data, e.g. after
+        ageing its maturity or adding a fixing to a seasoned Asian option.
+
+        :param position_id: Identifier returned by add_position()
+        """
+        if position_id not in self.positions:
+            raise KeyError(f"Unknown position {position_id}")
+        self._dirty.add(position_id)
+
+    def add_fixing(self, position_id, fixing: float, maturity: float = None):
+        """
+        Record a fixing on the Asian option of a position and mark the position dirty.
+
+        :param position_id: Identifier returned by add_position()
+        :param fixing: Observed price of the underlying
+        :param maturity: New time to maturity, forwarded to add_fixing() of the option
+        """
+        self.positions[position_id]['option'].add_fixing(fixing, maturity)
+        self.mark_dirty(position_id)
+
+    @property
+    def dirty_positions(self):
+        """
+        Identifiers of the positions that will be repriced by the next valuation.
+        """
+        return set(self._dirty)
+
+    def _apply_market_data(self, position):
+        """
+        Copy the current market data into the option of a position.
+        """
+        option = position['option']
+        spots = [self.spots[name] for name in position['underlyings']]
+        vols = [self.volatilities[key] for key in position['vol_keys']]
+        if isinstance(option, BasketOption):
+            option.spot_prices = spots
+            option.spot_price = spots[0]
+            option.volatilities = vols
+        else:
+            option.spot_price = spots[0]
+            option.volatility = vols[0]
+        option.risk_free_rate = self.rates[position['rate_curve']]
+
+    def position_value(self, position_id):
+        """
+        Value of one unit of a position (after the last valuation).
+        """
+        return self._values[position_id]
+
+    def value(self):
+        """
+        Reprice the dirty positions and return the total value of the portfolio.
+
+        :return: Sum of quantity * price over all positions
+        """
+        for position_id in self._dirty:
+            position = self.positions[position_id]
+            self._apply_market_data(position)
+            if self.cache is None:
+                result = position['option'].price(**position['pricing_kwargs'])
+            else:
+                result = self.cache.price(position['option'], **position['pricing_kwargs'])
+            # Monte Carlo products return the price together with its confidence interval
+            price = float(result[0] if isinstance(result, tuple) else result)
+
+            old_price = self._values.get(position_id, 0.0)
+            self._total += position['quantity'] * (price - old_price)
+            self._values[position_id] = price
+
+        self.last_repriced = len(self._dirty)
+        self._dirty.clear()
+        return self._total
+
+
+# Example usage
+if __name__ == "__main__":
+    from options.european_option import EuropeanOption
+    from options.basket_option import GeometricBasketOption
+
+    portfolio = Portfolio()
+    for i in range(1000):
+        underlying = f"STOCK{i % 200}"
+        portfolio.add_position(EuropeanOption(100, 0.05, 1, 90 + i % 20, 0.0, 0.25, 'call'), underlying, quantity=10)
+    portfolio.add_position(GeometricBasketOption([100, 100], 0.05, 1, 100, [0.25, 0.25], 0.5), ["STOCK0", "STOCK1"])
+
+    print("Initial value:", portfolio.value(), "repriced:", portfolio.last_repriced)
+    portfolio.set_spot("STOCK0", 101)
+    print("After STOCK0 tick:", portfolio.value(), "repriced:", portfolio.last_repriced)
+    portfolio.set_rate("default", 0.04)
+    print("After rate move:", portfolio.value(), "repriced:", portfolio.last_repriced)
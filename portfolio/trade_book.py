@@ -0,0 +1,297 @@
+import numpy as np
+
+from options.american_option import AmericanOption
+from options.asian_option import GeometricAsianOption, ArithmeticAsianOption
+from options.basket_option import GeometricBasketOption, ArithmeticBasketOption
+from options.european_option import EuropeanOption
+from options.kiko_option import KIKOOption
+from pricer.binomial_tree_pricer import BiniomialTreePricer
+from pricer.closed_form_pricer import ClosedFormPricer
+
+# Column layout of every product table, in the order of the option class constructor arguments.
+# Basket tables get their spot_prices and volatilities columns sized to the number of assets.
+# Asian tables end with the fixing state of seasoned trades (see SEASONING_FIELDS).
+# The option type is stored as a one-byte call flag, is_call, in place of the 'call' / 'put' string.
+PRODUCTS = {
+    'european': (EuropeanOption, [('spot_price', 'f8'), ('risk_free_rate', 'f8'), ('maturity', 'f8'), ('strike_price', 'f8'),
+                                  ('repo_rate', 'f8'), ('volatility', 'f8'), ('is_call', '?')]),
+    'american': (AmericanOption, [('spot_price', 'f8'), ('risk_free_rate', 'f8'), ('maturity', 'f8'), ('strike_price', 'f8'),
+                                  ('volatility', 'f8'), ('num_steps', 'i4'), ('is_call', '?')]),
+    'geometric_asian': (GeometricAsianOption, [('spot_price', 'f8'), ('risk_free_rate', 'f8'), ('maturity', 'f8'), ('strike_price', 'f8'),
+                                               ('volatility', 'f8'), ('num_observations', 'i4'), ('is_call', '?'),
+                                               ('num_fixed', 'i4'), ('fixed_sum', 'f8'), ('fixed_log_sum', 'f8')]),
+    'arithmetic_asian': (ArithmeticAsianOption, [('spot_price', 'f8'), ('risk_free_rate', 'f8'), ('maturity', 'f8'), ('strike_price', 'f8'),
+                                                 ('volatility', 'f8'), ('num_observations', 'i4'), ('num_paths', 'i4'),
+                                                 ('use_control_variate', '?'), ('is_call', '?'),
+                                                 ('num_fixed', 'i4'), ('fixed_sum', 'f8'), ('fixed_log_sum', 'f8')]),
+    'geometric_basket': (GeometricBasketOption, [('spot_prices', 'f8'), ('risk_free_rate', 'f8'), ('maturity', 'f8'), ('strike_price', 'f8'),
+                                                 ('volatilities', 'f8'), ('correlation', 'f8'), ('is_call', '?')]),
+    'arithmetic_basket': (ArithmeticBasketOption, [('spot_prices', 'f8'), ('risk_free_rate', 'f8'), ('maturity', 'f8'), ('strike_price', 'f8'),
+                                                   ('volatilities', 'f8'), ('correlation', 'f8'), ('is_call', '?'),
+                                                   ('num_paths', 'i4'), ('control_variate', 'U9')]),
+    'kiko': (KIKOOption, [('spot_price', 'f8'), ('risk_free_rate', 'f8'), ('maturity', 'f8'), ('strike_price', 'f8'), ('volatility', 'f8'),
+                          ('lower_barrier', 'f8'), ('upper_barrier', 'f8'), ('num_observations', 'i4'), ('rebate', 'f8')]),
+}
+BASKET_FIELDS = ('spot_prices', 'volatilities')
+# Running state of the fixings of seasoned Asian trades: not constructor arguments, zero for a new trade
+SEASONING_FIELDS = ('num_fixed', 'fixed_sum', 'fixed_log_sum')
+# Option attributes stored under another column name
+ATTRIBUTES = {'is_call': 'option_type'}
+
+
+def product_dtype(product: str, num_assets: int = 2):
+    """
+    Structured dtype of a product table: the option parameters followed by the position quantity.
+    """
+    _, fields = PRODUCTS[product]
+    return np.dtype([(name, kind, (num_assets,)) if name in BASKET_FIELDS else (name, kind) for name, kind in fields]
+                    + [('quantity', 'f8')])
+
+
+class TradeTable:
+
+    def __init__(self, product: str, data):
+        """
+        Trades of one product type stored column-wise in a NumPy structured array.
+
+        Columns and slices are views of the same memory; only boolean or index
+        selections copy (the selected rows only).
+
+        :param product: Key of PRODUCTS
+        :param data: Structured array (or memory map) with the dtype of product_dtype()
+        """
+        self.product = product
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, item):
+        """
+        A column (by name) or a sub-table (by slice, boolean mask or index array).
+        """
+        if isinstance(item, str):
+            return self.data[item]
+        return TradeTable(self.product, self.data[item])
+
+    @property
+    def fields(self):
+        return self.data.dtype.names
+
+    def option(self, index: int):
+        """
+        Build the Option instance of one trade (for the single-trade path).
+        """
+        option_class, fields = PRODUCTS[self.product]
+        row = self.data[index]
+        option = option_class(*(('call' if row[name] else 'put') if name == 'is_call' else row[name].tolist()
+                                for name, _ in fields if name not in SEASONING_FIELDS))
+        for name in SEASONING_FIELDS:
+            if name in row.dtype.names:
+                setattr(option, name, row[name].tolist())
+        return option
+
+    def price(self):
+        """
+        Unit price of every trade, vectorized for the closed-form and tree products.
+
+        Monte Carlo products are priced one trade at a time.
+
+        :return: Array of prices, one per trade
+        """
+        data, pricer = self.data, ClosedFormPricer()
+        if self.product == 'european':
+            return np.asarray(pricer.european(data['spot_price'], data['risk_free_rate'], data['maturity'], data['strike_price'],
+                                              data['repo_rate'], data['volatility'], data['is_call']), dtype=float)
+        if self.product == 'geometric_asian':
+            prices = np.empty(len(data))
+            # Once every observation is fixed the average is known and the payoff is only discounted
+            done = data['num_fixed'] >= data['num_observations']
+            rows = data[done]
+            sign = np.where(rows['is_call'], 1.0, -1.0)
+            prices[done] = np.exp(-rows['risk_free_rate'] * rows['maturity']) * np.maximum(
+                sign * (np.exp(rows['fixed_log_sum'] / rows['num_observations']) - rows['strike_price']), 0)
+            rows = data[~done]
+            prices[~done] = pricer.geometric_asian(rows['spot_price'], rows['risk_free_rate'], rows['maturity'], rows['strike_price'],
+                                                   rows['volatility'], rows['num_observations'], rows['is_call'],
+                                                   rows['num_fixed'], rows['fixed_log_sum'])
+            return prices
+        if self.product == 'geometric_basket':
+            return np.asarray(pricer.geometric_basket(data['spot_prices'], data['risk_free_rate'], data['maturity'], data['strike_price'],
+                                                      data['volatilities'], data['correlation'], data['is_call']), dtype=float)
+        if self.product == 'american':
+            # The tree depth is a loop bound, so trees are rolled back together per number of steps
+            prices = np.empty(len(data))
+            for num_steps in np.unique(data['num_steps']):
+                index = np.flatnonzero(data['num_steps'] == num_steps)
+                rows = data[index]
+                prices[index] = BiniomialTreePricer().price(rows['is_call'], rows['spot_price'], rows['risk_free_rate'],
+                                                            rows['maturity'], rows['strike_price'], int(num_steps), rows['volatility'])
+            return prices
+
+        prices = np.empty(len(data))
+        for i in range(len(data)):
+            result = self.option(i).price()
+            prices[i] = result[0] if isinstance(result, tuple) else result
+        return prices
+
+    def value(self):
+        """
+        Total value of the table: sum of quantity * price.
+        """
+        return float(np.dot(self.data['quantity'], self.price()))
+
+    def save(self, filename: str):
+        """
+        Save the table as a .npy file (reload it memory-mapped with TradeBook.load()).
+        """
+        np.save(filename, self.data)
+
+
+class TradeBook:
+
+    def __init__(self):
+        """
+        Columnar trade book: one TradeTable per product type instead of one Option object per trade.
+        """
+        self.tables = {}
+
+    def __getitem__(self, product: str):
+        return self.tables[product]
+
+    def __len__(self):
+        return sum(len(table) for table in self.tables.values())
+
+    def add_table(self, product: str, data):
+        """
+        Add (or append to) the table of one product.
+
+        :param product: Key of PRODUCTS
+        :param data: Structured array with the dtype of product_dtype(product)
+        :return: The product's TradeTable
+        """
+        if product not in PRODUCTS:
+            raise ValueError(f"Unknown product '{product}'")
+        if product in self.tables:
+            data = np.concatenate([self.tables[product].data, data])
+        self.tables[product] = TradeTable(product, data)
+        return self.tables[product]
+
+    def add_columns(self, product: str, quantity=1.0, **columns):
+        """
+        Add trades of one product from one array (or scalar) per field, broadcast together.
+
+        The option type can be given as option_type ('call' / 'put' strings) or directly as the is_call flag.
+
+        Example:
+            book.add_columns('european', spot_price=100, risk_free_rate=0.05, maturity=1, strike_price=strikes,
+                             repo_rate=0.0, volatility=0.2, option_type='call')
+        """
+        _, fields = PRODUCTS[product]
+        if 'option_type' in columns:
+            columns['is_call'] = columns.pop('option_type')
+        if 'is_call' in columns:
+            # Strings go through the call mask, so a 'put' never ends up as a truthy flag
+            columns['is_call'] = ClosedFormPricer.call_mask(columns['is_call'])
+        for name in SEASONING_FIELDS:
+            if any(field == name for field, _ in fields):
+                columns.setdefault(name, 0)
+        missing = [name for name, _ in fields if name not in columns]
+        if missing:
+            raise ValueError(f"Missing columns for '{product}': {', '.join(missing)}")
+        num_assets = np.shape(columns['spot_prices'])[-1] if product.endswith('basket') else 2
+        per_trade = [np.asarray(columns[name]) if name not in BASKET_FIELDS else np.asarray(columns[name])[..., 0]
+                     for name, _ in fields] + [np.asarray(quantity)]
+        num_trades = np.broadcast(*per_trade).size
+        data = np.empty(num_trades, dtype=product_dtype(product, num_assets))
+        for name, _ in fields:
+            data[name] = columns[name]
+        data['quantity'] = quantity
+        return self.add_table(product, data)
+
+    def add_options(self, options, quantities=None):
+        """
+        Add trades from existing Option instances.
+        """
+        quantities = np.ones(len(options)) if quantities is None else quantities
+        by_product = {}
+        for option, quantity in zip(options, quantities):
+            product = next(name for name, (option_class, _) in PRODUCTS.items() if type(option) is option_class)
+            by_product.setdefault(product, []).append((option, quantity))
+        for product, entries in by_product.items():
+            _, fields = PRODUCTS[product]
+            self.add_columns(product, quantity=[q for _, q in entries],
+                             **{ATTRIBUTES.get(name, name): [getattr(option, ATTRIBUTES.get(name, name)) for option, _ in entries]
+                                for name, _ in fields})
+
+    @staticmethod
+    def _read(filename: str):
+        """
+        Read a table file: .npy files are memory-mapped, .csv files need a header row with the field names.
+        """
+        if filename.endswith('.npy'):
+            return np.load(filename, mmap_mode='r')
+        return np.genfromtxt(filename, delimiter=',', names=True, dtype=None, encoding='utf-8')
+
+    def load(self, product: str, filename: str):
+        """
+        Load the table of one product from a .npy file (memory-mapped, no copy) or a .csv file.
+
+        A CSV basket file names its asset columns spot_prices_0, spot_prices_1, ... and volatilities_0, ...
+
+        :return: The product's TradeTable
+        """
+        data = self._read(filename)
+        if filename.endswith('.npy'):
+            return self.add_table(product, data)
+        columns = {name: data[name] for name in data.dtype.names}
+        for name in BASKET_FIELDS:
+            assets = sorted((c for c in columns if c.startswith(name + '_')), key=lambda c: int(c.rsplit('_', 1)[1]))
+            if assets:
+                columns[name] = np.stack([columns.pop(c) for c in assets], axis=-1)
+        return self.add_columns(product, quantity=columns.pop('quantity', 1.0), **columns)
+
+    def price(self):
+        """
+        Unit prices of every trade, per product.
+        """
+        return {product: table.price() for product, table in self.tables.items()}
+
+    def value(self):
+        """
+        Total value of the book.
+        """
+        return sum(table.value() for table in self.tables.values())
+
+    def nbytes(self):
+        """
+        Memory used by the trade data.
+        """
+        return sum(table.data.nbytes for table in self.tables.values())
+
+
+# Example usage
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+
+    num_trades = 1000000
+    rng = np.random.default_rng(0)
+    book = TradeBook()
+    start = time.perf_counter()
+    book.add_columns('european', spot_price=100, risk_free_rate=0.05, maturity=rng.uniform(0.1, 3, num_trades),
+                     strike_price=rng.uniform(80, 120, num_trades), repo_rate=0.0, volatility=rng.uniform(0.1, 0.5, num_trades),
+                     option_type=np.where(rng.random(num_trades) < 0.5, 'call', 'put'), quantity=rng.integers(1, 100, num_trades))
+    print(f"Built {len(book)} trades in {time.perf_counter() - start:.2f} s, {book.nbytes() / num_trades:.0f} bytes per trade")
+
+    # Memory of the same trades as Option objects, including the Python floats they point to (measured on a sample)
+    tracemalloc.start()
+    sample = [book['european'].option(i) for i in range(10000)]
+    print(f"As Option objects: {tracemalloc.get_traced_memory()[0] / len(sample):.0f} bytes per trade with their values")
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    print(f"Book value: {book.value():.2f} in {time.perf_counter() - start:.2f} s")
+    calls = book['european'][book['european']['is_call']]
+    print(f"{len(calls)} calls, value {calls.value():.2f}")
+    print("Slice shares memory with the book:", np.shares_memory(book['european'][:1000].data, book['european'].data))
@@ -1,3 +1,22 @@
+import functools
+
+import numpy as np
+from pricer.closed_form_pricer import ClosedFormPricer
+
+
+@functools.lru_cache(maxsize=32)
+def terminal_exponents(num_steps: int):
+    """
+    Net number of up moves N - 2j of every terminal node, shared by all trees with num_steps steps.
+
+    The terminal prices are S0 * exp(sigma * sqrt(dt) * exponents), so the lattice
+    structure does not depend on the volatility and is reused across iterations and strikes.
+    """
+    exponents = num_steps - 2.0 * np.arange(num_steps + 1)
+    exponents.setflags(write=False)
+    return exponents
+
+
 class BiniomialTreePricer:
 
     def __init__(self):
@@ -6,11 +25,105 @@ class BiniomialTreePricer:
         """
         pass
 
-    def price(self, option_type, spot_price, risk_free_rate, maturity, strike_price, num_steps):
+    def price(self, option_type, spot_price, risk_free_rate, maturity, strike_price, num_steps, volatility):
         """
         Calculate the option price using the binomial tree method.
+
+        Every argument except num_steps may be an array; the trees of the whole
+        batch are rolled back together, one vectorized step at a time.
+
+        :param option_type: Type of the option ('call' or 'put')
+        :param spot_price: Current price of the underlying asset
+        :param risk_free_rate: Risk-free interest rate
+        :param maturity: Time to maturity in years
+        :param strike_price: Strike price of the option
+        :param num_steps: Number of steps in the binomial tree
+        :param volatility: Volatility of the underlying asset
+        :return: Price of the option(s)
+        """
+        option_values, _ = self._rollback(option_type, spot_price, risk_free_rate, maturity, strike_price, num_steps, volatility)
+        return ClosedFormPricer._scalar_or_array(option_values[..., 0])
+
+    def greeks(self, option_type, spot_price, risk_free_rate, maturity, strike_price, num_steps, volatility, epsilon=1e-4):
         """
+        Price, delta, gamma and theta from the nodes of one rollback; vega and rho from bumped trees.
+
+        Delta and gamma are the finite differences between the nodes at steps 1
+        and 2, and theta compares the middle node of step 2 (same spot, 2 dt
+        later) with the root. The four bumped trees of vega and rho share the
+        cached lattice layout and are rolled back together in one vectorized pass.
+        Arguments may be arrays, as in price().
+
+        :param epsilon: Bump of the volatility and of the risk-free rate
+        :return: Dictionary with 'price', 'delta', 'gamma', 'theta', 'vega' and 'rho'
+        """
+        if num_steps < 3:
+            raise ValueError("Tree Greeks need at least 3 steps (delta and gamma are read from steps 1 and 2)")
+        option_values, (step1, step2) = self._rollback(option_type, spot_price, risk_free_rate, maturity, strike_price, num_steps, volatility)
+        S0, r, T, sigma = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (spot_price, risk_free_rate, maturity, volatility)))
+        dt = T / num_steps
+        u = np.exp(sigma * np.sqrt(dt))
+        d = 1 / u
+
+        delta = (step1[..., 0] - step1[..., 1]) / (S0 * u - S0 * d)
+        up_delta = (step2[..., 0] - step2[..., 1]) / (S0 * u**2 - S0)
+        down_delta = (step2[..., 1] - step2[..., 2]) / (S0 - S0 * d**2)
+        gamma = (up_delta - down_delta) / (0.5 * (S0 * u**2 - S0 * d**2))
+        theta = (step2[..., 1] - option_values[..., 0]) / (2 * dt)
+
+        # Bumped volatilities and rates, stacked on a leading axis and rolled back together
+        bumps = np.array([1.0, -1.0, 0.0, 0.0])[(...,) + (None,) * S0.ndim]
+        bumped, _ = self._rollback(option_type, spot_price, r + np.roll(bumps, 2, axis=0) * epsilon, maturity, strike_price,
+                                   num_steps, sigma + bumps * epsilon)
+        bumped = bumped[..., 0]
+        result = {
+            'price': option_values[..., 0],
+            'delta': delta,
+            'gamma': gamma,
+            'theta': theta,
+            'vega': (bumped[0] - bumped[1]) / (2 * epsilon),
+            'rho': (bumped[2] - bumped[3]) / (2 * epsilon),
+        }
+        return {name: ClosedFormPricer._scalar_or_array(value) for name, value in result.items()}
+
+    def _rollback(self, option_type, spot_price, risk_free_rate, maturity, strike_price, num_steps, volatility):
+        """
+        Roll the trees back to the root, exercising early wherever the intrinsic value exceeds the continuation value.
+
+        :return: Tuple of the root values (last axis of length 1) and the node values of steps 1 and 2
+        """
+        is_call = ClosedFormPricer.call_mask(option_type)
+        S0, r, T, K, sigma = np.broadcast_arrays(
+            *(np.asarray(x, dtype=float) for x in (spot_price, risk_free_rate, maturity, strike_price, volatility))
+        )
+        N = num_steps
+
+        # Calculate parameters for the binomial tree
+        dt = T / N  # time step
+        u = np.exp(sigma * np.sqrt(dt))  # up factor
+        d = 1 / u  # down factor
+        p = (np.exp(r * dt) - d) / (u - d)  # risk-neutral probability
+        discount = np.exp(-r * dt)
+
+        # Initialize asset prices at maturity
+        log_step = (sigma * np.sqrt(dt))[..., None]
+        ST = S0[..., None] * np.exp(log_step * terminal_exponents(N))
+
+        # Initialize option values at maturity
+        sign = np.where(is_call, 1.0, -1.0)[..., None]
+        option_values = np.maximum(0, sign * (ST - K[..., None]))
+
+        # Backward induction to calculate option price at t=0
+        # (only the i + 1 live nodes of step i are computed, with the discounting folded into the probabilities)
+        up, down = (p * discount)[..., None], ((1 - p) * discount)[..., None]
+        layers = {}
+        for i in range(N - 1, -1, -1):
+            continuation = up * option_values[..., :i + 1] + down * option_values[..., 1:i + 2]
+            # Early exercise: the node prices of step i are the top i + 1 terminal prices moved N - i steps down
+            intrinsic = sign * (ST[..., :i + 1] * np.exp(-log_step * (N - i)) - K[..., None])
+            option_values = np.maximum(continuation, intrinsic)
+            if i in (1, 2):
+                layers[i] = option_values
 
-        # Implementation of the binomial tree method for option pricing
+        return option_values, (layers.get(1), layers.get(2))
 
-        pass
\ No newline at end of file
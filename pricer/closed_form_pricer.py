@@ -0,0 +1,407 @@
+import numpy as np
+from scipy.stats import norm
+
+
+class ClosedFormPricer:
+
+    def __init__(self):
+        """
+        Constructor for ClosedFormPricer class.
+
+        All methods broadcast over NumPy arrays, so a whole batch of contracts
+        (or a whole grid of scenarios) is priced in one call.
+        """
+        pass
+
+    @staticmethod
+    def call_mask(option_type):
+        """
+        Convert an option type (or an array of them) into a boolean call mask.
+
+        :param option_type: 'call', 'put', an array of these strings, or a boolean call flag (returned as is)
+        :return: Boolean array, True where the option is a call
+        """
+        option_type = np.asarray(option_type)
+        if option_type.dtype == bool:
+            return option_type
+        is_call = np.asarray(option_type == 'call')
+        if not np.all(is_call | (option_type == 'put')):
+            raise ValueError("option_type must be 'call' or 'put'")
+        return is_call
+
+    @staticmethod
+    def _scalar_or_array(value):
+        """
+        Return a Python-style scalar for 0-d results so single-trade callers keep getting numbers.
+        """
+        value = np.asarray(value)
+        return value[()] if value.ndim == 0 else value
+
+    def lognormal(self, mean_log, var_log, strike_price, discount_factor, option_type='call'):
+        """
+        Price of options on a lognormal quantity X with E[log X] = mean_log and Var[log X] = var_log.
+
+        :param mean_log: Mean of log X
+        :param var_log: Variance of log X
+        :param strike_price: Strike price of the option
+        :param discount_factor: Discount factor from the payment date to today
+        :param option_type: Type of the option ('call' or 'put')
+        :return: Price of the option(s)
+        """
+        K = strike_price
+        is_call = self.call_mask(option_type)
+        std_log = np.sqrt(var_log)
+        forward = np.exp(mean_log + 0.5 * var_log)
+
+        d1 = (mean_log - np.log(K) + var_log) / std_log
+        d2 = d1 - std_log
+
+        call = discount_factor * (forward * norm.cdf(d1) - K * norm.cdf(d2))
+        put = discount_factor * (K * norm.cdf(-d2) - forward * norm.cdf(-d1))
+        return self._scalar_or_array(np.where(is_call, call, put))
+
+    def _black(self, forward, std, strike_price, discount_factor, is_call):
+        """
+        Black formula on a lognormal quantity and its derivatives in the forward and the total standard deviation.
+
+        :return: Tuple (price, d price / d forward, d2 price / d forward2, d price / d std)
+        """
+        F, v, K, D = forward, std, strike_price, discount_factor
+        d1 = (np.log(F / K) + 0.5 * v**2) / v
+        d2 = d1 - v
+        call = D * (F * norm.cdf(d1) - K * norm.cdf(d2))
+        put = D * (K * norm.cdf(-d2) - F * norm.cdf(-d1))
+        price = np.where(is_call, call, put)
+        d_forward = D * (norm.cdf(d1) - np.where(is_call, 0.0, 1.0))
+        d2_forward = D * norm.pdf(d1) / (F * v)
+        d_std = D * F * norm.pdf(d1)
+        return price, d_forward, d2_forward, d_std
+
+    def european(self, spot_price, risk_free_rate, maturity, strike_price, repo_rate, volatility, option_type='call'):
+        """
+        Black-Scholes price of European options with repo rate q.
+
+        :param spot_price: Current price of the underlying asset
+        :param risk_free_rate: Risk-free interest rate
+        :param maturity: Time to maturity in years
+        :param strike_price: Strike price of the option
+        :param repo_rate: Repo rate of the underlying asset
+        :param volatility: Volatility of the underlying asset
+        :param option_type: Type of the option ('call' or 'put')
+        :return: Price of the European option(s)
+        """
+        S0, K, T = spot_price, strike_price, maturity
+        r, q, sigma = risk_free_rate, repo_rate, volatility
+        is_call = self.call_mask(option_type)
+
+        d1 = (np.log(S0 / K) + (r - q + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+        d2 = d1 - sigma * np.sqrt(T)
+
+        call = S0 * np.exp(-q * T) * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2)
+        put = K * np.exp(-r * T) * norm.cdf(-d2) - S0 * np.exp(-q * T) * norm.cdf(-d1)
+        return self._scalar_or_array(np.where(is_call, call, put))
+
+    def geometric_asian(self, spot_price, risk_free_rate, maturity, strike_price, volatility, num_observations, option_type='call',
+                        num_fixed=0, fixed_log_sum=0.0):
+        """
+        Closed-form price of discretely monitored geometric Asian options.
+
+        The num_fixed observations already made enter through the sum of their logs;
+        at least one observation must remain.
+
+        :param spot_price: Current price of the underlying asset
+        :param risk_free_rate: Risk-free interest rate
+        :param maturity: Time to maturity in years
+        :param strike_price: Strike price of the option
+        :param volatility: Volatility of the underlying asset
+        :param num_observations: Number of averaging observations
+        :param option_type: Type of the option ('call' or 'put')
+        :param num_fixed: Number of observations already fixed
+        :param fixed_log_sum: Sum of the logs of the fixings
+        :return: Price of the geometric Asian option(s)
+        """
+        sigma, S0, K = volatility, spot_price, strike_price
+        r, T, n = risk_free_rate, maturity, num_observations
+        is_call = self.call_mask(option_type)
+
+        if np.any(num_fixed):
+            # Seasoned: log G is normal, the remaining observation k carries weight m - k + 1 of the increments
+            m = n - num_fixed
+            dt = T / m
+            sum_w, sum_w2 = m * (m + 1) / 2, m * (m + 1) * (2 * m + 1) / 6
+            mean_log = (fixed_log_sum + m * np.log(S0) + (r - 0.5 * sigma**2) * dt * sum_w) / n
+            var_log = sigma**2 * dt * sum_w2 / n**2
+            return self.lognormal(mean_log, var_log, K, np.exp(-r * T), option_type)
+
+        # Adjusted parameters for geometric averaging
+        sigma_hat = sigma * np.sqrt((n+1) * (2*n + 1)/(6*n**2))
+        mu_hat = (r - 0.5 * sigma**2) * (n + 1) / (2*n) + 0.5 * sigma_hat**2
+
+        d1 = (np.log(S0 / K) + (mu_hat + 0.5 * sigma_hat**2) * T) / (sigma_hat * np.sqrt(T))
+        d2 = d1 - sigma_hat * np.sqrt(T)
+
+        call = np.exp(-r * T) * (S0 * np.exp(mu_hat * T) * norm.cdf(d1) - K * norm.cdf(d2))
+        put = np.exp(-r * T) * (K * norm.cdf(-d2) - S0 * np.exp(mu_hat * T) * norm.cdf(-d1))
+        return self._scalar_or_array(np.where(is_call, call, put))
+
+    def geometric_basket(self, spot_prices, risk_free_rate, maturity, strike_price, volatilities, correlation, option_type='call'):
+        """
+        Closed-form price of geometric basket options under constant pairwise correlation.
+
+        :param spot_prices: Spot prices, the last axis runs over the assets
+        :param risk_free_rate: Risk-free interest rate
+        :param maturity: Time to maturity in years
+        :param strike_price: Strike price of the option
+        :param volatilities: Volatilities, the last axis runs over the assets
+        :param correlation: Correlation coefficient between the underlying assets
+        :param option_type: Type of the option ('call' or 'put')
+        :return: Price of the geometric basket option(s)
+        """
+        S = np.asarray(spot_prices, dtype=float)
+        sigma = np.asarray(volatilities, dtype=float)
+        K, r, T, rho = strike_price, risk_free_rate, maturity, correlation
+        n = S.shape[-1]
+        is_call = self.call_mask(option_type)
+
+        # Geometric average of initial prices
+        G0 = np.prod(S, axis=-1) ** (1 / n)
+
+        # Effective basket volatility under constant correlation assumption
+        sum_sq = np.sum(sigma**2, axis=-1)
+        sigma_G_squared = (1 / n**2) * (sum_sq + rho * (np.sum(sigma, axis=-1)**2 - sum_sq))
+        sigma_G = np.sqrt(sigma_G_squared)
+
+        # Drift of geometric basket: E[G_T] = G0 * exp(mu_G * T)
+        mu_G = r - 0.5 * sum_sq / n + 0.5 * sigma_G_squared
+
+        d1 = (np.log(G0 / K) + (mu_G + 0.5 * sigma_G_squared) * T) / (sigma_G * np.sqrt(T))
+        d2 = d1 - sigma_G * np.sqrt(T)
+
+        call = np.exp(-r * T) * (G0 * np.exp(mu_G * T) * norm.cdf(d1) - K * norm.cdf(d2))
+        put = np.exp(-r * T) * (K * norm.cdf(-d2) - G0 * np.exp(mu_G * T) * norm.cdf(-d1))
+        return self._scalar_or_array(np.where(is_call, call, put))
+
+    def geometric_asian_greeks(self, spot_price, risk_free_rate, maturity, strike_price, volatility, num_observations, option_type='call',
+                               num_fixed=0, fixed_log_sum=0.0):
+        """
+        Closed-form price, delta, gamma, vega and rho of discretely monitored geometric Asian options.
+
+        The num_fixed observations already made enter through the sum of their logs;
+        at least one observation must remain.
+
+        :param spot_price: Current price of the underlying asset
+        :param risk_free_rate: Risk-free interest rate
+        :param maturity: Time to maturity in years
+        :param strike_price: Strike price of the option
+        :param volatility: Volatility of the underlying asset
+        :param num_observations: Number of averaging observations
+        :param option_type: Type of the option ('call' or 'put')
+        :param num_fixed: Number of observations already fixed
+        :param fixed_log_sum: Sum of the logs of the fixings
+        :return: Dictionary with 'price', 'delta', 'gamma', 'vega' and 'rho'
+        """
+        S0, r, T, K, sigma, n = spot_price, risk_free_rate, maturity, strike_price, volatility, num_observations
+        is_call = self.call_mask(option_type)
+        m = n - num_fixed
+        dt = T / m
+
+        # log G is normal; the remaining observation k carries weight m - k + 1 of the Brownian increments
+        sum_w, sum_w2 = m * (m + 1) / 2, m * (m + 1) * (2 * m + 1) / 6
+        mean_log = (fixed_log_sum + m * np.log(S0) + (r - 0.5 * sigma**2) * dt * sum_w) / n
+        var_log = sigma**2 * dt * sum_w2 / n**2
+        forward, std = np.exp(mean_log + 0.5 * var_log), np.sqrt(var_log)
+        price, d_forward, d2_forward, d_std = self._black(forward, std, K, np.exp(-r * T), is_call)
+
+        # Chain rule through the forward (proportional to S0^(m / n)) and the standard deviation
+        spot_elasticity = m / n
+        d_mean_d_sigma, d_var_d_sigma = -sigma * dt * sum_w / n, 2 * sigma * dt * sum_w2 / n**2
+        greeks = {
+            'price': price,
+            'delta': d_forward * forward * spot_elasticity / S0,
+            'gamma': (d2_forward * (forward * spot_elasticity / S0)**2
+                      + d_forward * forward * spot_elasticity * (spot_elasticity - 1) / S0**2),
+            'vega': d_forward * forward * (d_mean_d_sigma + 0.5 * d_var_d_sigma) + d_std * d_var_d_sigma / (2 * std),
+            'rho': -T * price + d_forward * forward * dt * sum_w / n,
+        }
+        return {name: self._scalar_or_array(value) for name, value in greeks.items()}
+
+    def geometric_basket_greeks(self, spot_prices, risk_free_rate, maturity, strike_price, volatilities, correlation, option_type='call'):
+        """
+        Closed-form price and sensitivities of geometric basket options under constant pairwise correlation.
+
+        :param spot_prices: Spot prices, the last axis runs over the assets
+        :param risk_free_rate: Risk-free interest rate
+        :param maturity: Time to maturity in years
+        :param strike_price: Strike price of the option
+        :param volatilities: Volatilities, the last axis runs over the assets
+        :param correlation: Correlation coefficient between the underlying assets
+        :param option_type: Type of the option ('call' or 'put')
+        :return: Dictionary with 'price', 'delta', 'gamma' and 'vega' (last axis over the assets), 'rho' and 'correlation'
+        """
+        S = np.asarray(spot_prices, dtype=float)
+        sigma = np.asarray(volatilities, dtype=float)
+        r, T, K, rho = (np.asarray(x, dtype=float) for x in (risk_free_rate, maturity, strike_price, correlation))
+        n = S.shape[-1]
+        is_call = self.call_mask(option_type)
+
+        # Same terminal distribution as geometric_basket(): forward and total standard deviation of G_T
+        sum_sq, sum_sigma = np.sum(sigma**2, axis=-1), np.sum(sigma, axis=-1)
+        sigma_G_squared = (sum_sq + rho * (sum_sigma**2 - sum_sq)) / n**2
+        G0 = np.exp(np.mean(np.log(S), axis=-1))
+        forward = G0 * np.exp((r - 0.5 * sum_sq / n + 0.5 * sigma_G_squared) * T)
+        std = np.sqrt(sigma_G_squared * T)
+        price, d_forward, d2_forward, d_std = self._black(forward, std, K, np.exp(-r * T), is_call)
+
+        # The forward is proportional to S_j^(1 / n); volatilities and correlation move both the forward and the std
+        dF_dS = (forward / n)[..., None] / S
+        d_var_G_d_sigma = 2 * (sigma * (1 - rho[..., None]) + (rho * sum_sigma)[..., None]) / n**2
+        d_var_G_d_rho = (sum_sigma**2 - sum_sq) / n**2
+        T_ = T[..., None]
+        greeks = {
+            'price': price,
+            'delta': d_forward[..., None] * dF_dS,
+            'gamma': d2_forward[..., None] * dF_dS**2 + d_forward[..., None] * dF_dS * (1 / n - 1) / S,
+            'vega': (d_forward * forward)[..., None] * T_ * (-sigma / n + 0.5 * d_var_G_d_sigma)
+                    + d_std[..., None] * T_ * d_var_G_d_sigma / (2 * std[..., None]),
+            'rho': -T * price + d_forward * forward * T,
+            'correlation': d_forward * forward * 0.5 * T * d_var_G_d_rho + d_std * T * d_var_G_d_rho / (2 * std),
+        }
+        return {name: self._scalar_or_array(value) for name, value in greeks.items()}
+
+    def arithmetic_basket(self, spot_prices, risk_free_rate, maturity, strike_price, volatilities, correlation, option_type='call', weights=None):
+        """
+        Levy approximation of arithmetic basket options: the weighted sum of the assets at maturity
+        is replaced by the lognormal variable with the same first two moments.
+
+        :param spot_prices: Spot prices, the last axis runs over the N assets
+        :param risk_free_rate: Risk-free interest rate
+        :param maturity: Time to maturity in years
+        :param strike_price: Strike price of the option
+        :param volatilities: Volatilities, the last axis runs over the assets
+        :param correlation: Constant pairwise correlation, or correlation matrices (last two axes N x N)
+        :param option_type: Type of the option ('call' or 'put')
+        :param weights: Weights of the assets in the basket, the last axis runs over the assets (default: 1 / N each)
+        :return: Approximate price of the arithmetic basket option(s)
+        """
+        S = np.asarray(spot_prices, dtype=float)
+        sigma = np.asarray(volatilities, dtype=float)
+        r, T = np.asarray(risk_free_rate, dtype=float), np.asarray(maturity, dtype=float)
+        n = S.shape[-1]
+        w = np.full(n, 1 / n) if weights is None else np.asarray(weights, dtype=float)
+        rho = np.asarray(correlation, dtype=float)
+        if rho.ndim < 2 or rho.shape[-2:] != (n, n):
+            # Constant pairwise correlation
+            rho = rho[..., None, None] * np.ones((n, n)) + (1 - rho[..., None, None]) * np.eye(n)
+
+        # Weighted forwards and covariance of the log prices at maturity
+        forwards = w * S * np.exp(r * T)[..., None]
+        covariance = rho * sigma[..., :, None] * sigma[..., None, :] * T[..., None, None]
+
+        M1 = np.sum(forwards, axis=-1)
+        M2 = np.einsum('...i,...ij,...j->...', forwards, np.exp(covariance), forwards)
+        var_log = np.log(M2 / M1**2)
+        mean_log = np.log(M1) - 0.5 * var_log
+        return self.lognormal(mean_log, var_log, strike_price, np.exp(-r * T), option_type)
+
+    def arithmetic_asian(self, spot_price, risk_free_rate, maturity, strike_price, volatility, num_observations, option_type='call', method='levy'):
+        """
+        Analytic approximation of discretely monitored arithmetic Asian options.
+
+        :param spot_price: Current price of the underlying asset
+        :param risk_free_rate: Risk-free interest rate
+        :param maturity: Time to maturity in years
+        :param strike_price: Strike price of the option
+        :param volatility: Volatility of the underlying asset
+        :param num_observations: Number of averaging observations (may differ across the batch)
+        :param option_type: Type of the option ('call' or 'put')
+        :param method: 'levy' (two-moment lognormal matching, Turnbull-Wakeman) or 'curran' (conditioning on the geometric average)
+        :return: Approximate price of the arithmetic Asian option(s)
+        """
+        S0, r, T, sigma, n = np.broadcast_arrays(
+            *(np.asarray(x, dtype=float) for x in (spot_price, risk_free_rate, maturity, volatility, num_observations))
+        )
+
+        # One column per observation; batches with fewer observations are padded and masked
+        i = np.arange(1, int(np.max(n)) + 1)
+        mask = i <= n[..., None]
+        t = i * (T / n)[..., None]
+        mean_logs = np.log(S0)[..., None] + (r - 0.5 * sigma**2)[..., None] * t
+        cum_variances = sigma[..., None]**2 * t
+        return self.lognormal_average(mean_logs, cum_variances, strike_price, np.exp(-r * T), option_type, method, mask)
+
+    def lognormal_average(self, mean_logs, cum_variances, strike_price, discount_factor, option_type='call', method='levy', mask=None):
+        """
+        Approximate price of options on the arithmetic average of the prices S_1, ..., S_m of one lognormal path.
+
+        The last axis runs over the observations: E[log S_i] = mean_logs[i] and
+        Cov(log S_i, log S_j) = cum_variances[min(i, j)].
+
+        :param mean_logs: Means of log S_i
+        :param cum_variances: Cumulative variances of log S_i (non-decreasing along the last axis)
+        :param strike_price: Strike price of the option (non-positive strikes are always exercised)
+        :param discount_factor: Discount factor from the payment date to today
+        :param option_type: Type of the option ('call' or 'put')
+        :param method: 'levy' or 'curran'
+        :param mask: Boolean array marking the valid observations (default: all)
+        :return: Price of the option(s)
+        """
+        mu, v = np.broadcast_arrays(np.asarray(mean_logs, dtype=float), np.asarray(cum_variances, dtype=float))
+        mask = np.ones(mu.shape, dtype=bool) if mask is None else np.broadcast_to(mask, mu.shape)
+        K = np.asarray(strike_price, dtype=float)
+        is_call = self.call_mask(option_type)
+        m = np.sum(mask, axis=-1)
+
+        # First moment of the average (exact)
+        expectations = np.where(mask, np.exp(mu + 0.5 * v), 0)
+        M1 = np.sum(expectations, axis=-1) / m
+        forward_value = discount_factor * (M1 - K)
+        safe_K = np.where(K > 0, K, 1.0)
+
+        if method == 'levy':
+            # Second moment: E[S_i S_j] = E[S_i] E[S_j] exp(v_min(i, j)), summed over j >= i
+            suffix = np.cumsum(expectations[..., ::-1], axis=-1)[..., ::-1]
+            M2 = np.sum(expectations * np.exp(v) * (2 * suffix - expectations), axis=-1) / m**2
+            var_log = np.log(M2 / M1**2)
+            mean_log = np.log(M1) - 0.5 * var_log
+            call = self.lognormal(mean_log, var_log, safe_K, discount_factor, 'call')
+        elif method == 'curran':
+            # Covariances with X = log of the geometric average
+            after = m[..., None] - np.cumsum(mask, axis=-1)
+            cov_x = np.where(mask, np.cumsum(np.where(mask, v, 0), axis=-1) + v * after, 0) / m[..., None]
+            mu_x = np.sum(np.where(mask, mu, 0), axis=-1) / m
+            var_x = np.sum(cov_x, axis=-1) / m
+            std_x = np.sqrt(var_x)
+
+            # Strike of the conditional approximation; when it is not positive the option is always exercised
+            log_K = np.log(safe_K)[..., None]
+            K_hat = 2 * safe_K - np.sum(np.where(
+                mask, np.exp(mu + cov_x * (log_K - mu_x[..., None]) / var_x[..., None] + 0.5 * (v - cov_x**2 / var_x[..., None])), 0
+            ), axis=-1) / m
+            d = (mu_x - np.log(np.where(K_hat > 0, K_hat, 1.0))) / std_x
+            call = discount_factor * (
+                np.sum(expectations * norm.cdf(d[..., None] + cov_x / std_x[..., None]), axis=-1) / m - safe_K * norm.cdf(d)
+            )
+            call = np.where(K_hat > 0, call, forward_value)
+        else:
+            raise ValueError("method must be 'levy' or 'curran'")
+
+        # Puts by put-call parity, which holds exactly for the arithmetic average
+        call = np.where(K > 0, call, forward_value)
+        return self._scalar_or_array(np.where(is_call, call, call - forward_value))
+
+
+# Example usage
+if __name__ == "__main__":
+    pricer = ClosedFormPricer()
+
+    # Price a strip of European calls in one call
+    strikes = np.linspace(80, 120, 5)
+    print("European calls:", pricer.european(100, 0.05, 3, strikes, 0.2, 0.3, 'call'))
+
+    print("Geometric Asian put:", pricer.geometric_asian(100, 0.05, 3, 100, 0.3, 50, 'put'))
+    print("Arithmetic Asian put (Levy, Curran):", pricer.arithmetic_asian(100, 0.05, 3, 100, 0.3, 50, 'put', 'levy'),
+          pricer.arithmetic_asian(100, 0.05, 3, 100, 0.3, 50, 'put', 'curran'))
+    print("Geometric basket call:", pricer.geometric_basket([100, 100], 0.05, 3, 100, [0.3, 0.3], 0.5, 'call'))
+    correlation = [[1.0, 0.5, 0.2], [0.5, 1.0, 0.3], [0.2, 0.3, 1.0]]
+    print("Arithmetic basket call (Levy, 3 assets):",
+          pricer.arithmetic_basket([100, 90, 110], 0.05, 3, 100, [0.3, 0.25, 0.35], correlation, 'call', weights=[0.5, 0.3, 0.2]))
@@ -0,0 +1,88 @@
+import numpy as np
+
+
+class ControlVariateEstimator:
+
+    def __init__(self, num_controls: int):
+        """
+        Regression estimator of a Monte Carlo mean with several control variates.
+
+        Paths are fed in chunks with update(); only the sufficient statistics
+        (sums, sums of squares and cross products) are kept, so a caller that
+        simulates chunk by chunk never needs all the paths at once. estimate()
+        then solves the least-squares problem for the optimal coefficients
+            b = Cov(X)^-1 Cov(X, Y)
+        and returns mean(Y) - b . (mean(X) - E[X]).
+
+        :param num_controls: Number of control variates (0 gives the plain Monte Carlo mean)
+        """
+        self.num_controls = num_controls
+        self.count = 0
+        self._shift = None
+        self._sums = np.zeros(num_controls + 1)
+        self._cross = np.zeros((num_controls + 1, num_controls + 1))
+
+    def update(self, target, controls=None):
+        """
+        Add a chunk of paths.
+
+        :param target: Discounted payoffs of the product, one per path
+        :param controls: Discounted control values, one row per path and one column per control
+        """
+        target = np.asarray(target, dtype=float)
+        controls = np.empty((len(target), 0)) if controls is None else np.asarray(controls, dtype=float).reshape(len(target), -1)
+        values = np.column_stack([target, controls])
+        if values.shape[1] != self.num_controls + 1:
+            raise ValueError(f"Expected {self.num_controls} controls, got {values.shape[1] - 1}")
+
+        # Statistics are accumulated around the mean of the first chunk to avoid cancellation
+        if self._shift is None:
+            self._shift = values.mean(axis=0)
+        values = values - self._shift
+        self.count += len(values)
+        self._sums += values.sum(axis=0)
+        self._cross += values.T @ values
+
+    def estimate(self, control_means=None):
+        """
+        Controlled estimate of the mean of the target.
+
+        :param control_means: Known expectations of the controls
+        :return: Dictionary with 'price', 'std_error', 'conf_interval', 'coefficients' and
+                 'variance_reduction' (variance of the plain estimator over that of the controlled one)
+        """
+        n = self.count
+        mean = self._sums / n
+        covariance = (self._cross - n * np.outer(mean, mean)) / (n - 1)
+        mean = mean + self._shift
+
+        target_variance = covariance[0, 0]
+        if self.num_controls:
+            control_means = np.asarray(control_means, dtype=float).reshape(self.num_controls)
+            coefficients = np.linalg.lstsq(covariance[1:, 1:], covariance[1:, 0], rcond=None)[0]
+            price = mean[0] - coefficients @ (mean[1:] - control_means)
+            variance = max(target_variance - covariance[0, 1:] @ coefficients, 0.0)
+        else:
+            coefficients = np.empty(0)
+            price, variance = mean[0], target_variance
+
+        std_error = np.sqrt(variance / n)
+        return {
+            'price': float(price),
+            'std_error': float(std_error),
+            'conf_interval': (float(price - 1.96 * std_error), float(price + 1.96 * std_error)),
+            'coefficients': coefficients,
+            'variance_reduction': float(target_variance / variance) if variance > 0 else np.inf,
+        }
+
+
+# Example usage
+if __name__ == "__main__":
+    # E[max(S_T - K, 0)] with the underlying itself as control (E[S_T] is known)
+    rng = np.random.default_rng(0)
+    estimator = ControlVariateEstimator(num_controls=1)
+    for _ in range(10):
+        S_T = 100 * np.exp(-0.045 + 0.3 * rng.standard_normal(100000))
+        estimator.update(np.maximum(S_T - 100, 0), S_T[:, None])
+    result = estimator.estimate([100.0])
+    print(f"Price {result['price']:.4f} +/- {1.96 * result['std_error']:.4f}, variance reduction {result['variance_reduction']:.2f}x")
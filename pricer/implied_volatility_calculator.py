@@ -1,5 +1,43 @@
 import numpy as np
 from scipy.stats import norm
+from pricer.binomial_tree_pricer import BiniomialTreePricer
+from pricer.closed_form_pricer import ClosedFormPricer
+
+
+def bracketed_root(error, low, high, f_low, f_high, tol=1e-6, max_iter=50):
+    """
+    Vectorized Illinois (modified regula falsi) root finder for increasing functions.
+
+    All problems are iterated together, so each iteration costs one vectorized
+    call of error().
+
+    :param error: Function of an array of arguments returning the array of errors
+    :param low: Lower ends of the brackets
+    :param high: Upper ends of the brackets
+    :param f_low: error(low)
+    :param f_high: error(high)
+    :param tol: Tolerance on the error
+    :param max_iter: Maximum number of calls of error()
+    :return: Roots (NaN where the bracket does not contain a root or the iteration did not converge)
+    """
+    bracketed = (f_low <= 0) & (f_high >= 0)
+    x, f_x = low.copy(), f_low.copy()
+    side = np.zeros(np.shape(x))
+    for _ in range(max_iter):
+        done = (np.abs(f_x) < tol) | ~bracketed
+        if np.all(done):
+            break
+        x = np.where(done, x, (low * f_high - high * f_low) / np.where(f_high != f_low, f_high - f_low, 1.0))
+        f_x = error(x)
+        replace_high = f_x > 0
+        # Halve the function value at the end that is kept twice in a row
+        f_low = np.where(replace_high & (side == 1), f_low / 2, f_low)
+        f_high = np.where(~replace_high & (side == -1), f_high / 2, f_high)
+        low, f_low = np.where(replace_high, low, x), np.where(replace_high, f_low, f_x)
+        high, f_high = np.where(replace_high, x, high), np.where(replace_high, f_x, f_high)
+        side = np.where(replace_high, 1, -1)
+    return np.where(bracketed & (np.abs(f_x) < tol), x, np.nan)
+
 
 class ImpliedVolatility:
 
@@ -113,6 +151,86 @@ class ImpliedVolatility:
             raise ValueError("Implied volatility calculation did not converge.")
         return implied_volatility
 
+    def european_chain(self, option_type, spot_price, risk_free_rate, repo_rate, maturity, strike_price, option_premium, num_iterations=20):
+        """
+        Vectorized Newton-Raphson European implied volatilities of a whole chain.
+
+        Every argument may be an array. Premiums outside the no-arbitrage bounds give NaN.
+
+        :return: Implied volatilities
+        """
+        S0, r, q, T, K, premium = np.broadcast_arrays(
+            *(np.asarray(x, dtype=float) for x in (spot_price, risk_free_rate, repo_rate, maturity, strike_price, option_premium))
+        )
+        pricer = ClosedFormPricer()
+
+        # Same starting point as calculate() (the inflection point of the price in sigma), kept away from zero
+        sigma = np.maximum(np.sqrt(2 * np.abs((np.log(S0 / K) + (r - q) * T) / T)), 0.05)
+        for _ in range(num_iterations):
+            d1 = (np.log(S0 / K) + (r - q + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+            vega = S0 * np.exp(-q * T) * np.sqrt(T) * norm.pdf(d1)
+            error = pricer.european(S0, r, T, K, q, sigma, option_type) - premium
+            sigma = np.clip(sigma - error / np.maximum(vega, 1e-8), 1e-4, 5.0)
+
+        valid = np.abs(pricer.european(S0, r, T, K, q, sigma, option_type) - premium) < 1e-4
+        return ClosedFormPricer._scalar_or_array(np.where(valid, sigma, np.nan))
+
+    def calculate_american(self, option_type, spot_price, risk_free_rate, maturity, strike_price, option_premium,
+                           num_steps=200, tol=1e-6, max_iter=50):
+        """
+        Implied volatilities that reproduce premiums with the binomial tree of AmericanOption.
+
+        The whole chain is solved at once: every iteration is one vectorized
+        rollback of all the (early-exercise) trees, which share the cached lattice
+        of num_steps steps. Each strike starts from a bracket around its European
+        implied volatility, corrected for the early-exercise premium, and is
+        refined with the Illinois (regula falsi) method.
+
+        :param option_type: Type of the options ('call', 'put' or an array of these)
+        :param spot_price: Current price of the underlying asset
+        :param risk_free_rate: Risk-free interest rate
+        :param maturity: Time to maturity in years
+        :param strike_price: Strike price(s) of the chain
+        :param option_premium: Observed premium(s)
+        :param num_steps: Number of steps in the binomial tree
+        :param tol: Tolerance on the premium
+        :param max_iter: Maximum number of tree evaluations after bracketing
+        :return: Implied volatilities (NaN where no volatility in [1e-4, 5] matches the premium)
+        """
+        option_type = np.asarray(option_type)
+        S0, r, T, K, premium = np.broadcast_arrays(
+            *(np.asarray(x, dtype=float) for x in (spot_price, risk_free_rate, maturity, strike_price, option_premium))
+        )
+        option_type = np.broadcast_to(option_type, S0.shape)
+        tree = BiniomialTreePricer()
+
+        def error(sigma):
+            return np.asarray(tree.price(option_type, S0, r, T, K, num_steps, sigma), dtype=float) - premium
+
+        # Warm start: the European implied volatility overstates the American one by the early-exercise
+        # premium, so it is corrected by one Newton step on the tree price (with the European vega)
+        guess = np.asarray(self.european_chain(option_type, S0, r, 0.0, T, K, premium), dtype=float)
+        guess = np.where(np.isnan(guess), 0.3, guess)
+        d1 = (np.log(S0 / K) + (r + 0.5 * guess**2) * T) / (guess * np.sqrt(T))
+        vega = S0 * np.sqrt(T) * norm.pdf(d1)
+        guess = np.clip(guess - error(guess) / np.maximum(vega, 1e-8), 1e-4, 5.0)
+
+        # Bracket the corrected guess, widening the brackets that miss the root
+        low, high = np.maximum(0.95 * guess, 1e-4), np.minimum(1.05 * guess, 5.0)
+        f_low, f_high = error(low), error(high)
+        for _ in range(10):
+            below, above = f_low > 0, f_high < 0
+            if not np.any((below & (low > 1e-4)) | (above & (high < 5.0))):
+                break
+            low = np.where(below, np.maximum(low / 2, 1e-4), low)
+            high = np.where(above, np.minimum(high * 2, 5.0), high)
+            f_low, f_high = error(low), error(high)
+
+        # Illinois iterations on all strikes together
+        result = bracketed_root(error, low, high, f_low, f_high, tol, max_iter)
+        return ClosedFormPricer._scalar_or_array(result)
+
+
 if __name__ == "__main__":
     # Example usage
     iv_calculator = ImpliedVolatility()
@@ -126,4 +244,12 @@ if __name__ == "__main__":
    
     iv = iv_calculator.calculate('call', S0, r, q, T, K, option_premium)
     print(f"Implied Volatility: {iv}")
+
+    # Implied volatilities of a whole American put chain from tree prices
+    import time
+    strikes = np.linspace(30, 70, 41)
+    premiums = BiniomialTreePricer().price('put', 50, 0.1, 2, strikes, 200, 0.25 + 0.002 * (strikes - 50)**2 / 10)
+    start = time.perf_counter()
+    ivs = iv_calculator.calculate_american('put', 50, 0.1, 2, strikes, premiums, num_steps=200)
+    print(f"American chain of {len(strikes)} strikes in {time.perf_counter() - start:.3f} s:", np.round(ivs[::10], 4))
     
\ No newline at end of file
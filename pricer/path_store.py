@@ -0,0 +1,194 @@
+import json
+import os
+
+import numpy as np
+
+from market.curves import discount_factor, is_flat, step_drift_diffusion
+from options.asian_option import ArithmeticAsianOption, GeometricAsianOption
+from options.european_option import EuropeanOption
+from options.kiko_option import KIKOOption
+
+
+class PathStore:
+
+    def __init__(self, filename: str, spot_price: float, risk_free_rate, maturity: float, volatility, num_steps: int, num_paths: int, seed: int = 0, chunk_size: int = 65536):
+        """
+        Simulated paths of one underlying stored in a memory-mapped .npy file.
+
+        The path set is simulated once and written chunk by chunk; payoffs are
+        then evaluated by streaming over the mapped file, so neither simulation
+        nor pricing needs the whole matrix in memory. Every trade priced from
+        the same store sees the same paths (common random numbers).
+
+        :param filename: Path of the .npy file (the parameters are stored next to it in a .json file)
+        :param spot_price: Current price of the underlying asset
+        :param risk_free_rate: Risk-free interest rate (flat rate or YieldCurve)
+        :param maturity: Time of the last step in years
+        :param volatility: Volatility of the underlying asset (flat volatility or VolTermStructure)
+        :param num_steps: Number of equally spaced time steps (observation dates)
+        :param num_paths: Number of simulated paths
+        :param seed: Seed of the random number generator
+        :param chunk_size: Number of paths simulated or evaluated at a time
+        """
+        self.filename = filename
+        self.spot_price = spot_price
+        self.risk_free_rate = risk_free_rate
+        self.maturity = maturity
+        self.volatility = volatility
+        self.num_steps = num_steps
+        self.num_paths = num_paths
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self._paths = None
+
+    @property
+    def dt(self):
+        return self.maturity / self.num_steps
+
+    def simulate(self):
+        """
+        Simulate the paths and write them to the memory-mapped file.
+
+        :return: self
+        """
+        drift, diffusion = step_drift_diffusion(self.risk_free_rate, self.volatility, self.maturity, self.num_steps)
+        paths = np.lib.format.open_memmap(self.filename, mode='w+', dtype=np.float64, shape=(self.num_paths, self.num_steps))
+        rng = np.random.default_rng(self.seed)
+        for start in range(0, self.num_paths, self.chunk_size):
+            stop = min(start + self.chunk_size, self.num_paths)
+            Z = rng.standard_normal((stop - start, self.num_steps))
+            paths[start:stop] = self.spot_price * np.exp(np.cumsum(drift + diffusion * Z, axis=1))
+        paths.flush()
+        del paths
+
+        if is_flat(self.risk_free_rate, self.volatility):
+            with open(self._metadata_filename(self.filename), 'w') as f:
+                json.dump({key: getattr(self, key) for key in ('spot_price', 'risk_free_rate', 'maturity', 'volatility', 'num_steps', 'num_paths', 'seed')}, f)
+        self._paths = None
+        return self
+
+    @staticmethod
+    def _metadata_filename(filename):
+        return os.path.splitext(filename)[0] + '.json'
+
+    @classmethod
+    def open(cls, filename: str, chunk_size: int = 65536):
+        """
+        Open a path set simulated earlier (flat market data only; with curves, keep the PathStore object).
+        """
+        with open(cls._metadata_filename(filename)) as f:
+            metadata = json.load(f)
+        return cls(filename, chunk_size=chunk_size, **metadata)
+
+    @property
+    def paths(self):
+        """
+        Read-only memory map of the paths, one row per path and one column per step.
+        """
+        if self._paths is None:
+            self._paths = np.load(self.filename, mmap_mode='r')
+        return self._paths
+
+    def chunks(self):
+        """
+        Iterate over the paths in chunks of chunk_size rows.
+        """
+        paths = self.paths
+        for start in range(0, self.num_paths, self.chunk_size):
+            yield paths[start:start + self.chunk_size]
+
+    def _check(self, option, num_observations):
+        """
+        The option must live on the simulated underlying and schedule.
+        """
+        if not (np.isclose(option.maturity, self.maturity) and num_observations == self.num_steps):
+            raise ValueError(f"The path store simulates {self.num_steps} steps to T={self.maturity}, "
+                             f"the option needs {num_observations} to T={option.maturity}")
+        if option.risk_free_rate is not self.risk_free_rate and option.risk_free_rate != self.risk_free_rate:
+            raise ValueError("The option and the path store use different risk-free rates")
+        if option.volatility is not self.volatility and option.volatility != self.volatility:
+            raise ValueError("The option and the path store use different volatilities")
+
+    def price(self, option, spot_price: float = None):
+        """
+        Price a European, arithmetic Asian or KIKO option from the stored paths.
+
+        :param option: EuropeanOption, ArithmeticAsianOption or KIKOOption on the simulated underlying
+        :param spot_price: Spot to price at (defaults to the option's); other spots rescale the stored
+                           paths, so bumped prices for Greeks reuse the same random numbers
+        :return: Tuple of price and 95% confidence interval
+        """
+        spot_price = option.spot_price if spot_price is None else spot_price
+        scale = spot_price / self.spot_price
+        discount = discount_factor(self.risk_free_rate, self.maturity)
+
+        if isinstance(option, KIKOOption):
+            self._check(option, option.num_observations)
+            payoff = lambda paths: (option._discounted_payoffs(paths, self.dt),)
+        elif isinstance(option, ArithmeticAsianOption):
+            self._check(option, option.remaining_observations)
+            payoff = lambda paths: option._discounted_payoffs(paths, discount)
+        elif isinstance(option, EuropeanOption):
+            self._check(option, self.num_steps)
+            if option.repo_rate != 0:
+                raise ValueError("The path store simulates an underlying without repo rate")
+            sign = 1 if option.option_type == 'call' else -1
+            payoff = lambda paths: (discount * np.maximum(sign * (paths[:, -1] - option.strike_price), 0),)
+        else:
+            raise TypeError(f"{type(option).__name__} cannot be priced from a path store")
+
+        # Running sums of the payoffs, their squares and cross products (for the control variate)
+        sums, cross = None, None
+        for chunk in self.chunks():
+            values = np.array(payoff(chunk * scale if scale != 1 else chunk))
+            sums = values.sum(axis=1) if sums is None else sums + values.sum(axis=1)
+            cross = values @ values.T if cross is None else cross + values @ values.T
+
+        n = self.num_paths
+        mean = sums / n
+        covariance = (cross - n * np.outer(mean, mean)) / (n - 1)
+
+        if isinstance(option, ArithmeticAsianOption) and option.use_control_variate:
+            geo_price = option._copy_fixings(GeometricAsianOption(spot_price, self.risk_free_rate, self.maturity, option.strike_price,
+                                                                  self.volatility, option.num_observations, option.option_type)).price()
+            theta = covariance[0, 1] / covariance[1, 1]
+            price = mean[0] + theta * (geo_price - mean[1])
+            variance = covariance[0, 0] - 2 * theta * covariance[0, 1] + theta**2 * covariance[1, 1]
+        else:
+            price, variance = mean[0], covariance[0, 0]
+
+        std_err = np.sqrt(variance / n)
+        return float(price), (float(price - 1.96 * std_err), float(price + 1.96 * std_err))
+
+    def delta(self, option, epsilon: float = 1e-2):
+        """
+        Central-difference delta from the stored paths (both bumps reuse the same paths).
+        """
+        price_plus, _ = self.price(option, option.spot_price + epsilon)
+        price_minus, _ = self.price(option, option.spot_price - epsilon)
+        return (price_plus - price_minus) / (2 * epsilon)
+
+
+# Example usage
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    store = PathStore(os.path.join(tempfile.mkdtemp(), 'paths.npy'), spot_price=100, risk_free_rate=0.05,
+                      maturity=2.0, volatility=0.2, num_steps=24, num_paths=200000, seed=42)
+    start = time.perf_counter()
+    store.simulate()
+    print(f"Simulated {store.num_paths} paths in {time.perf_counter() - start:.2f} s")
+
+    trades = [
+        KIKOOption(100, 0.05, 2.0, 100, 0.2, 80, 125, 24, 1.5),
+        KIKOOption(100, 0.05, 2.0, 95, 0.2, 75, 120, 24, 0.0),
+        ArithmeticAsianOption(100, 0.05, 2.0, 100, 0.2, 24, 0, True, 'call'),
+        EuropeanOption(100, 0.05, 2.0, 100, 0.0, 0.2, 'put'),
+    ]
+    start = time.perf_counter()
+    for trade in trades:
+        price, conf_interval = store.price(trade)
+        print(f"{type(trade).__name__:22s} {price:.4f} {conf_interval}  delta {store.delta(trade):.4f}")
+    print(f"Priced {len(trades)} trades with deltas in {time.perf_counter() - start:.2f} s")
+    print("Black-Scholes put for comparison:", trades[-1].price())
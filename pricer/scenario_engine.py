@@ -0,0 +1,421 @@
+import numpy as np
+from scipy.stats import norm, qmc
+from options.european_option import EuropeanOption
+from options.american_option import AmericanOption
+from options.asian_option import GeometricAsianOption, ArithmeticAsianOption
+from options.basket_option import GeometricBasketOption, ArithmeticBasketOption
+from options.kiko_option import KIKOOption
+from pricer.closed_form_pricer import ClosedFormPricer
+from pricer.binomial_tree_pricer import BiniomialTreePricer
+from market.curves import YieldCurve, VolTermStructure, average_volatility, discount_factor, is_flat, step_drift_diffusion, zero_rate
+
+
+class ScenarioEngine:
+
+    # Shocked volatilities are floored here so a large negative vol shock cannot produce NaN prices
+    MIN_VOLATILITY = 1e-8
+
+    def __init__(self, spot_shocks, vol_shocks, rate_shocks, kiko_num_paths: int = 100000, kiko_seed: int = 1000):
+        """
+        Constructor for ScenarioEngine class.
+
+        The scenario grid is the outer product spot shocks x vol shocks x rate shocks.
+
+        :param spot_shocks: Relative spot shocks, e.g. -0.1 means the spot drops by 10%
+        :param vol_shocks: Absolute volatility shocks, added to the volatility of each trade
+                           (a parallel shift of the pillars of a VolTermStructure)
+        :param rate_shocks: Absolute risk-free rate shocks, added to the rate of each trade
+                            (a parallel shift of the zero rates of a YieldCurve)
+        :param kiko_num_paths: Number of Monte Carlo paths used for KIKO options
+        :param kiko_seed: Seed of the Sobol sequence used for KIKO options
+        """
+        self.shocks = tuple(np.atleast_1d(np.asarray(s, dtype=float)) for s in (spot_shocks, vol_shocks, rate_shocks))
+        self.kiko_num_paths = kiko_num_paths
+        self.kiko_seed = kiko_seed
+        self.closed_form = ClosedFormPricer()
+        self.tree = BiniomialTreePricer()
+
+    @property
+    def shape(self):
+        """
+        Shape of the scenario grid (number of spot, vol and rate shocks).
+        """
+        return tuple(len(s) for s in self.shocks)
+
+    def run(self, portfolio, quantities=None):
+        """
+        Revalue every position of the portfolio on the whole scenario grid.
+
+        Trades are grouped by product; closed-form products are priced with one
+        vectorized call per group and Monte Carlo products reuse the same random
+        numbers in every scenario, so the P&L surface is free of simulation noise
+        between neighbouring scenarios.
+
+        :param portfolio: List of Option instances (flat rates and volatilities or term structures)
+        :param quantities: Optional list of position sizes (defaults to 1 per trade)
+        :return: P&L cube of shape (n_trades, n_spot, n_vol, n_rate), in the order of the portfolio
+        """
+        if quantities is None:
+            quantities = np.ones(len(portfolio))
+        quantities = np.asarray(quantities, dtype=float)
+        if len(quantities) != len(portfolio):
+            raise ValueError("quantities must have one entry per trade in the portfolio")
+
+        revaluers = [
+            # Subclasses must come before their parents (ArithmeticBasketOption derives from GeometricBasketOption)
+            (ArithmeticBasketOption, self._arithmetic_basket),
+            (GeometricBasketOption, self._geometric_basket),
+            (ArithmeticAsianOption, self._arithmetic_asian),
+            (GeometricAsianOption, self._geometric_asian),
+            (EuropeanOption, self._european),
+            (AmericanOption, self._american),
+            (KIKOOption, self._kiko),
+        ]
+
+        groups = {}
+        for index, trade in enumerate(portfolio):
+            for product, revaluer in revaluers:
+                if isinstance(trade, product):
+                    groups.setdefault(revaluer, []).append(index)
+                    break
+            else:
+                raise TypeError(f"Unsupported product in portfolio: {type(trade).__name__}")
+
+        no_shock = (np.zeros(1), np.zeros(1), np.zeros(1))
+        pnl = np.empty((len(portfolio),) + self.shape)
+        for revaluer, indices in groups.items():
+            trades = [portfolio[i] for i in indices]
+            base = revaluer(trades, no_shock)
+            scenarios = revaluer(trades, self.shocks)
+            pnl[indices] = quantities[indices, None, None, None] * (scenarios - base)
+        return pnl
+
+    @staticmethod
+    def _column(trades, name):
+        """
+        Collect one attribute of a list of trades into an array broadcastable against the shock grid.
+        """
+        return np.array([getattr(trade, name) for trade in trades])[:, None, None, None]
+
+    @staticmethod
+    def _shift_rate(rate, shock):
+        """
+        Flat rate or YieldCurve moved by a parallel shock.
+        """
+        if isinstance(rate, YieldCurve):
+            return rate.shifted(shock)
+        return rate + shock
+
+    def _shift_volatility(self, volatility, shock):
+        """
+        Flat volatility or VolTermStructure moved by a parallel shock, capped so that no volatility falls below MIN_VOLATILITY.
+        """
+        if isinstance(volatility, VolTermStructure):
+            return volatility.shifted(max(shock, self.MIN_VOLATILITY - np.min(volatility.volatilities)))
+        return max(volatility + shock, self.MIN_VOLATILITY)
+
+    def _rates(self, trades, rate_shocks):
+        """
+        Shocked risk-free rates of the trades as equivalent flat rates to maturity, of shape (n_trades, 1, 1, n_rate).
+        """
+        if is_flat(*(trade.risk_free_rate for trade in trades)):
+            return self._column(trades, 'risk_free_rate') + rate_shocks[None, None, None, :]
+        return np.array([
+            [zero_rate(self._shift_rate(trade.risk_free_rate, dr), trade.maturity) for dr in rate_shocks] for trade in trades
+        ])[:, None, None, :]
+
+    def _market(self, trades, shocks):
+        """
+        Broadcast the spots, vols and rates of the trades against the shock grid.
+
+        Term structures are shifted and then enter through their values to maturity,
+        as in the pricers of the products that only depend on the terminal distribution.
+
+        :return: Shocked spot, vol and rate arrays of shape (n_trades, n_spot, n_vol, n_rate)
+        """
+        spot_shocks, vol_shocks, rate_shocks = shocks
+        spot = self._column(trades, 'spot_price') * (1 + spot_shocks)[None, :, None, None]
+        if is_flat(*(trade.volatility for trade in trades)):
+            vol = np.maximum(self._column(trades, 'volatility') + vol_shocks[None, None, :, None], self.MIN_VOLATILITY)
+        else:
+            vol = np.array([
+                [average_volatility(self._shift_volatility(trade.volatility, dv), trade.maturity) for dv in vol_shocks] for trade in trades
+            ])[:, None, :, None]
+        return spot, vol, self._rates(trades, rate_shocks)
+
+    @staticmethod
+    def _group_by(trades, key):
+        """
+        Split trades into groups of indices sharing the same key (e.g. number of tree steps).
+        """
+        groups = {}
+        for i, trade in enumerate(trades):
+            groups.setdefault(key(trade), []).append(i)
+        return groups
+
+    def _european(self, trades, shocks):
+        S, sigma, r = self._market(trades, shocks)
+        repo = np.array([zero_rate(trade.repo_rate, trade.maturity) for trade in trades])[:, None, None, None]
+        return self.closed_form.european(
+            S, r, self._column(trades, 'maturity'), self._column(trades, 'strike_price'),
+            repo, sigma, self._column(trades, 'option_type')
+        )
+
+    def _geometric_asian(self, trades, shocks):
+        values = np.empty((len(trades),) + tuple(len(s) for s in shocks))
+
+        def kind(trade):
+            if trade.remaining_observations == 0:
+                return 'fixed'
+            return 'flat' if is_flat(trade.risk_free_rate, trade.volatility) else 'term_structure'
+
+        for group_kind, indices in self._group_by(trades, kind).items():
+            if group_kind == 'term_structure':
+                for i in indices:
+                    values[i] = self._geometric_asian_trade(trades[i], shocks)
+                continue
+            group = [trades[i] for i in indices]
+            S, sigma, r = self._market(group, shocks)
+            T, K = self._column(group, 'maturity'), self._column(group, 'strike_price')
+            n, option_type = self._column(group, 'num_observations'), self._column(group, 'option_type')
+            fixed_log_sum = self._column(group, 'fixed_log_sum')
+            if group_kind == 'fixed':
+                # Every observation is fixed: the payoff is known and only discounted
+                sign = np.where(ClosedFormPricer.call_mask(option_type), 1.0, -1.0)
+                payoff = np.maximum(sign * (np.exp(fixed_log_sum / n) - K), 0)
+                values[indices] = np.exp(-r * T) * payoff
+            else:
+                values[indices] = self.closed_form.geometric_asian(
+                    S, r, T, K, sigma, n, option_type, self._column(group, 'num_fixed'), fixed_log_sum
+                )
+        return values
+
+    def _geometric_asian_trade(self, trade, shocks):
+        """
+        Revalue one geometric Asian option on term structures: the average depends on the
+        whole curves, so each (vol, rate) scenario is priced by the option itself on the
+        shifted curves, for all the spot shocks at once.
+        """
+        spot_shocks, vol_shocks, rate_shocks = shocks
+        values = np.empty((len(spot_shocks), len(vol_shocks), len(rate_shocks)))
+        spots = trade.spot_price * (1 + spot_shocks)
+        for j, dv in enumerate(vol_shocks):
+            sigma = self._shift_volatility(trade.volatility, dv)
+            for k, dr in enumerate(rate_shocks):
+                shocked = trade._copy_fixings(GeometricAsianOption(
+                    spots, self._shift_rate(trade.risk_free_rate, dr), trade.maturity, trade.strike_price,
+                    sigma, trade.num_observations, trade.option_type
+                ))
+                values[:, j, k] = shocked.price()
+        return values
+
+    def _geometric_basket(self, trades, shocks):
+        spot_shocks, vol_shocks, rate_shocks = shocks
+        values = np.empty((len(trades), len(spot_shocks), len(vol_shocks), len(rate_shocks)))
+        # Baskets with different numbers of assets cannot share one array
+        for indices in self._group_by(trades, lambda trade: len(trade.spot_prices)).values():
+            group = [trades[i] for i in indices]
+            spots = np.array([trade.spot_prices for trade in group], dtype=float)
+            S = spots[:, None, None, None, :] * (1 + spot_shocks)[None, :, None, None, None]
+            if is_flat(*(sigma for trade in group for sigma in trade.volatilities)):
+                sigma = np.maximum(np.array([trade.volatilities for trade in group], dtype=float)[:, None, None, None, :]
+                                   + vol_shocks[None, None, :, None, None], self.MIN_VOLATILITY)
+            else:
+                sigma = np.array([
+                    [[average_volatility(self._shift_volatility(v, dv), trade.maturity) for v in trade.volatilities] for dv in vol_shocks]
+                    for trade in group
+                ])[:, None, :, None, :]
+            r = self._rates(group, rate_shocks)
+            values[indices] = self.closed_form.geometric_basket(
+                S, r, self._column(group, 'maturity'), self._column(group, 'strike_price'), sigma,
+                self._column(group, 'correlation'), self._column(group, 'option_type')
+            )
+        return values
+
+    def _american(self, trades, shocks):
+        values = np.empty((len(trades),) + tuple(len(s) for s in shocks))
+        # The lattices rolled back together must have the same number of steps
+        for num_steps, indices in self._group_by(trades, lambda trade: trade.num_steps).items():
+            group = [trades[i] for i in indices]
+            S, sigma, r = self._market(group, shocks)
+            values[indices] = self.tree.price(
+                self._column(group, 'option_type'), S, r, self._column(group, 'maturity'),
+                self._column(group, 'strike_price'), num_steps, sigma
+            )
+        return values
+
+    def _arithmetic_asian(self, trades, shocks):
+        values = np.empty((len(trades),) + tuple(len(s) for s in shocks))
+        for (num_paths, remaining), indices in self._group_by(trades, lambda trade: (trade.num_paths, trade.remaining_observations)).items():
+            # Same random numbers as ArithmeticAsianOption.price() (remaining observations only), shared by all scenarios
+            np.random.seed(0)
+            Z = np.random.normal(size=(num_paths, remaining))
+            for i in indices:
+                values[i] = self._arithmetic_asian_trade(trades[i], Z, shocks)
+        return values
+
+    def _arithmetic_asian_trade(self, trade, Z, shocks):
+        """
+        Revalue one arithmetic Asian option on the scenario grid.
+
+        Paths of the remaining observations are built once per (vol, rate) scenario;
+        their sum is linear in the spot, so every spot shock is a rescaling of the
+        same sums, to which the past fixings are added.
+        """
+        spot_shocks, vol_shocks, rate_shocks = shocks
+        values = np.empty((len(spot_shocks), len(vol_shocks), len(rate_shocks)))
+        spots = trade.spot_price * (1 + spot_shocks)
+        K, T, n, m = trade.strike_price, trade.maturity, trade.num_observations, trade.remaining_observations
+        sign = 1.0 if ClosedFormPricer.call_mask(trade.option_type) else -1.0
+
+        if m == 0:
+            # Every observation is fixed: the payoff is known and only discounted
+            payoff = max(sign * (trade.fixed_sum / n - K), 0)
+            for k, dr in enumerate(rate_shocks):
+                values[:, :, k] = discount_factor(self._shift_rate(trade.risk_free_rate, dr), T) * payoff
+            return values
+
+        for j, dv in enumerate(vol_shocks):
+            sigma = self._shift_volatility(trade.volatility, dv)
+            # The diffusion does not depend on the rate
+            diffusion = step_drift_diffusion(trade.risk_free_rate, sigma, T, m)[1] * Z
+            for k, dr in enumerate(rate_shocks):
+                r = self._shift_rate(trade.risk_free_rate, dr)
+                drift = step_drift_diffusion(r, sigma, T, m)[0]
+                log_paths = np.cumsum(drift + diffusion, axis=1)
+                arithmetic_means = (trade.fixed_sum + np.sum(np.exp(log_paths), axis=1)[:, None] * spots) / n
+                discount = discount_factor(r, T)
+                payoffs_arith = discount * np.maximum(sign * (arithmetic_means - K), 0)
+
+                if trade.use_control_variate:
+                    geometric_means = np.exp((trade.fixed_log_sum + np.sum(log_paths, axis=1)[:, None] + m * np.log(spots)) / n)
+                    payoffs_geom = discount * np.maximum(sign * (geometric_means - K), 0)
+                    geo_price = trade._copy_fixings(GeometricAsianOption(spots, r, T, K, sigma, n, trade.option_type)).price()
+                    # Same estimator as ArithmeticAsianOption.price(), one coefficient per spot scenario
+                    arith_centered = payoffs_arith - payoffs_arith.mean(axis=0)
+                    geom_centered = payoffs_geom - payoffs_geom.mean(axis=0)
+                    cov = np.sum(arith_centered * geom_centered, axis=0) / (len(Z) - 1)
+                    theta = cov / np.var(payoffs_geom, axis=0)
+                    values[:, j, k] = payoffs_arith.mean(axis=0) + theta * (geo_price - payoffs_geom.mean(axis=0))
+                else:
+                    values[:, j, k] = payoffs_arith.mean(axis=0)
+        return values
+
+    def _arithmetic_basket(self, trades, shocks):
+        values = np.empty((len(trades),) + tuple(len(s) for s in shocks))
+        for num_paths, indices in self._group_by(trades, lambda trade: trade.num_paths).items():
+            # Same random numbers as ArithmeticBasketOption.price(), shared by all scenarios
+            np.random.seed(0)
+            X1 = np.random.randn(num_paths)
+            X2 = np.random.randn(num_paths)
+            for i in indices:
+                values[i] = self._arithmetic_basket_trade(trades[i], X1, X2, shocks)
+        return values
+
+    def _arithmetic_basket_trade(self, trade, X1, X2, shocks):
+        """
+        Revalue one two-asset arithmetic basket option on the scenario grid.
+
+        Terminal prices are linear in the spots, so spot shocks are a rescaling of the same terminal prices.
+        """
+        spot_shocks, vol_shocks, rate_shocks = shocks
+        values = np.empty((len(spot_shocks), len(vol_shocks), len(rate_shocks)))
+        scale = 1 + spot_shocks
+        S1, S2 = trade.spot_prices
+        K, T, rho = trade.strike_price, trade.maturity, trade.correlation
+        Z1 = X1
+        Z2 = rho * X1 + np.sqrt(1 - rho**2) * X2
+        sign = 1.0 if ClosedFormPricer.call_mask(trade.option_type) else -1.0
+
+        for j, dv in enumerate(vol_shocks):
+            # Only the terminal distribution matters, so term structures enter through their values to maturity
+            sigma1, sigma2 = (average_volatility(self._shift_volatility(sigma, dv), T) for sigma in trade.volatilities)
+            for k, dr in enumerate(rate_shocks):
+                r = zero_rate(self._shift_rate(trade.risk_free_rate, dr), T)
+                S1_T = S1 * np.exp((r - 0.5 * sigma1**2) * T + sigma1 * np.sqrt(T) * Z1)
+                S2_T = S2 * np.exp((r - 0.5 * sigma2**2) * T + sigma2 * np.sqrt(T) * Z2)
+                payoff_arith = np.maximum(sign * ((S1_T + S2_T)[:, None] / 2 * scale - K), 0)
+
+                if trade.control_variate == 'geometric':
+                    payoff_geom = np.maximum(sign * (np.sqrt(S1_T * S2_T)[:, None] * scale - K), 0)
+                    geo_price = self.closed_form.geometric_basket(
+                        np.outer(scale, trade.spot_prices), r, T, K, [sigma1, sigma2], rho, trade.option_type
+                    )
+                    # Same estimator as ArithmeticBasketOption.price(), one coefficient per spot scenario
+                    arith_centered = payoff_arith - payoff_arith.mean(axis=0)
+                    geom_centered = payoff_geom - payoff_geom.mean(axis=0)
+                    b_hat = np.sum(arith_centered * geom_centered, axis=0) / np.sum(geom_centered**2, axis=0)
+                    values[:, j, k] = np.exp(-r * T) * (payoff_arith.mean(axis=0) - b_hat * (payoff_geom.mean(axis=0) - geo_price * np.exp(r * T)))
+                else:
+                    values[:, j, k] = np.exp(-r * T) * payoff_arith.mean(axis=0)
+        return values
+
+    def _kiko(self, trades, shocks):
+        values = np.empty((len(trades),) + tuple(len(s) for s in shocks))
+        for num_observations, indices in self._group_by(trades, lambda trade: trade.num_observations).items():
+            # Same Sobol points as KIKOOption.price(), shared by all scenarios
+            sequencer = qmc.Sobol(d=num_observations, seed=self.kiko_seed)
+            Z = norm.ppf(sequencer.random(n=self.kiko_num_paths))
+            for i in indices:
+                values[i] = self._kiko_trade(trades[i], Z, shocks)
+        return values
+
+    def _kiko_trade(self, trade, Z, shocks):
+        """
+        Revalue one KIKO option on the scenario grid from a fixed set of normal draws.
+        """
+        spot_shocks, vol_shocks, rate_shocks = shocks
+        values = np.empty((len(spot_shocks), len(vol_shocks), len(rate_shocks)))
+        T, m = trade.maturity, trade.num_observations
+        dt = T / m
+        shocked = KIKOOption(
+            trade.spot_price, trade.risk_free_rate, trade.maturity, trade.strike_price, trade.volatility,
+            trade.lower_barrier, trade.upper_barrier, trade.num_observations, trade.rebate
+        )
+
+        for j, dv in enumerate(vol_shocks):
+            sigma = self._shift_volatility(trade.volatility, dv)
+            # The diffusion does not depend on the rate
+            diffusion = step_drift_diffusion(trade.risk_free_rate, sigma, T, m)[1] * Z
+            for k, dr in enumerate(rate_shocks):
+                shocked.risk_free_rate = self._shift_rate(trade.risk_free_rate, dr)
+                drift = step_drift_diffusion(shocked.risk_free_rate, sigma, T, m)[0]
+                unit_paths = np.exp(np.cumsum(drift + diffusion, axis=1))
+                for i, ds in enumerate(spot_shocks):
+                    stock_paths = trade.spot_price * (1 + ds) * unit_paths
+                    values[i, j, k] = np.mean(shocked._discounted_payoffs(stock_paths, dt))
+        return values
+
+
+# Example usage
+if __name__ == "__main__":
+    portfolio = [
+        EuropeanOption(100, 0.05, 3, 100, 0.2, 0.3, 'call'),
+        GeometricAsianOption(100, 0.05, 3, 100, 0.3, 50, 'put'),
+        GeometricBasketOption([100, 100], 0.05, 3, 100, [0.3, 0.3], 0.5, 'call'),
+        AmericanOption(50, 0.1, 2, 40, 0.4, 200, 'put'),
+        ArithmeticAsianOption(100, 0.05, 3, 100, 0.3, 50, 10000, True, 'call'),
+        ArithmeticBasketOption([100, 100], 0.05, 3, 100, [0.3, 0.3], 0.5, 'put', num_paths=10000),
+        KIKOOption(100, 0.05, 2.0, 100, 0.2, 80, 125, 24, 1.5),
+    ]
+
+    engine = ScenarioEngine(
+        spot_shocks=np.linspace(-0.2, 0.2, 21),
+        vol_shocks=np.linspace(-0.05, 0.05, 11),
+        rate_shocks=np.linspace(-0.01, 0.01, 5),
+        kiko_num_paths=2**14,
+    )
+    pnl = engine.run(portfolio, quantities=[10, -5, 3, 2, 1, 4, -20])
+    print("P&L cube shape:", pnl.shape)
+    print("Portfolio P&L for spot -20% / +20%:", pnl[:, 0, 5, 2].sum(), pnl[:, -1, 5, 2].sum())
+
+    # Trades on term structures: the shocks shift the curves in parallel
+    curve = YieldCurve([0.5, 1, 2, 5], [0.03, 0.035, 0.04, 0.045])
+    vol_curve = VolTermStructure([0.5, 1, 2, 5], [0.25, 0.27, 0.3, 0.32])
+    curve_portfolio = [
+        EuropeanOption(100, curve, 3, 100, 0.02, vol_curve, 'call'),
+        ArithmeticAsianOption(100, curve, 3, 100, vol_curve, 50, 10000, True, 'call'),
+    ]
+    curve_pnl = engine.run(curve_portfolio)
+    shocked = EuropeanOption(100, curve.shifted(0.01), 3, 100, 0.02, vol_curve.shifted(0.05), 'call')
+    print("European on curves, vol +5% and rate +1%:", curve_pnl[0, 10, -1, -1], "vs repricing", shocked.price() - curve_portfolio[0].price())
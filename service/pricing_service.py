@@ -0,0 +1,372 @@
+"""
+Local pricing service speaking JSON lines over TCP.
+
+Every line sent by a client is one request, every line sent back is the
+response to one request (matched by "id", responses may come out of order):
+
+    {"id": 1, "product": "european", "params": {"spot_price": 100, "risk_free_rate": 0.05, "maturity": 3,
+     "strike_price": 100, "repo_rate": 0.2, "volatility": 0.3, "option_type": "call"}}
+    {"id": 1, "price": 3.7385...}
+
+Requests are collected for a short window and dispatched together: closed-form
+and tree products are priced as one vectorized batch per product in a background thread, Monte Carlo
+products and implied volatilities are sent to a pool of worker processes.
+
+Usage:
+    python -m service.pricing_service --port 8765 --window-ms 2
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from options.asian_option import ArithmeticAsianOption, GeometricAsianOption
+from options.basket_option import ArithmeticBasketOption
+from options.kiko_option import KIKOOption
+from pricer.binomial_tree_pricer import BiniomialTreePricer
+from pricer.closed_form_pricer import ClosedFormPricer
+from pricer.implied_volatility_calculator import ImpliedVolatility
+
+# Products priced in the event loop as vectorized batches, with the parameters each one needs
+VECTORIZED_PRODUCTS = {
+    'european': ('spot_price', 'risk_free_rate', 'maturity', 'strike_price', 'repo_rate', 'volatility', 'option_type'),
+    'american': ('option_type', 'spot_price', 'risk_free_rate', 'maturity', 'strike_price', 'num_steps', 'volatility'),
+    'geometric_asian': ('spot_price', 'risk_free_rate', 'maturity', 'strike_price', 'volatility', 'num_observations', 'option_type'),
+    'geometric_basket': ('spot_prices', 'risk_free_rate', 'maturity', 'strike_price', 'volatilities', 'correlation', 'option_type'),
+}
+
+# Products priced one by one in the worker pool
+POOLED_PRODUCTS = {
+    'arithmetic_asian': ArithmeticAsianOption,
+    'arithmetic_basket': ArithmeticBasketOption,
+    'kiko': KIKOOption,
+    'implied_volatility': None,
+}
+
+
+def batch_key(product, params):
+    """
+    Requests sharing a key can be priced in the same vectorized call.
+    """
+    if product == 'american':
+        # The tree depth is a loop bound, not an array dimension
+        return product, int(params['num_steps'])
+    if product == 'geometric_basket':
+        return product, len(params['spot_prices'])
+    if product == 'geometric_asian' and params.get('fixings'):
+        # Seasoned options carry their past fixings and are priced one by one
+        return product, 'seasoned'
+    return (product,)
+
+
+def price_batch(product, params_list):
+    """
+    Price a batch of requests of one vectorized product in a single call.
+
+    :param product: Key of VECTORIZED_PRODUCTS
+    :param params_list: List of parameter dictionaries (same batch key)
+    :return: List of prices, one per request
+    """
+    if product == 'geometric_asian' and any(params.get('fixings') for params in params_list):
+        return [float(GeometricAsianOption(**params).price()) for params in params_list]
+    names = VECTORIZED_PRODUCTS[product]
+    columns = {name: np.array([params[name] for params in params_list]) for name in names}
+    if product == 'european':
+        prices = ClosedFormPricer().european(**columns)
+    elif product == 'american':
+        columns['num_steps'] = int(columns['num_steps'][0])
+        prices = BiniomialTreePricer().price(**columns)
+    elif product == 'geometric_asian':
+        prices = ClosedFormPricer().geometric_asian(**columns)
+    else:
+        prices = ClosedFormPricer().geometric_basket(**columns)
+    return np.broadcast_to(prices, len(params_list)).tolist()
+
+
+def price_single(product, params):
+    """
+    Price one request of any product (runs in the worker processes for pooled products).
+
+    :return: Response fields: price and, for Monte Carlo products, conf_interval
+    """
+    if product in VECTORIZED_PRODUCTS:
+        return {'price': price_batch(product, [params])[0]}
+    if product == 'implied_volatility':
+        vol = ImpliedVolatility().calculate(
+            params['option_type'], params['spot_price'], params['risk_free_rate'], params['repo_rate'],
+            params['maturity'], params['strike_price'], params['option_premium'])
+        return {'price': float(vol)}
+
+    params = dict(params)
+    pricing_kwargs = {key: params.pop(key) for key in ('num_paths', 'seed') if key in params} if product == 'kiko' else {}
+    result = POOLED_PRODUCTS[product](**params).price(**pricing_kwargs)
+    if product == 'kiko':
+        price, low, high = result
+    else:
+        price, (low, high) = result
+    return {'price': float(price), 'conf_interval': [float(low), float(high)]}
+
+
+def price_group(product, params_list):
+    """
+    Price a group of requests sharing a batch key, isolating the requests that fail.
+
+    :return: List with, for each request, its response fields or the exception it raised
+    """
+    try:
+        return [{'price': price} for price in price_batch(product, params_list)]
+    except Exception:
+        # One bad request must not fail the others: price them one by one to isolate it
+        results = []
+        for params in params_list:
+            try:
+                results.append(price_single(product, params))
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+class PricingService:
+
+    def __init__(self, window: float = 0.002, max_batch_size: int = 4096, max_workers: int = None, use_processes: bool = True):
+        """
+        Constructor for PricingService class.
+
+        :param window: Seconds to wait for more requests after the first one of a batch (0 only batches the requests already queued)
+        :param max_batch_size: A batch is dispatched as soon as it holds this many requests
+        :param max_workers: Size of the Monte Carlo worker pool (defaults to the number of CPUs)
+        :param use_processes: Use worker processes (True) or threads (False) for the pooled products
+        """
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._executor_class = concurrent.futures.ProcessPoolExecutor if use_processes else concurrent.futures.ThreadPoolExecutor
+        self._max_workers = max_workers
+        self.executor = self._executor_class(max_workers=max_workers)
+        # The vectorized batches run in one thread so that a large batch does not block the event loop
+        self._batch_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.batches_dispatched = 0
+        self.requests_priced = 0
+        self._queue = None
+        self._batcher = None
+
+    async def price(self, product, params):
+        """
+        Price one request; it is batched with the other requests arriving in the same window.
+
+        :return: Response fields (price, and conf_interval for Monte Carlo products)
+        """
+        if product not in VECTORIZED_PRODUCTS and product not in POOLED_PRODUCTS:
+            raise ValueError(f"Unknown product '{product}'")
+        if self._batcher is None:
+            self._queue = asyncio.Queue()
+            self._batcher = asyncio.get_running_loop().create_task(self._batch_loop())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((product, params, future))
+        return await future
+
+    async def _batch_loop(self):
+        """
+        Collect requests for one window at a time and dispatch them.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    # Take whatever is already queued without waiting
+                    if self._queue.empty():
+                        break
+                    batch.append(self._queue.get_nowait())
+                    continue
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                self._dispatch(batch)
+            except Exception as e:
+                # Fail the requests of this batch but keep serving the next ones
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _dispatch(self, batch):
+        """
+        Hand the vectorized groups of a batch to the batch thread and the other requests to the worker pool.
+        """
+        loop = asyncio.get_running_loop()
+        self.batches_dispatched += 1
+        self.requests_priced += len(batch)
+        groups = {}
+        for product, params, future in batch:
+            if product in VECTORIZED_PRODUCTS:
+                try:
+                    groups.setdefault(batch_key(product, params), []).append((params, future))
+                except (KeyError, TypeError, ValueError) as e:
+                    future.set_exception(ValueError(f"Invalid parameters: {e}"))
+            else:
+                try:
+                    job = self._submit(product, params)
+                except RuntimeError as e:
+                    future.set_exception(e)
+                    continue
+                pooled = asyncio.wrap_future(job)
+                pooled.add_done_callback(lambda done, future=future: self._forward(done, future))
+
+        for key, requests in groups.items():
+            job = loop.run_in_executor(self._batch_executor, price_group, key[0], [params for params, _ in requests])
+            job.add_done_callback(lambda done, requests=requests: self._resolve(done, requests))
+
+    def _submit(self, product, params):
+        """
+        Submit a request to the worker pool, replacing the pool if a worker died.
+
+        A worker killed by the operating system breaks the whole pool, so every later
+        submission would fail: the pool is replaced once and the request resubmitted.
+        """
+        try:
+            return self.executor.submit(price_single, product, params)
+        except concurrent.futures.BrokenExecutor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = self._executor_class(max_workers=self._max_workers)
+            return self.executor.submit(price_single, product, params)
+
+    @staticmethod
+    def _resolve(done, requests):
+        """
+        Copy the results of a vectorized group to the futures of its requests.
+        """
+        if done.cancelled():
+            return
+        if done.exception() is not None:
+            results = [done.exception()] * len(requests)
+        else:
+            results = done.result()
+        for (_, future), result in zip(requests, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _forward(done, future):
+        """
+        Copy the outcome of a worker pool job to the future of its request.
+        """
+        if future.done():
+            return
+        if done.exception() is not None:
+            future.set_exception(done.exception())
+        else:
+            future.set_result(done.result())
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serve one client: read requests line by line and write each response as soon as it is ready.
+        """
+        pending = set()
+        lock = asyncio.Lock()
+
+        async def respond(request):
+            response = {'id': request.get('id')}
+            try:
+                response.update(await self.price(request['product'], request.get('params', {})))
+            except Exception as e:
+                response['error'] = f"{type(e).__name__}: {e}"
+            async with lock:
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    writer.write((json.dumps({'id': None, 'error': f"Invalid JSON: {e}"}) + "\n").encode())
+                    continue
+                if not isinstance(request, dict):
+                    writer.write((json.dumps({'id': None, 'error': "A request must be a JSON object"}) + "\n").encode())
+                    continue
+                task = asyncio.create_task(respond(request))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8765):
+        """
+        Start listening; returns the asyncio server.
+        """
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self):
+        """
+        Stop the batching task and shut the worker pool and the batch thread down.
+        """
+        if self._batcher is not None:
+            self._batcher.cancel()
+            self._batcher = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self._batch_executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _load_test(host, port, num_clients, requests_per_client):
+    """
+    Send European pricing requests from several concurrent clients and return the throughput.
+    """
+    async def client(index):
+        reader, writer = await asyncio.open_connection(host, port)
+        for i in range(requests_per_client):
+            params = {'spot_price': 100, 'risk_free_rate': 0.05, 'maturity': 1, 'strike_price': 80 + (index + i) % 40,
+                      'repo_rate': 0.0, 'volatility': 0.2, 'option_type': 'call'}
+            writer.write((json.dumps({'id': i, 'product': 'european', 'params': params}) + "\n").encode())
+        await writer.drain()
+        for _ in range(requests_per_client):
+            await reader.readline()
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(num_clients)))
+    return num_clients * requests_per_client / (time.perf_counter() - start)
+
+
+async def _main(args):
+    service = PricingService(window=args.window_ms / 1000, max_batch_size=args.max_batch, max_workers=args.workers)
+    server = await service.serve(args.host, args.port)
+    print(f"Pricing service listening on {args.host}:{args.port}")
+    try:
+        if args.load_test:
+            throughput = await _load_test(args.host, args.port, num_clients=50, requests_per_client=200)
+            print(f"{throughput:.0f} requests/s in {service.batches_dispatched} batches")
+        else:
+            await server.serve_forever()
+    finally:
+        server.close()
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local JSON-lines pricing service with request micro-batching.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--window-ms', type=float, default=2.0, help="batching window in milliseconds")
+    parser.add_argument('--max-batch', type=int, default=4096, help="maximum number of requests per batch (1 disables batching)")
+    parser.add_argument('--workers', type=int, default=None, help="Monte Carlo worker processes")
+    parser.add_argument('--load-test', action='store_true', help="run a local load test instead of serving forever")
+    asyncio.run(_main(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
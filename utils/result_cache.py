@@ -0,0 +1,212 @@
+import functools
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+PACKAGE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.option_pricer', 'results.sqlite')
+
+# Source directories whose contents define the code version: editing a pricer invalidates its cached results
+VERSIONED_DIRS = ('options', 'pricer', 'market')
+
+
+@functools.lru_cache(maxsize=1)
+def code_version():
+    """
+    Hash of the pricing source code (options/, pricer/, market/).
+    """
+    digest = hashlib.sha256()
+    for directory in VERSIONED_DIRS:
+        root = os.path.join(PACKAGE_DIR, directory)
+        for name in sorted(os.listdir(root)):
+            if name.endswith('.py'):
+                digest.update(name.encode())
+                with open(os.path.join(root, name), 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _attributes(value):
+    """
+    Instance attributes of an object, whether stored in __dict__ or in __slots__.
+    """
+    attributes = dict(getattr(value, '__dict__', {}))
+    for cls in type(value).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            if hasattr(value, name):
+                attributes[name] = getattr(value, name)
+    return attributes
+
+
+def canonical(value):
+    """
+    Convert option parameters (numbers, lists, arrays, curve objects) into plain JSON-serializable data.
+
+    Objects are described by their class and public attributes; private attributes
+    (caches, precomputed arrays) are left out since they derive from the public ones.
+    """
+    if isinstance(value, (bool, str)) or value is None:
+        return value
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        # repr round-trips exactly, so equal floats give equal keys and different floats different keys
+        return repr(float(value))
+    if isinstance(value, np.ndarray):
+        return [canonical(x) for x in value.tolist()]
+    if isinstance(value, (list, tuple)):
+        return [canonical(x) for x in value]
+    if isinstance(value, dict):
+        return {str(k): canonical(v) for k, v in sorted(value.items())}
+    if hasattr(value, '__dict__') or hasattr(value, '__slots__'):
+        attributes = {k: canonical(v) for k, v in sorted(_attributes(value).items()) if not k.startswith('_')}
+        return {'__class__': f"{type(value).__module__}.{type(value).__qualname__}", **attributes}
+    raise TypeError(f"Cannot build a cache key from {type(value).__name__}")
+
+
+class ResultCache:
+
+    def __init__(self, path: str = DEFAULT_PATH, max_entries: int = 100000, enabled: bool = True):
+        """
+        Persistent content-addressed cache of pricing results, stored in SQLite.
+
+        The key of an entry is a hash of the option class and parameters, the
+        method called with its settings (paths, seed, ...) and the code version,
+        so a cached result is only reused for an identical computation. The
+        least recently used entries are evicted beyond max_entries.
+
+        :param path: SQLite file (':memory:' for a process-local cache)
+        :param max_entries: Maximum number of stored results
+        :param enabled: When False every call is computed and nothing is stored
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+            "description TEXT, created REAL NOT NULL, last_access REAL NOT NULL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+        self._connection.commit()
+
+    @staticmethod
+    def key(option, method: str = 'price', **kwargs):
+        """
+        Cache key of calling option.<method>(**kwargs).
+
+        :return: Tuple (hex digest, canonical description)
+        """
+        description = json.dumps({
+            'option': canonical(option),
+            'method': method,
+            'kwargs': canonical(kwargs),
+            'code_version': code_version(),
+        }, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(description.encode()).hexdigest(), description
+
+    def get(self, key: str):
+        """
+        Cached value of a key, or None.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._connection.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._connection.commit()
+        return pickle.loads(row[0])
+
+    def put(self, key: str, value, description: str = None):
+        """
+        Store a value and evict the least recently used entries beyond max_entries.
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results (key, value, description, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, pickle.dumps(value), description, now, now))
+            self._connection.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,))
+            self._connection.commit()
+
+    def call(self, option, method: str = 'price', bypass: bool = False, **kwargs):
+        """
+        Return option.<method>(**kwargs), from the cache when the same computation was done before.
+
+        :param option: Option instance
+        :param method: Name of the method to call ('price', 'calculate_delta', ...)
+        :param bypass: Recompute even if cached (the new result replaces the cached one)
+        :param kwargs: Arguments of the method (part of the key)
+        :return: Result of the method
+        """
+        if not self.enabled:
+            return getattr(option, method)(**kwargs)
+        key, description = self.key(option, method, **kwargs)
+        if not bypass:
+            value = self.get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+        self.misses += 1
+        value = getattr(option, method)(**kwargs)
+        self.put(key, value, description)
+        return value
+
+    def price(self, option, bypass: bool = False, **kwargs):
+        """
+        Cached option.price(**kwargs): price and confidence interval for Monte Carlo products.
+        """
+        return self.call(option, 'price', bypass, **kwargs)
+
+    def greeks(self, option, names=('calculate_delta',), bypass: bool = False, **kwargs):
+        """
+        Cached Greeks of an option.
+
+        :param names: Names of the Greek methods of the option
+        :return: Dictionary of method name to value
+        """
+        return {name: self.call(option, name, bypass, **kwargs) for name in names}
+
+    def clear(self):
+        """
+        Remove every entry.
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM results")
+            self._connection.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+
+# Example usage
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    sys.path.append(PACKAGE_DIR)
+    from options.kiko_option import KIKOOption
+
+    cache = ResultCache(os.path.join(tempfile.mkdtemp(), 'results.sqlite'))
+    option = KIKOOption(100, 0.05, 2.0, 100, 0.2, 80, 125, 24, 1.5)
+    for run in ("first run", "re-run"):
+        start = time.perf_counter()
+        price, low, high = cache.price(option, num_paths=2**17)
+        print(f"{run}: {price:.4f} [{low:.4f}, {high:.4f}] in {(time.perf_counter() - start) * 1e3:.1f} ms")
+    print("Delta:", cache.greeks(option)['calculate_delta'])
+    print("Hits:", cache.hits, "misses:", cache.misses, "entries:", len(cache))